@@ -0,0 +1,9 @@
+# app_config.py
+
+TRANSCRIPTION_CONFIG = {
+    'backend': 'google',  # 'google' (online), 'sphinx' (offline, needs pocketsphinx) or 'fake'
+    'language': 'en-US',
+    'latency': 0.0,  # 'fake' only: simulated seconds per request, for benchmarks
+}
+
+LABELS = ["Speech", "Noise", "Music", "Happy", "Sad", "Angry", "English", "Telugu"]
@@ -0,0 +1,167 @@
+# bench_coordinator.py
+# Usage: python -m benchmarks.bench_coordinator [--clients 32] [--files 2000] [--batch 5] [--target 0.01]
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.corpus import write_wav
+from utils.coordinator import CoordinatorClient, CoordinatorError
+from utils.file_index import relative_name
+from utils.metrics import Histogram, format_seconds
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_folder(folder, files, sample_rate=8000):
+    # Tiny files: the server only indexes headers, the clients never decode anything
+    clip = np.zeros(sample_rate // 10, dtype=np.float32)
+    for i in range(files):
+        subdir = os.path.join(folder, f"batch_{i // 500:03d}")
+        os.makedirs(subdir, exist_ok=True)
+        write_wav(os.path.join(subdir, f"clip_{i:06d}.wav"), clip, sample_rate)
+
+
+def start_server(folder, workdir):
+    # Separate process, so client threads here do not compete with the server for the GIL
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.Popen([sys.executable, "-m", "utils.coordinator", folder, "--port", "0"], cwd=workdir,
+                            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        raise RuntimeError(proc.stderr.read().strip() or "coordinator did not start")
+    address = line.split(" on ", 1)[1].split(":", 2)
+    return proc, f"{address[0]}:{address[1]}"
+
+
+def simulate(address, name, batch, think, ttl, results, seen, lock):
+    # One labeler: lease a batch, "label" each file, commit, repeat until the queue is empty.
+    # Labeling times are exponential around think and starts are staggered, as with real people.
+    client = CoordinatorClient(address, labeler=name)
+    lease_times = Histogram()
+    commit_times = Histogram()
+    rng = random.Random(name)
+    time.sleep(rng.uniform(0, think * batch))
+    try:
+        while True:
+            start = time.perf_counter()
+            paths = client.lease(batch, ttl)
+            lease_times.add(time.perf_counter() - start)
+            if not paths:
+                break
+            with lock:
+                duplicates = seen.intersection(paths)
+                seen.update(paths)
+            entries = []
+            for path in paths:
+                time.sleep(rng.expovariate(1.0 / think) if think else 0.0)
+                entries.append({"filename": relative_name(path, client.folder), "transcription": "", "labels": "Noise",
+                                "start_time": "", "end_time": ""})
+            start = time.perf_counter()
+            client.commit(entries, paths)
+            commit_times.add(time.perf_counter() - start)
+            if duplicates:
+                results.setdefault("duplicates", []).extend(duplicates)
+    except CoordinatorError as e:
+        results.setdefault("errors", []).append(f"{name}: {e}")
+    finally:
+        client.close()
+    with lock:
+        results.setdefault("lease", []).append(lease_times)
+        results.setdefault("commit", []).append(commit_times)
+
+
+def merge(histograms):
+    merged = Histogram()
+    for h in histograms:
+        for bucket, count in h.buckets.items():
+            merged.buckets[bucket] = merged.buckets.get(bucket, 0) + count
+        merged.count += h.count
+        merged.total += h.total
+        merged.max = max(merged.max, h.max)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent labelers against the coordination service.")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=5, help="files per lease")
+    parser.add_argument("--think", type=float, default=0.05,
+                        help="mean simulated labeling seconds per file (real labelers take several seconds)")
+    parser.add_argument("--target", type=float, default=0.01, help="p95 lease latency in seconds")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        folder = os.path.join(workdir, "corpus")
+        make_folder(folder, args.files)
+        proc, address = start_server(folder, workdir)
+        try:
+            # A labeler who leases and disappears: its files must come back once the lease expires
+            abandoned = CoordinatorClient(address, labeler="abandoned").lease(args.batch, ttl=0.5)
+            results = {}
+            seen = set()
+            lock = threading.Lock()
+            threads = [threading.Thread(target=simulate, args=(address, f"labeler-{i:02d}", args.batch, args.think,
+                                                               30.0, results, seen, lock))
+                       for i in range(args.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # Stragglers: the abandoned files expire while the others work; pick up whatever is left
+            time.sleep(0.6)
+            simulate(address, "sweeper", args.batch, 0.0, 30.0, results, seen, lock)
+            elapsed = time.perf_counter() - start
+            stats = CoordinatorClient(address, labeler="stats").stats()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    lease = merge(results.get("lease", []))
+    commit = merge(results.get("commit", []))
+    print(f"{args.clients} clients, {args.files} files in {elapsed:.2f}s "
+          f"({(lease.count + commit.count) / elapsed:.0f} requests/s)")
+    for name, h in (("lease", lease), ("commit", commit)):
+        print(f"  {name:<7} n={h.count:<6} p50 {format_seconds(h.percentile(0.5)):>6}  "
+              f"p95 {format_seconds(h.percentile(0.95)):>6}  p99 {format_seconds(h.percentile(0.99)):>6}  "
+              f"max {format_seconds(h.max):>6}")
+    server = stats.get("lease_latency")
+    if server:
+        print(f"  lease handling in the server: p50 {format_seconds(server['p50'])}, "
+              f"p95 {format_seconds(server['p95'])}")
+    files = stats["files"]
+    expired = stats["labelers"].get("abandoned", {}).get("expired", 0)
+    print(f"  server: {files['done']} done, {files['leased']} leased, {files['open']} open; "
+          f"{expired} expired leases")
+    status = 0
+    for message in results.get("errors", []):
+        print(f"  error: {message}")
+        status = 1
+    if results.get("duplicates"):
+        print(f"  {len(results['duplicates'])} files were leased to two labelers")
+        status = 1
+    if expired != len(abandoned) or not seen.issuperset(abandoned):
+        print(f"  {len(abandoned)} abandoned files: {expired} leases expired, "
+              f"{len(seen.intersection(abandoned))} leased again")
+        status = 1
+    if files["done"] != args.files:
+        print(f"  expected {args.files} files done")
+        status = 1
+    if lease.percentile(0.95) > args.target:
+        print(f"  p95 lease latency above the {format_seconds(args.target)} target")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# bench_db_upload.py
+# Usage: python -m benchmarks.bench_db_upload [--rows 100000] [--chunk-size 1000]
+
+import argparse
+import os
+import tempfile
+import time
+
+from utils.db_upload import SQLiteAdapter, SyncState, upload_rows
+
+
+def make_rows(count):
+    return [{
+        "filename": f"clip_{i // 4:06d}.wav",
+        "transcription": f"synthetic transcription number {i}",
+        "labels": "Speech, English" if i % 3 else "Noise",
+        "start_time": f"{(i % 4) * 2.5:.2f}",
+        "end_time": f"{(i % 4) * 2.5 + 2.5:.2f}",
+    } for i in range(count)]
+
+
+def naive_upload(rows, path):
+    # The previous approach: one INSERT per row over a fresh connection
+    adapter = SQLiteAdapter(path)
+    conn = adapter.connect()
+    adapter.ensure_schema(conn)
+    cursor = conn.cursor()
+    for row in rows:
+        cursor.execute("INSERT INTO labeled_data (filename, transcription, labels, start_time, end_time) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       (row["filename"], row["transcription"], row["labels"], row["start_time"], row["end_time"]))
+        conn.commit()
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    sent = fn()
+    elapsed = time.perf_counter() - start
+    sent = count if sent is None else sent
+    rate = sent / elapsed if elapsed else 0.0
+    print(f"{label:<32} {sent:>8} rows  {elapsed:8.3f}s  {rate:12,.0f} rows/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark batched label upload against SQLite.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--naive-rows", type=int, default=5000, help="rows for the per-row INSERT baseline")
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        naive_rows = rows[:args.naive_rows]
+        timed("per-row insert + commit", len(naive_rows), lambda: naive_upload(naive_rows, os.path.join(tmp, "naive.db")))
+
+        adapter = SQLiteAdapter(os.path.join(tmp, "batched.db"))
+        state = SyncState(os.path.join(tmp, "sync.json"))
+        timed("batched upsert (initial)", len(rows), lambda: upload_rows(rows, adapter, args.chunk_size, state))
+        timed("incremental, nothing changed", len(rows), lambda: upload_rows(rows, adapter, args.chunk_size, state))
+
+        for row in rows[::100]:
+            row["labels"] = "Music"
+        timed("incremental, 1% changed", len(rows), lambda: upload_rows(rows, adapter, args.chunk_size, state))
+        timed("full re-upsert", len(rows), lambda: upload_rows(rows, adapter, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
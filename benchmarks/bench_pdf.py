@@ -0,0 +1,41 @@
+# bench_pdf.py
+# Usage: python -m benchmarks.bench_pdf [--entries 50000] [--target 10]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app_config import LABELS
+from utils.label_store import LabelStore
+from utils.pdf_generator import generate_pdf
+
+
+def make_store(count):
+    store = LabelStore(LABELS)
+    for i in range(count):
+        store.add(f"clip_{i // 4:06d}.wav", f"synthetic transcription number {i} for the report benchmark",
+                  LABELS[i % 3:i % 3 + 1 + i % 2], (i % 4) * 2.5, (i % 4) * 2.5 + 2.5)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF report generation.")
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--target", type=float, default=10.0, help="seconds; exit non-zero when slower")
+    args = parser.parse_args(argv)
+
+    store = make_store(args.entries)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        paths = generate_pdf(store, os.path.join(tmp, "report.pdf"))
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(p) for p in paths)
+    print(f"{args.entries} entries -> {len(paths)} file(s), {size / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({args.entries / elapsed:,.0f} entries/s, target {args.target:.0f}s)")
+    return 0 if paths and elapsed <= args.target else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
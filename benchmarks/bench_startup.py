@@ -0,0 +1,84 @@
+# bench_startup.py
+# Usage: python -m benchmarks.bench_startup [--module tool] [--runs 5] [--target 1.0] [--import-target 0.5]
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_ENV = "AUDIO_LABELING_STARTUP_PROBE"
+
+
+def import_breakdown(module):
+    # -X importtime prints "import time: self | cumulative | name" per module, in microseconds
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    per_package = defaultdict(float)
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        per_package[package] += int(self_us) / 1e6
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, sorted(per_package.items(), key=lambda item: -item[1])
+
+
+def first_window(module, timeout=30.0):
+    # Wall time from launching the app until its first window has been drawn
+    env = dict(os.environ, **{PROBE_ENV: "1"})
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, f"{module}.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in proc.stdout:
+            if line.startswith("first-window"):
+                elapsed = time.perf_counter() - start
+                proc.wait(timeout=timeout)
+                return elapsed, float(line.split()[1])
+        proc.wait(timeout=timeout)
+        error = proc.stderr.read().strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"{module}.py exited without opening a window")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and time to first window.")
+    parser.add_argument("--module", default="tool", help="app module to start (tool or main)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages listed in the import breakdown")
+    parser.add_argument("--target", type=float, default=1.0, help="seconds to first window")
+    parser.add_argument("--import-target", type=float, default=0.5, help="seconds to import the app module")
+    args = parser.parse_args(argv)
+
+    runs = [import_breakdown(args.module) for _ in range(args.runs)]
+    total, breakdown = min(runs, key=lambda run: run[0])
+    print(f"import {args.module}: {total * 1000:.0f} ms (best of {args.runs})")
+    for package, seconds in breakdown[:args.top]:
+        print(f"  {package:<28} {seconds * 1000:8.1f} ms")
+    status = 0 if total <= args.import_target else 1
+
+    try:
+        windows = [first_window(args.module) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"first window: skipped ({e})")
+        return status
+    wall, in_process = min(windows)
+    print(f"first window: {wall * 1000:.0f} ms from launch ({in_process * 1000:.0f} ms after the first import), "
+          f"target {args.target * 1000:.0f} ms")
+    if wall > args.target:
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
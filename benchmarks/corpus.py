@@ -0,0 +1,100 @@
+# corpus.py
+# Usage: python -m benchmarks.corpus OUT_DIR [--files 40] [--seconds 15] [--sample-rate 16000] [--seed 0]
+
+import argparse
+import os
+import wave
+
+import numpy as np
+
+KINDS = ("speech", "music", "noise", "mixed")
+
+
+def _speech_like(rng, n, sr):
+    # Band-limited noise gated at a syllable rate with pauses: enough structure for VAD and features
+    noise = rng.standard_normal(n).astype(np.float32)
+    kernel = np.hanning(max(3, sr // 2000))
+    voiced = np.convolve(noise, kernel / kernel.sum(), mode="same")
+    t = np.arange(n) / float(sr)
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3.0, 5.0) * t)) ** 2
+    words = (np.sin(2 * np.pi * rng.uniform(0.3, 0.6) * t + rng.uniform(0, np.pi)) > -0.3).astype(np.float32)
+    return 0.6 * voiced / (np.abs(voiced).max() + 1e-9) * syllables * words
+
+
+def _music_like(rng, n, sr):
+    t = np.arange(n) / float(sr)
+    root = rng.choice([110.0, 146.8, 196.0, 220.0])
+    signal = np.zeros(n, dtype=np.float64)
+    for ratio in (1.0, 1.25, 1.5, 2.0):
+        for harmonic in range(1, 4):
+            signal += np.sin(2 * np.pi * root * ratio * harmonic * t) / harmonic
+    return (0.3 * signal / np.abs(signal).max()).astype(np.float32)
+
+
+def synth_clip(kind, seconds, sample_rate, rng):
+    n = int(seconds * sample_rate)
+    if kind == "speech":
+        clip = _speech_like(rng, n, sample_rate)
+    elif kind == "music":
+        clip = _music_like(rng, n, sample_rate)
+    elif kind == "noise":
+        clip = 0.2 * rng.standard_normal(n).astype(np.float32)
+    else:
+        clip = 0.7 * _speech_like(rng, n, sample_rate) + 0.3 * _music_like(rng, n, sample_rate)
+    clip += 0.002 * rng.standard_normal(n).astype(np.float32)  # room tone, never digital silence
+    return np.clip(clip, -1.0, 1.0).astype(np.float32)
+
+
+def write_wav(path, samples, sample_rate):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+
+def write_long_wav(path, seconds, sample_rate, seed=0, block_seconds=60):
+    # Written block by block so generating an hour of audio does not need an hour in memory
+    rng = np.random.default_rng(seed)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        remaining = seconds
+        while remaining > 0:
+            block = synth_clip("mixed", min(block_seconds, remaining), sample_rate, rng)
+            w.writeframes((block * 32767.0).astype("<i2").tobytes())
+            remaining -= block_seconds
+    return path
+
+
+def make_corpus(folder, files=40, seconds=15.0, sample_rate=16000, seed=0):
+    # Deterministic for a given seed; files are spread over subfolders like a real dataset
+    paths = []
+    for i in range(files):
+        rng = np.random.default_rng(seed * 100003 + i)
+        kind = KINDS[i % len(KINDS)]
+        subdir = os.path.join(folder, f"batch_{i // 100:03d}")
+        os.makedirs(subdir, exist_ok=True)
+        path = os.path.join(subdir, f"{kind}_{i:05d}.wav")
+        length = seconds * rng.uniform(0.5, 1.5)
+        write_wav(path, synth_clip(kind, length, sample_rate, rng), sample_rate)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic audio corpus.")
+    parser.add_argument("folder")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=15.0, help="mean clip length")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = make_corpus(args.folder, args.files, args.seconds, args.sample_rate, args.seed)
+    print(f"Wrote {len(paths)} files to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
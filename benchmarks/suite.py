@@ -0,0 +1,315 @@
+# suite.py
+# Usage: python -m benchmarks.suite [--files 40] [--rows 100000] [--baseline benchmarks/baseline.json]
+#                                   [--threshold 0.3] [--update-baseline]
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.bench_db_upload import make_rows
+from benchmarks.bench_pdf import LABELS, make_store
+from benchmarks.corpus import make_corpus, write_long_wav
+
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+RESULTS_DIR = os.path.join("output", "benchmarks")
+THRESHOLD = 0.3
+NOISE_FLOOR = {"s": 0.025, "ms": 0.05, "us": 5.0, "MB": 8.0}  # smaller differences are never regressions
+VIEW_COLUMNS = 1200
+
+
+def timed(fn, repeat=1):
+    # Best of `repeat` runs: the least disturbed by the rest of the machine
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _max_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024.0 / 1024.0 if sys.platform == "darwin" else rss / 1024.0
+
+
+def _stream_rss(path):
+    # Runs in a fresh process so the peak RSS is not inflated by the rest of the suite
+    from utils.audio_stream import iter_blocks
+    from utils.peak_cache import compute_pyramid
+    for _ in iter_blocks(path):
+        break
+    before = _max_rss_mb()
+    frames = 0
+    for block in iter_blocks(path):
+        frames += len(block)
+    compute_pyramid(path)
+    return _max_rss_mb() - before, frames * 4 / 1e6
+
+
+# ------------------ Benchmarks ------------------
+
+def bench_decode(ctx):
+    from utils.audio_stream import read_range
+    elapsed, buffers = timed(lambda: [read_range(p) for p in ctx["paths"]], ctx["repeat"])
+    ctx["buffers"] = buffers
+    ctx["audio_seconds"] = sum(len(b) for b in buffers) / float(ctx["sample_rate"])
+    return {"decode": (elapsed, "s")}
+
+
+def bench_waveform(ctx):
+    from utils.peak_cache import compute_pyramid, peaks_from_samples
+    cold, _ = timed(lambda: [compute_pyramid(p) for p in ctx["paths"]], ctx["repeat"])
+    pyramids = [peaks_from_samples(b, ctx["sample_rate"]) for b in ctx["buffers"]]
+    rng = np.random.default_rng(0)
+    views = []
+    for _ in range(500):
+        pyramid = pyramids[rng.integers(len(pyramids))]
+        span = pyramid.num_samples * rng.uniform(0.001, 1.0)
+        start = rng.uniform(0, pyramid.num_samples - span)
+        views.append((pyramid, start, start + span))
+
+    def render():
+        # Everything WaveformView.redraw does except the Tk call itself
+        for pyramid, start, end in views:
+            mins, maxs = pyramid.peaks_for_range(start, end, VIEW_COLUMNS)
+            coords = np.empty((len(mins), 4), dtype=np.float32)
+            coords[:, 0] = coords[:, 2] = np.arange(len(mins))
+            coords[:, 1] = 100 - maxs * 98
+            coords[:, 3] = np.maximum(100 - mins * 98, coords[:, 1] + 1)
+            coords.ravel().tolist()
+    elapsed, _ = timed(render, ctx["repeat"])
+    return {"peaks_build": (cold, "s"), "waveform_redraw": (elapsed / len(views) * 1e3, "ms")}
+
+
+def bench_transcribe(ctx):
+    from utils.transcription_ai import get_backend, transcribe_samples
+    backend = get_backend("fake", latency=0.0)
+    elapsed, _ = timed(lambda: [transcribe_samples(b, ctx["sample_rate"], backend) for b in ctx["buffers"]],
+                       ctx["repeat"])
+    return {"transcribe_fake": (elapsed, "s")}
+
+
+def bench_analysis(ctx):
+    from utils.features import features_from_samples
+    from utils.vad import segment_samples
+    features_from_samples(ctx["buffers"][0][:4096], ctx["sample_rate"])  # warm-up: librosa import, mel filters
+    vad, _ = timed(lambda: [segment_samples(b, ctx["sample_rate"]) for b in ctx["buffers"]], ctx["repeat"])
+    features, _ = timed(lambda: [features_from_samples(b, ctx["sample_rate"]) for b in ctx["buffers"]],
+                        ctx["repeat"])
+    return {"vad": (vad, "s"), "features": (features, "s")}
+
+
+def bench_index(ctx):
+    from utils.file_index import FileIndex
+    path = os.path.join(ctx["tmp"], "index.sqlite3")
+
+    def refresh():
+        index = FileIndex(ctx["corpus"], path)
+        index.refresh()
+        index.close()
+    cold, _ = timed(refresh)
+    warm, _ = timed(refresh, ctx["repeat"])
+    return {"index_cold": (cold, "s"), "index_warm": (warm, "s")}
+
+
+def bench_fingerprint(ctx):
+    from utils.file_index import FileIndex
+    from utils.fingerprint import FingerprintIndex
+    file_index = FileIndex(ctx["corpus"], os.path.join(ctx["tmp"], "fp-files.sqlite3"))
+    records = file_index.refresh()
+    file_index.close()
+    path = os.path.join(ctx["tmp"], "fingerprints.npz")
+
+    def refresh():
+        index = FingerprintIndex(ctx["corpus"], path)
+        index.refresh(records)
+        return index
+    cold, _ = timed(refresh)
+    warm, index = timed(refresh, ctx["repeat"])
+    lookup, _ = timed(lambda: [index.matches(record.path) for record in records], ctx["repeat"])
+    return {"fingerprint_cold": (cold, "s"), "fingerprint_warm": (warm, "s"),
+            "fingerprint_lookup": (lookup / max(1, len(records)) * 1e6, "us")}
+
+
+def bench_save_label(ctx):
+    # What save_label does per entry: journal append (fsync batched) plus the in-memory store
+    from utils.label_journal import LabelJournal
+    from utils.label_store import LabelStore
+    rows = ctx["rows"]
+    journal = LabelJournal(os.path.join(ctx["tmp"], "session.jsonl"))
+    store = LabelStore(LABELS)
+
+    def save():
+        for i in range(rows):
+            labels = LABELS[i % 3:i % 3 + 1 + i % 2]
+            entry = {"filename": f"clip_{i // 4:06d}.wav", "transcription": f"synthetic transcription {i}",
+                     "labels": ", ".join(labels), "start_time": f"{(i % 4) * 2.5:.2f}",
+                     "end_time": f"{(i % 4) * 2.5 + 2.5:.2f}"}
+            journal.append(entry)
+            store.add(entry["filename"], entry["transcription"], labels, (i % 4) * 2.5, (i % 4) * 2.5 + 2.5)
+    elapsed, _ = timed(save)
+    journal.close()
+    return {"save_label": (elapsed / rows * 1e6, "us")}
+
+
+def bench_export(ctx):
+    from utils import exporter
+    from utils.pdf_generator import generate_pdf
+    store = make_store(ctx["rows"])
+    state_path = os.path.join(ctx["tmp"], "export_state.json")
+    csv, _ = timed(lambda: exporter.export_csv(store, os.path.join(ctx["tmp"], "labels.csv"),
+                                               state_path=state_path), ctx["repeat"])
+    pdf_store = make_store(ctx["pdf_rows"])
+    pdf, _ = timed(lambda: generate_pdf(pdf_store, os.path.join(ctx["tmp"], "report.pdf")))
+    return {"export_csv": (csv, "s"), "export_pdf": (pdf, "s")}
+
+
+def bench_db_upload(ctx):
+    # SQLite stands in for MySQL: same batching, upsert and change detection code path
+    from utils.db_upload import SQLiteAdapter, SyncState, upload_rows
+    rows = make_rows(ctx["rows"])
+    adapter = SQLiteAdapter(os.path.join(ctx["tmp"], "labels.db"))
+    state = SyncState(os.path.join(ctx["tmp"], "sync.json"))
+    initial, _ = timed(lambda: upload_rows(rows, adapter, state=state))
+    unchanged, _ = timed(lambda: upload_rows(rows, adapter, state=state), ctx["repeat"])
+    return {"db_upload": (initial, "s"), "db_upload_unchanged": (unchanged, "s")}
+
+
+def bench_stream_rss(ctx):
+    path = write_long_wav(os.path.join(ctx["tmp"], "long.wav"), ctx["long_seconds"], ctx["sample_rate"])
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        growth, decoded_mb = pool.submit(_stream_rss, path).result()
+    ctx["decoded_mb"] = decoded_mb
+    return {"stream_rss_growth": (max(growth, 0.0), "MB")}
+
+
+BENCHMARKS = (bench_decode, bench_waveform, bench_transcribe, bench_analysis, bench_index, bench_fingerprint,
+              bench_save_label, bench_export, bench_db_upload, bench_stream_rss)
+
+
+# ------------------ Results ------------------
+
+def run_suite(params):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = dict(params, tmp=tmp, corpus=os.path.join(tmp, "corpus"))
+        ctx["paths"] = make_corpus(ctx["corpus"], params["files"], params["seconds"], params["sample_rate"],
+                                   params["seed"])
+        for bench in BENCHMARKS:
+            name = bench.__name__[len("bench_"):]
+            print(f"{name}...", end=" ", flush=True)
+            for metric, (value, unit) in bench(ctx).items():
+                results[metric] = {"value": value, "unit": unit}
+            print("done", flush=True)
+        audio_seconds = ctx["audio_seconds"]
+        decoded_mb = ctx.get("decoded_mb")
+    return {
+        "params": params,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus_audio_seconds": audio_seconds,
+        "long_file_decoded_mb": decoded_mb,
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD):
+    # Every metric is lower-is-better; returns [(metric, baseline, current, ratio)] that regressed
+    regressions = []
+    for metric, current in report["results"].items():
+        previous = baseline.get("results", {}).get(metric)
+        if previous is None or previous["unit"] != current["unit"]:
+            continue
+        slack = NOISE_FLOOR.get(current["unit"], 0.0)
+        if current["value"] > previous["value"] * (1.0 + threshold) and \
+                current["value"] - previous["value"] > slack:
+            ratio = current["value"] / previous["value"] if previous["value"] else float("inf")
+            regressions.append((metric, previous["value"], current["value"], ratio))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    previous = (baseline or {}).get("results", {})
+    print(f"\n{'metric':<22} {'value':>12}  {'baseline':>12}  change")
+    for metric, current in report["results"].items():
+        base = previous.get(metric)
+        value = f"{current['value']:.3f} {current['unit']}"
+        if base is not None and base["unit"] == current["unit"] and base["value"]:
+            change = f"{(current['value'] / base['value'] - 1.0) * 100:+.0f}%"
+            base_text = f"{base['value']:.3f} {base['unit']}"
+        else:
+            change, base_text = "", "-"
+        print(f"{metric:<22} {value:>12}  {base_text:>12}  {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the labeling hot paths on a synthetic corpus.")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=15.0, help="mean clip length")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--rows", type=int, default=100000, help="label entries for save/export/upload")
+    parser.add_argument("--pdf-rows", type=int, default=10000)
+    parser.add_argument("--long-minutes", type=float, default=20.0, help="length of the streaming-decode file")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="results JSON (default: output/benchmarks/...)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, 0.3 = 30%%")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    params = {"files": args.files, "seconds": args.seconds, "sample_rate": args.sample_rate, "rows": args.rows,
+              "pdf_rows": args.pdf_rows, "long_seconds": args.long_minutes * 60.0, "repeat": args.repeat,
+              "seed": args.seed}
+    report = run_suite(params)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"results-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nResults written to {output}")
+
+    status = 0
+    # Streaming decode must stay flat: far below what decoding the whole file into memory would take
+    growth = report["results"]["stream_rss_growth"]["value"]
+    if report["long_file_decoded_mb"] and growth > 0.1 * report["long_file_decoded_mb"]:
+        print(f"FAIL: streaming decode grew RSS by {growth:.0f} MB "
+              f"(whole file is {report['long_file_decoded_mb']:.0f} MB decoded)")
+        status = 1
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif baseline is not None:
+        if baseline.get("params") != params:
+            print("Warning: baseline was recorded with different parameters; comparison may be meaningless")
+        regressions = compare(report, baseline, args.threshold)
+        for metric, before, after, ratio in regressions:
+            print(f"FAIL: {metric} regressed {before:.3f} -> {after:.3f} ({ratio:.2f}x)")
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
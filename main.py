@@ -2,25 +2,24 @@
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, Scrollbar
-import pandas as pd
 import os
 import threading
-import librosa
-import librosa.display
-import matplotlib.pyplot as plt
-from fpdf import FPDF
-import speech_recognition as sr
-import pygame
-import pymysql
-from db_config import DB_CONFIG
-import PIL.Image
+# Heavy dependencies (matplotlib, pandas, pygame, PIL, speech_recognition, fpdf, the DB driver)
+# are imported inside the functions that use them so the window opens without waiting for them
 
 # ------------------ Helper Functions ------------------
 
 def display_waveform(audio_path):
-    y, sr = librosa.load(audio_path, sr=None)
+    import numpy as np
+    import matplotlib.pyplot as plt
+    import PIL.Image
+    from utils.peak_cache import get_peaks
+    peaks = get_peaks(audio_path)
+    mins, maxs = peaks.peaks_for_range(0, peaks.num_samples, 2000)
+    times = np.linspace(0, peaks.duration, len(mins))
     plt.figure(figsize=(10, 3))
-    librosa.display.waveshow(y, sr=sr)
+    plt.fill_between(times, mins, maxs, linewidth=0.5)
+    plt.xlim(0, peaks.duration)
     plt.title(f"Waveform: {os.path.basename(audio_path)}")
     plt.xlabel("Time (s)")
     plt.ylabel("Amplitude")
@@ -31,70 +30,6 @@ def display_waveform(audio_path):
     plt.close()
     PIL.Image.open(output_path).show()
 
-def transcribe_audio(audio_path):
-    recognizer = sr.Recognizer()
-    try:
-        with sr.AudioFile(audio_path) as source:
-            audio = recognizer.record(source)
-            return recognizer.recognize_google(audio)
-    except sr.UnknownValueError:
-        return "[Unintelligible]"
-    except sr.RequestError as e:
-        return f"[Error: {e}]"
-    except Exception as e:
-        return f"[Unexpected error: {e}]"
-
-def generate_pdf(data, filename="output/report.pdf"):
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Audio Labeling Report", ln=True, align='C')
-    pdf.ln(10)
-    for i, entry in enumerate(data, 1):
-        pdf.multi_cell(0, 10, txt=f"{i}. File: {entry['filename']}\n"
-                                     f"   Transcription: {entry['transcription']}\n"
-                                     f"   Labels: {entry['labels']}\n"
-                                     f"   Start Time: {entry['start_time']} sec\n"
-                                     f"   End Time: {entry['end_time']} sec\n",
-                       border=0)
-        pdf.ln(2)
-    pdf.output(filename)
-
-def upload_to_mysql(data):
-    try:
-        conn = pymysql.connect(**DB_CONFIG)(
-            host="localhost",
-            user="your_username",
-            password="root",
-            database="audio_labeling_db"
-        )
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS labeled_data (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                filename VARCHAR(255),
-                transcription TEXT,
-                labels VARCHAR(255),
-                start_time VARCHAR(50),
-                end_time VARCHAR(50)
-            )
-        """)
-        for entry in data:
-            cursor.execute("""
-                INSERT INTO labeled_data (filename, transcription, labels, start_time, end_time)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                entry["filename"], entry["transcription"], entry["labels"], entry["start_time"], entry["end_time"]
-            ))
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except pymysql.connect.Error as err:
-        print(f"MySQL Error: {err}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-
 def bind_shortcuts(root, app):
     root.bind('<space>', lambda event: app.play_audio())
     root.bind('<Return>', lambda event: app.save_label())
@@ -120,7 +55,6 @@ class AudioLabelingTool:
         self.current_index = 0
         self.data = []
         self.build_ui()
-        pygame.mixer.init()
         bind_shortcuts(self.root, self)
 
     def build_ui(self):
@@ -221,6 +155,9 @@ class AudioLabelingTool:
     def play_audio(self):
         if self.current_index < len(self.audio_files):
             path = self.audio_files[self.current_index]
+            import pygame
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
             threading.Thread(target=lambda: pygame.mixer.music.load(path) or pygame.mixer.music.play()).start()
 
     def plot_waveform(self):
@@ -229,6 +166,7 @@ class AudioLabelingTool:
 
     def auto_transcribe(self):
         if self.current_index < len(self.audio_files):
+            from utils.transcription_ai import transcribe_audio
             result = transcribe_audio(self.audio_files[self.current_index])
             self.transcription_entry.delete(0, tk.END)
             self.transcription_entry.insert(0, result)
@@ -254,16 +192,19 @@ class AudioLabelingTool:
                 messagebox.showinfo("Done", "All files labeled.")
 
     def export_csv(self):
+        import pandas as pd
         df = pd.DataFrame(self.data)
         os.makedirs("output", exist_ok=True)
         df.to_csv("output/labeled_data.csv", index=False)
         messagebox.showinfo("Exported", "CSV exported successfully.")
 
     def export_pdf(self):
+        from utils.pdf_generator import generate_pdf
         generate_pdf(self.data, "output/report.pdf")
         messagebox.showinfo("Exported", "PDF exported successfully.")
 
     def upload_db(self):
+        from utils.db_upload import upload_to_mysql
         upload_to_mysql(self.data)
         messagebox.showinfo("Uploaded", "Data uploaded to MySQL successfully.")
 
@@ -0,0 +1,59 @@
+# test_audio_stream.py
+
+import multiprocessing
+import resource
+import sys
+import wave
+
+import numpy as np
+
+from utils.audio_stream import BLOCK_FRAMES, iter_blocks
+
+SAMPLE_RATE = 16000
+MINUTES = 10
+MAX_GROWTH_MB = 16.0   # decoding the whole file at once would need ~38 MB of float32
+
+
+def _max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024.0 / 1024.0 if sys.platform == "darwin" else rss / 1024.0
+
+
+def _write_long_wav(path):
+    # Written a minute at a time so the test itself never holds the whole file
+    rng = np.random.default_rng(0)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        for _ in range(MINUTES):
+            block = 0.3 * rng.standard_normal(60 * SAMPLE_RATE)
+            w.writeframes((np.clip(block, -1.0, 1.0) * 32767.0).astype("<i2").tobytes())
+
+
+def _stream(path, queue):
+    # Fresh process: its peak RSS reflects streaming only
+    blocks = iter_blocks(path)
+    first = next(blocks)
+    before = _max_rss_mb()
+    frames = len(first)
+    largest = len(first)
+    for block in blocks:
+        frames += len(block)
+        largest = max(largest, len(block))
+    queue.put((_max_rss_mb() - before, frames, largest))
+
+
+def test_streaming_long_wav_keeps_peak_rss_flat(tmp_path):
+    path = tmp_path / "long.wav"
+    _write_long_wav(path)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_stream, args=(str(path), queue))
+    process.start()
+    growth, frames, largest = queue.get(timeout=120)
+    process.join(timeout=30)
+
+    assert frames == MINUTES * 60 * SAMPLE_RATE
+    assert largest <= BLOCK_FRAMES
+    assert growth < MAX_GROWTH_MB, f"peak RSS grew by {growth:.1f} MB while streaming"
@@ -0,0 +1,96 @@
+# test_coordinator.py
+
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.corpus import write_wav
+from utils.coordinator import CoordinatorClient, CoordinatorServer, open_store
+from utils.file_index import relative_name
+
+FILES = 120
+CLIENTS = 8
+
+
+def _serve(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "corpus"
+    clip = np.zeros(800, dtype=np.float32)
+    for i in range(FILES):
+        sub = folder / f"part_{i % 3}"
+        sub.mkdir(parents=True, exist_ok=True)
+        write_wav(str(sub / f"clip_{i // 3:03d}.wav"), clip, 8000)
+    store = open_store(str(folder), str(tmp_path / "leases.sqlite3"))
+    server = CoordinatorServer(store, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return store, server
+
+
+def _stop(store, server):
+    server.shutdown()
+    server.server_close()
+    store.journal.close()
+    store.close()
+
+
+def _label(address, name, seen, lock, errors):
+    client = CoordinatorClient(address, labeler=name)
+    try:
+        while True:
+            paths = client.lease(5, ttl=30.0)
+            if not paths:
+                break
+            with lock:
+                errors.extend(f"{path} leased twice" for path in seen.intersection(paths))
+                seen.update(paths)
+            entries = [{"filename": relative_name(path, client.folder), "transcription": "", "labels": "Noise",
+                        "start_time": "", "end_time": ""} for path in paths]
+            client.commit(entries, paths)
+    except Exception as e:
+        errors.append(f"{name}: {e}")
+    finally:
+        client.close()
+
+
+def test_concurrent_labelers_each_file_once_and_abandoned_leases_return(tmp_path, monkeypatch):
+    store, server = _serve(tmp_path, monkeypatch)
+    try:
+        abandoned = CoordinatorClient(server.address, labeler="abandoned")
+        held = abandoned.lease(5, ttl=0.2)
+        time.sleep(0.3)
+        seen, lock, errors = set(), threading.Lock(), []
+        threads = [threading.Thread(target=_label, args=(server.address, f"labeler-{i}", seen, lock, errors))
+                   for i in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        stats = abandoned.stats()
+        abandoned.close()
+    finally:
+        _stop(store, server)
+
+    assert errors == []
+    assert len(seen) == FILES
+    assert seen.issuperset(held)
+    assert stats["files"] == {"open": 0, "leased": 0, "done": FILES}
+    assert stats["labelers"]["abandoned"]["expired"] == len(held)
+
+
+def test_commit_retried_with_the_same_batch_is_applied_once(tmp_path, monkeypatch):
+    store, server = _serve(tmp_path, monkeypatch)
+    try:
+        client = CoordinatorClient(server.address, labeler="retry")
+        paths = client.lease(2, ttl=30.0)
+        entries = [{"filename": relative_name(p, client.folder), "transcription": "", "labels": "Speech",
+                    "start_time": "", "end_time": ""} for p in paths]
+        first = client.commit(entries, paths, batch="batch-1")
+        again = client.commit(entries, paths, batch="batch-1")
+        stats = client.stats()
+        client.close()
+    finally:
+        _stop(store, server)
+
+    assert first == again == 2
+    assert stats["labelers"]["retry"]["labels"] == 2
@@ -0,0 +1,61 @@
+# test_db_upload.py
+
+from utils.db_upload import SQLiteAdapter, SyncState, sync_state_path, upload_rows
+
+
+def _rows(count, label="Speech"):
+    return [{"filename": f"clip_{i:03d}.wav", "transcription": f"text {i}", "labels": label,
+             "start_time": "1.5", "end_time": "2.25"} for i in range(count)]
+
+
+def _table(adapter):
+    cursor = adapter.connect().cursor()
+    cursor.execute("SELECT filename, transcription, labels FROM labeled_data ORDER BY filename")
+    return cursor.fetchall()
+
+
+def test_upsert_updates_rows_with_the_same_segment(tmp_path):
+    adapter = SQLiteAdapter(str(tmp_path / "labels.sqlite3"))
+    upload_rows(_rows(10), adapter, chunk_size=3)
+    upload_rows(_rows(10, label="Noise"), adapter, chunk_size=3)
+
+    table = _table(adapter)
+    assert len(table) == 10
+    assert {labels for _, _, labels in table} == {"Noise"}
+
+
+def test_incremental_upload_sends_only_changed_rows(tmp_path):
+    adapter = SQLiteAdapter(str(tmp_path / "labels.sqlite3"))
+    state = SyncState(str(tmp_path / "sync.json"))
+    rows = _rows(20)
+    assert upload_rows(rows, adapter, state=state) == 20
+    assert upload_rows(rows, adapter, state=state) == 0
+
+    rows[3] = dict(rows[3], labels="Music")
+    rows.append(dict(rows[0], filename="new.wav"))
+    assert upload_rows(rows, adapter, state=SyncState(state.path)) == 2
+    assert ("clip_003.wav", "text 3", "Music") in _table(adapter)
+
+
+def test_truncated_table_invalidates_the_sync_state(tmp_path):
+    adapter = SQLiteAdapter(str(tmp_path / "labels.sqlite3"))
+    state = SyncState(sync_state_path(adapter.target, str(tmp_path / "sync")))
+    rows = _rows(20)
+    upload_rows(rows, adapter, state=state)
+    conn = adapter.connect()
+    conn.cursor().execute("DELETE FROM labeled_data")
+    conn.commit()
+
+    assert upload_rows(rows, adapter, state=state) == 20
+    assert len(_table(adapter)) == 20
+
+
+def test_sync_state_is_kept_per_database(tmp_path):
+    first = SQLiteAdapter(str(tmp_path / "first.sqlite3"))
+    second = SQLiteAdapter(str(tmp_path / "second.sqlite3"))
+    sync_dir = str(tmp_path / "sync")
+    assert sync_state_path(first.target, sync_dir) != sync_state_path(second.target, sync_dir)
+
+    rows = _rows(5)
+    upload_rows(rows, first, state=SyncState(sync_state_path(first.target, sync_dir)))
+    assert upload_rows(rows, second, state=SyncState(sync_state_path(second.target, sync_dir))) == 5
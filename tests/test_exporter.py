@@ -0,0 +1,57 @@
+# test_exporter.py
+
+import csv
+
+from utils.exporter import export_csv
+from utils.label_store import LabelStore
+
+LABELS = ["Speech", "Noise"]
+
+
+def _store(count):
+    store = LabelStore(LABELS)
+    for i in range(count):
+        store.add(f"clip_{i:03d}.wav", f"text {i}", ["Speech"], float(i), i + 0.5)
+    return store
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def test_incremental_export_appends_only_new_rows(tmp_path):
+    path = str(tmp_path / "labels.csv")
+    state = str(tmp_path / "state.json")
+    store = _store(5)
+    assert export_csv(store, path, incremental=True, session="s1", state_path=state).rows == 5
+    for i in range(5, 8):
+        store.add(f"clip_{i:03d}.wav", f"text {i}", ["Noise"], float(i), i + 0.5)
+
+    report = export_csv(store, path, incremental=True, session="s1", state_path=state)
+
+    assert report.rows == 3
+    assert [row[0] for row in _rows(path)] == [f"clip_{i:03d}.wav" for i in range(8)]
+    assert _rows(path)[7] == ["clip_007.wav", "text 7", "Noise", "7", "7.5"]
+
+
+def test_export_without_session_writes_every_row(tmp_path):
+    path = str(tmp_path / "labels.csv")
+    state = str(tmp_path / "state.json")
+    export_csv(_store(5), path, incremental=True, session=None, state_path=state)
+
+    # A different store, e.g. after joining a team queue: nothing may be skipped
+    report = export_csv(_store(3), path, incremental=True, session=None, state_path=state)
+
+    assert report.rows == 3
+    assert len(_rows(path)) == 3
+
+
+def test_other_session_or_fewer_rows_restart_the_export(tmp_path):
+    path = str(tmp_path / "labels.csv")
+    state = str(tmp_path / "state.json")
+    export_csv(_store(5), path, incremental=True, session="s1", state_path=state)
+
+    assert export_csv(_store(4), path, incremental=True, session="s2", state_path=state).rows == 4
+    assert export_csv(_store(2), path, incremental=True, session="s2", state_path=state).rows == 2
+    assert len(_rows(path)) == 2
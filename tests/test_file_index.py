@@ -0,0 +1,53 @@
+# test_file_index.py
+
+import numpy as np
+
+from benchmarks.corpus import write_wav
+from utils.coordinator import DONE, OPEN, open_store
+from utils.file_index import filter_records, index_folder, relative_name, sort_records
+from utils.label_journal import LabelJournal, first_unlabeled, journal_path_for
+
+
+def _same_name_in_two_folders(root):
+    clip = np.zeros(800, dtype=np.float32)
+    for sub in ("a", "b"):
+        (root / sub).mkdir()
+        write_wav(str(root / sub / "clip.wav"), clip, 8000)
+    write_wav(str(root / "top.wav"), clip, 8000)
+
+
+def test_entries_are_keyed_by_path_below_the_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "corpus"
+    folder.mkdir()
+    _same_name_in_two_folders(folder)
+
+    records = index_folder(str(folder))
+    names = [relative_name(r.path, str(folder)) for r in records]
+    assert names == ["a/clip.wav", "b/clip.wav", "top.wav"]
+
+    labeled = {"a/clip.wav"}
+    unlabeled = filter_records(records, str(folder), "Unlabeled", labeled)
+    assert [relative_name(r.path, str(folder)) for r in unlabeled] == ["b/clip.wav", "top.wav"]
+    ordered = sort_records(records, str(folder), "unlabeled", labeled)
+    assert relative_name(ordered[-1].path, str(folder)) == "a/clip.wav"
+    assert first_unlabeled([r.path for r in records], str(folder), labeled) == 1
+
+
+def test_coordinator_marks_only_the_labeled_copy_done(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "corpus"
+    folder.mkdir()
+    _same_name_in_two_folders(folder)
+    journal = LabelJournal(journal_path_for(str(folder)))
+    journal.append({"filename": "a/clip.wav", "transcription": "", "labels": "Noise",
+                    "start_time": "", "end_time": ""})
+    journal.close()
+
+    store = open_store(str(folder), str(tmp_path / "leases.sqlite3"))
+    try:
+        status = dict(store._conn.execute("SELECT path, status FROM files").fetchall())
+    finally:
+        store.close()
+    assert status[str(folder / "a" / "clip.wav")] == DONE
+    assert status[str(folder / "b" / "clip.wav")] == OPEN
@@ -0,0 +1,47 @@
+# test_fingerprint.py
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import synth_clip, write_wav
+from utils.fingerprint import index_duplicates, propagate_entry
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def duplicates(tmp_path, monkeypatch):
+    # original.wav, a copy with its first second trimmed in a subfolder, and an unrelated clip
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "corpus"
+    (folder / "copies").mkdir(parents=True)
+    rng = np.random.default_rng(1)
+    original = synth_clip("speech", 8.0, SAMPLE_RATE, rng)
+    write_wav(str(folder / "original.wav"), original, SAMPLE_RATE)
+    write_wav(str(folder / "copies" / "original.wav"), 0.8 * original[SAMPLE_RATE:], SAMPLE_RATE)
+    write_wav(str(folder / "other.wav"), synth_clip("noise", 8.0, SAMPLE_RATE, rng), SAMPLE_RATE)
+    return folder, index_duplicates(str(folder), workers=1)
+
+
+def test_trimmed_copy_is_found_with_its_offset(duplicates):
+    folder, index = duplicates
+    original, copy = str(folder / "original.wav"), str(folder / "copies" / "original.wav")
+
+    assert index.clusters == [[copy, original]] or index.clusters == [[original, copy]]
+    [(other, offset)] = index.duplicates(original)
+    assert other == copy
+    assert offset == pytest.approx(1.0, abs=2 * 0.032)
+    assert index.duplicates(str(folder / "other.wav")) == []
+
+
+def test_propagated_entries_are_shifted_and_keyed_by_relative_path(duplicates):
+    folder, index = duplicates
+    entry = {"filename": "original.wav", "transcription": "hello", "labels": "Speech",
+             "start_time": "3.25", "end_time": "5.5"}
+
+    [copy] = propagate_entry(entry, [(str(folder / "copies" / "original.wav"), 1.0)], index.folder)
+    assert copy == dict(entry, filename="copies/original.wav", start_time="2.25", end_time="4.5")
+
+    # A copy matched only through another member keeps the original times
+    [unaligned] = propagate_entry(entry, [(str(folder / "copies" / "original.wav"), None)], index.folder)
+    assert (unaligned["start_time"], unaligned["end_time"]) == ("3.25", "5.5")
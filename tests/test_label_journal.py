@@ -0,0 +1,62 @@
+# test_label_journal.py
+
+import json
+import os
+
+from utils.label_journal import LabelJournal, first_unlabeled, replay
+
+
+def _entry(i):
+    return {"filename": f"clip_{i:03d}.wav", "transcription": "ünïcode", "labels": "Speech",
+            "start_time": "", "end_time": ""}
+
+
+def test_replay_returns_what_was_appended(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    journal = LabelJournal(path, fsync_every=2)
+    for i in range(5):
+        journal.append(_entry(i))
+    journal.close()
+
+    assert replay(path) == [_entry(i) for i in range(5)]
+    assert replay(str(tmp_path / "missing.jsonl")) == []
+
+
+def test_crash_mid_write_loses_only_the_partial_record(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    journal = LabelJournal(path)
+    for i in range(3):
+        journal.append(_entry(i))
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_entry(3))[:20])   # the process died halfway through a line
+
+    assert replay(path) == [_entry(i) for i in range(3)]
+
+    # Reopening truncates the torn line so the next record starts on a clean line
+    journal = LabelJournal(path)
+    journal.append(_entry(4))
+    journal.close()
+    assert replay(path) == [_entry(i) for i in (0, 1, 2, 4)]
+
+
+def test_torn_line_longer_than_one_read_block_is_truncated(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_entry(0)) + "\n")
+        f.write("x" * 10000)
+    size_of_first = os.path.getsize(path) - 10000
+
+    LabelJournal(path).close()
+
+    assert os.path.getsize(path) == size_of_first
+    assert replay(path) == [_entry(0)]
+
+
+def test_resume_starts_at_the_first_unlabeled_file(tmp_path):
+    folder = str(tmp_path)
+    files = [os.path.join(folder, name) for name in ("a.wav", os.path.join("sub", "a.wav"), "b.wav")]
+
+    assert first_unlabeled(files, folder, {"a.wav"}) == 1
+    assert first_unlabeled(files, folder, {"a.wav", "sub/a.wav"}) == 2
+    assert first_unlabeled(files, folder, {"a.wav", "sub/a.wav", "b.wav"}) == 3
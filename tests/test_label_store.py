@@ -0,0 +1,51 @@
+# test_label_store.py
+
+import math
+
+from utils.label_store import LabelStore, format_time, parse_time
+
+LABELS = ["Speech", "Noise", "Music"]
+
+
+def _entry(filename, labels, start, end, text=""):
+    return {"filename": filename, "transcription": text, "labels": labels, "start_time": start, "end_time": end}
+
+
+def test_entries_round_trip_through_the_store():
+    store = LabelStore(LABELS)
+    saved = [_entry("a.wav", "Speech, Music", "1.5", "2.25", "hello"),
+             _entry("b/c.wav", "", "", ""),
+             _entry("a.wav", "Noise", "12", "1234.56789")]
+    for entry in saved:
+        store.append(entry)
+
+    assert list(store) == saved
+    assert len(store) == 3
+
+
+def test_indexes_by_file_and_label():
+    store = LabelStore(LABELS)
+    store.add("a.wav", "", ["Speech"], 0.0, 1.0)
+    store.add("b.wav", "", ["Speech", "Noise"], 0.0, 1.0)
+    store.add("a.wav", "", [], 1.0, 2.0)
+    store.add("c.wav", "", ["Laughter"], 0.0, 1.0)   # unknown labels get a new bit
+
+    assert store.rows_for_file("a.wav").tolist() == [0, 2]
+    assert store.rows_for_file("missing.wav").tolist() == []
+    assert store.rows_with_label("Speech").tolist() == [0, 1]
+    assert store.rows_with_labels(["Speech", "Noise"]).tolist() == [1]
+    assert store.rows_with_labels(["Noise", "Laughter"], match_all=False).tolist() == [1, 3]
+    assert store.unlabeled_rows().tolist() == [2]
+    assert store.labeled_files() == {"a.wav", "b.wav", "c.wav"}
+    assert store.files_without_labels(["a.wav", "d.wav"]) == ["d.wav"]
+    assert store.label_counts()["Laughter"] == 1
+
+
+def test_format_time_round_trips_parse_time():
+    for text in ["0", "12", "1.5", "0.1", "1234.56789", "3600.123456789", "1e-07"]:
+        value = parse_time(text)
+        assert parse_time(format_time(value)) == value
+    assert format_time(12.0) == "12"
+    assert format_time(1234.56789) == "1234.56789"
+    assert math.isnan(parse_time("  "))
+    assert format_time(math.nan) == ""
@@ -0,0 +1,60 @@
+# test_vad.py
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import write_wav
+from utils.vad import PAD_SECONDS, segment_file, segment_samples
+
+SAMPLE_RATE = 16000
+
+
+def _signal(seconds, bursts):
+    # Quiet noise with loud tone bursts at the given (start, end) seconds
+    rng = np.random.default_rng(0)
+    samples = 0.001 * rng.standard_normal(int(seconds * SAMPLE_RATE))
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    for start, end in bursts:
+        inside = (t >= start) & (t < end)
+        samples[inside] += 0.5 * np.sin(2 * np.pi * 220.0 * t[inside])
+    return samples.astype(np.float32)
+
+
+def test_speech_bursts_become_padded_segments():
+    segments = segment_samples(_signal(8.0, [(1.0, 2.0), (4.0, 5.5)]), SAMPLE_RATE)
+
+    assert len(segments) == 2
+    for (start, end), (expected_start, expected_end) in zip(segments, [(1.0, 2.0), (4.0, 5.5)]):
+        assert start == pytest.approx(expected_start - PAD_SECONDS, abs=0.03)
+        assert end == pytest.approx(expected_end + PAD_SECONDS, abs=0.03)
+
+
+def test_short_pauses_are_bridged_and_clicks_dropped():
+    samples = _signal(6.0, [(1.0, 2.0), (2.2, 3.0), (4.5, 4.6)])
+
+    segments = segment_samples(samples, SAMPLE_RATE)
+
+    assert len(segments) == 1
+    assert segments[0][0] < 1.0 and segments[0][1] > 3.0
+
+
+def test_long_speech_is_split_and_silence_gives_nothing():
+    # The noise floor is a low percentile of frame energy, so the clip needs some silence too
+    segments = segment_samples(_signal(20.0, [(0.5, 11.5)]), SAMPLE_RATE, max_segment=4.0)
+
+    assert len(segments) == 3
+    assert all(end - start <= 4.0 + 1e-9 for start, end in segments)
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+    assert segment_samples(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE) == []
+
+
+def test_streaming_file_matches_in_memory_buffer(tmp_path):
+    samples = _signal(8.0, [(1.0, 2.0), (4.0, 5.5)])
+    path = str(tmp_path / "speech.wav")
+    write_wav(path, samples, SAMPLE_RATE)
+
+    from_file = segment_file(path)
+
+    assert len(from_file) == 2
+    for a, b in zip(from_file, segment_samples(samples, SAMPLE_RATE)):
+        assert a == pytest.approx(b, abs=0.03)
@@ -1,19 +1,56 @@
 # tool.py
+import time
+STARTED = time.perf_counter()  # before the imports below, so the startup time includes them
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, Scrollbar
-from utils.waveform_display import display_waveform
-from utils.transcription_ai import transcribe_audio
+from tkinter import filedialog, messagebox, simpledialog, ttk, Scrollbar
+from app_config import LABELS
+from utils import exporter
+from utils.auto_label import LabelSuggester
+from utils.coordinator import DEFAULT_ADDRESS, CoordinatorClient, WorkSession
+from utils.features import get_features
+from utils.fingerprint import FingerprintIndex, propagate_entry
+from utils.file_index import (SORT_ORDERS, STATUS_FILTERS, filter_records, index_folder, relative_name,
+                              sort_records)
+from utils.jobs import JobRunner
+from utils.label_journal import LabelJournal, first_unlabeled, journal_path_for, replay
+from utils.label_store import LabelStore, parse_time
+from utils.metrics import format_seconds, metrics
+from utils.playback import RATES
+from utils.prefetch import Prefetcher
+from utils.waveform_canvas import WaveformView
+from utils.transcription_ai import transcribe_audio, transcribe_segments
+from utils.vad import segment_file, segment_samples
+from utils.batch_transcribe import DEFAULT_OUTPUT, load_progress, transcribe_batch
+from utils.transcription_cache import get_cache
 from utils.db_upload import upload_to_mysql
-from utils.pdf_generator import generate_pdf
 from utils.shortcuts_handler import bind_shortcuts
-import pandas as pd
+from utils.spectrogram import SpectrogramTiles, prune_cache
+from utils.spectrogram_canvas import SpectrogramView
+from utils.warmup import start_warmup
+import collections
+import functools
+import getpass
 import os
-import threading
-import librosa
-import pygame
 import sys
+import threading
 sys.path.append(os.path.join(os.path.dirname(__file__), 'audio_labeling_tool/utils'))
 
+STARTUP_PROBE_ENV = "AUDIO_LABELING_STARTUP_PROBE"  # set by benchmarks/bench_startup.py
+CLOSE_TIMEOUT = 1.0  # seconds per coordinator request while the window closes
+
+
+def timed_action(name):
+    # Times a UI action and shows its running p50/p95 in the status bar
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with metrics.timer(name):
+                result = method(self, *args, **kwargs)
+            self.show_timing(name)
+            return result
+        return wrapper
+    return decorate
+
 
 class AudioLabelingTool:
     def __init__(self, root):
@@ -22,19 +59,62 @@ class AudioLabelingTool:
         self.root.geometry("1200x700")
 
         self.audio_files = []
+        self.file_records = []
+        self.folder = None  # open folder; label entries are keyed by paths relative to it
         self.current_index = 0
-        self.data = []
+        self.labels = list(LABELS)
+        self.data = LabelStore(self.labels)
+        self.journal = None
+        self.session = None  # WorkSession while labeling from a shared team queue
+        self.leasing = False
+        self.transcripts = {}
+        self.pending_segments = []
+        self.prefetcher = Prefetcher()
+        self.jobs = JobRunner(self.root)
+        self.suggester = LabelSuggester(self.labels)
+        self.current_features = None
+        self.fingerprints = None  # near-duplicate index of the open folder, once built
+        self.propagated = set()   # files that received labels from a near-duplicate this session
+
+        self.player = None  # created on first use; pygame loads in the warm-up thread meanwhile
 
         self.build_ui()
-        pygame.mixer.init()
         bind_shortcuts(self.root, self)
+        self.tick_player()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     def build_ui(self):
         self.main_frame = tk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
-        load_button = tk.Button(self.main_frame, text="Load Audio File", command=self.load_audio_file)
+        self.load_button = tk.Button(self.main_frame, text="Load Audio Folder", command=self.load_audio_files)
         self.load_button.pack(pady=10)
+        tk.Button(self.main_frame, text="Join Team Queue", command=self.join_team_queue).pack()
+
+        queue_frame = tk.Frame(self.main_frame)
+        queue_frame.pack(pady=(0, 10))
+        tk.Label(queue_frame, text="Sort").pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value="Name")
+        tk.OptionMenu(queue_frame, self.sort_var, *SORT_ORDERS,
+                      command=lambda value: self.apply_queue()).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(queue_frame, text="Show").pack(side=tk.LEFT)
+        self.status_var = tk.StringVar(value="All")
+        tk.OptionMenu(queue_frame, self.status_var, *STATUS_FILTERS,
+                      command=lambda value: self.apply_queue()).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(queue_frame, text="Duration (sec)").pack(side=tk.LEFT)
+        self.min_duration_entry = tk.Entry(queue_frame, width=6)
+        self.min_duration_entry.pack(side=tk.LEFT, padx=2)
+        tk.Label(queue_frame, text="to").pack(side=tk.LEFT)
+        self.max_duration_entry = tk.Entry(queue_frame, width=6)
+        self.max_duration_entry.pack(side=tk.LEFT, padx=2)
+        tk.Button(queue_frame, text="Apply", command=self.apply_queue).pack(side=tk.LEFT, padx=2)
+
+        self.waveform_view = WaveformView(self.main_frame, on_select=self.set_time_range,
+                                          on_view=lambda start, span: self.spectrogram_view.set_view(start, span))
+        self.waveform_view.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.spectrogram_view = SpectrogramView(self.main_frame, request=self.request_spectrogram_tile)
+        self.spectrogram_view.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.spectrogram_var = tk.IntVar(value=1)
 
         self.canvas = tk.Canvas(self.main_frame)
         self.scroll_y = Scrollbar(self.main_frame, orient="vertical", command=self.canvas.yview)
@@ -54,12 +134,13 @@ class AudioLabelingTool:
         self.transcription_entry.pack(pady=5)
 
         self.label_vars = {}
-        self.labels = ["Speech", "Noise", "Music", "Happy", "Sad", "Angry", "English", "Telugu"]
+        self.label_checks = {}
         for label in self.labels:
             var = tk.IntVar()
             chk = tk.Checkbutton(self.scroll_frame, text=label, variable=var)
             chk.pack(anchor='w')
             self.label_vars[label] = var
+            self.label_checks[label] = chk
 
         tk.Label(self.scroll_frame, text="Start Time (sec)").pack()
         self.start_time_entry = tk.Entry(self.scroll_frame)
@@ -71,83 +152,647 @@ class AudioLabelingTool:
 
         self.waveform_button = tk.Button(self.scroll_frame, text="Show Waveform", command=self.plot_waveform)
         self.waveform_button.pack(pady=5)
+        tk.Checkbutton(self.scroll_frame, text="Show spectrogram", variable=self.spectrogram_var,
+                       command=self.toggle_spectrogram).pack()
 
         self.transcribe_button = tk.Button(self.scroll_frame, text="Auto Transcribe", command=self.auto_transcribe)
         self.transcribe_button.pack(pady=5)
 
-        self.play_button = tk.Button(self.scroll_frame, text="Play", command=self.play_audio)
-        self.play_button.pack(pady=5)
+        self.segment_button = tk.Button(self.scroll_frame, text="Segment & Transcribe", command=self.segment_transcribe)
+        self.segment_button.pack(pady=5)
+
+        self.batch_transcribe_button = tk.Button(self.scroll_frame, text="Batch Transcribe Folder",
+                                                 command=self.batch_transcribe)
+        self.batch_transcribe_button.pack(pady=5)
+
+        play_frame = tk.Frame(self.scroll_frame)
+        play_frame.pack(pady=5)
+        self.play_button = tk.Button(play_frame, text="Play / Pause", command=self.play_audio)
+        self.play_button.pack(side=tk.LEFT, padx=2)
+        self.play_selection_button = tk.Button(play_frame, text="Play Selection", command=self.play_selection)
+        self.play_selection_button.pack(side=tk.LEFT, padx=2)
+        self.loop_var = tk.IntVar()
+        tk.Checkbutton(play_frame, text="Loop", variable=self.loop_var).pack(side=tk.LEFT, padx=2)
+        self.rate_var = tk.StringVar(value="1.0x")
+        tk.OptionMenu(play_frame, self.rate_var, *[f"{r}x" for r in RATES],
+                      command=lambda value: self.set_playback_rate(float(value.rstrip("x")))).pack(side=tk.LEFT)
 
         self.save_button = tk.Button(self.scroll_frame, text="Save & Next", command=self.save_label)
         self.save_button.pack(pady=5)
+        self.propagate_var = tk.IntVar(value=1)
+        tk.Checkbutton(self.scroll_frame, text="Copy labels to near-duplicates",
+                       variable=self.propagate_var).pack()
 
         self.export_csv_button = tk.Button(self.scroll_frame, text="Export CSV", command=self.export_csv)
         self.export_csv_button.pack(pady=5)
 
+        self.export_parquet_button = tk.Button(self.scroll_frame, text="Export Parquet", command=self.export_parquet)
+        self.export_parquet_button.pack(pady=5)
+
+        self.incremental_export_var = tk.IntVar()
+        tk.Checkbutton(self.scroll_frame, text="Export only rows added since last export",
+                       variable=self.incremental_export_var).pack()
+
         self.export_pdf_button = tk.Button(self.scroll_frame, text="Export PDF", command=self.export_pdf)
         self.export_pdf_button.pack(pady=5)
 
         self.upload_db_button = tk.Button(self.scroll_frame, text="Upload to MySQL", command=self.upload_db)
         self.upload_db_button.pack(pady=5)
+        self.incremental_upload_var = tk.IntVar(value=1)
+        tk.Checkbutton(self.scroll_frame, text="Upload only rows changed since last upload",
+                       variable=self.incremental_upload_var).pack()
+
+        status_frame = tk.Frame(self.root, bd=1, relief=tk.SUNKEN)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_label = tk.Label(status_frame, text="Ready", anchor='w')
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.metrics_label = tk.Label(status_frame, text="", anchor='e')
+        self.metrics_label.pack(side=tk.RIGHT)
+
+    def on_first_window(self):
+        self.root.update_idletasks()
+        elapsed = time.perf_counter() - STARTED
+        metrics.record("Startup", elapsed, STARTED)
+        self.set_status(f"Ready in {format_seconds(elapsed)}")
+        if os.environ.get(STARTUP_PROBE_ENV):
+            print(f"first-window {elapsed:.4f}", flush=True)
+            self.root.destroy()
+            return
+        start_warmup()
+
+    def set_status(self, text):
+        self.status_label.config(text=text)
+
+    def show_timing(self, name):
+        self.metrics_label.config(text=metrics.status_text(name))
+
+    def entry_name(self, path):
+        # In a team queue the coordinator's folder is the root, as the server marks files done by it
+        return relative_name(path, self.session.client.folder if self.session is not None else self.folder)
+
+    def current_path(self):
+        if self.current_index < len(self.audio_files):
+            return self.audio_files[self.current_index]
+        return None
+
+    def run_job(self, name, fn, *args, on_done=None, key=None):
+        # Jobs are timed from the click to the result reaching the UI, i.e. the latency the labeler sees
+        started = time.perf_counter()
+
+        def progress(fraction, message=None):
+            self.set_status(f"{name}: {message or f'{fraction:.0%}'}")
+
+        def done(result):
+            elapsed = time.perf_counter() - started
+            metrics.record(name, elapsed, started)
+            self.set_status(f"{name}: done in {format_seconds(elapsed)}")
+            self.show_timing(name)
+            if on_done is not None:
+                on_done(result)
+
+        def error(e):
+            metrics.error(name, f"{name} failed: {e}")
+            self.set_status(f"{name}: failed")
+            messagebox.showerror("Error", f"{name} failed: {e}")
+
+        self.set_status(f"{name}...")
+        return self.jobs.submit(name, fn, *args, key=key, on_done=done, on_error=error, on_progress=progress)
+
+    def close(self):
+        self.jobs.shutdown()
+        prune_cache()
+        self.suggester.save()
+        metrics.dump()
+        self.prefetcher.close()
+        if self.journal is not None:
+            self.journal.close()
+        self.leave_team_queue(timeout=CLOSE_TIMEOUT)
+        self.root.destroy()
 
     def load_audio_files(self):
         folder = filedialog.askdirectory()
         if folder:
-            self.audio_files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(('.wav', '.mp3'))]
-            self.audio_files.sort()
+            # The tree is indexed in the background; only new or modified files have their headers read
+            def index(job):
+                def progress(done, total, message):
+                    job.check()
+                    job.progress(done / total if total else 0.0, message)
+                return index_folder(folder, progress, lambda: job.cancelled)
+            self.run_job("Indexing", index, on_done=lambda records: self.open_folder(folder, records),
+                         key="index")
+
+    def open_folder(self, folder, records):
+        # Labels saved in an earlier session of this folder are replayed from its journal
+        self.leave_team_queue()
+        if self.journal is not None:
+            self.journal.close()
+        path = journal_path_for(folder)
+        self.data = LabelStore(self.labels)
+        for entry in replay(path):
+            self.data.append(entry)
+        self.journal = LabelJournal(path)
+        self.folder = os.path.abspath(folder)
+        self.file_records = records
+        paths = self.queue_paths()
+        self.audio_files = paths if paths is not None else [record.path for record in records]
+        self.current_index = first_unlabeled(self.audio_files, self.folder, self.data.labeled_files())
+        if self.current_index >= len(self.audio_files):
+            self.current_index = 0
+        self.propagated = set()
+        self.on_file_changed()
+        self.find_duplicates(folder, records)
+        message = f"{len(records)} audio files indexed ({len(self.audio_files)} in the queue)."
+        if self.data:
+            message += f"\nResumed {len(self.data)} saved labels at file {self.current_index + 1}."
+        messagebox.showinfo("Loaded", message)
+
+    def find_duplicates(self, folder, records):
+        # Fingerprints are built in a process pool in the background; only new or changed files are
+        # fingerprinted again. Labels are propagated once the index is ready.
+        self.fingerprints = None
+
+        def work(job):
+            def progress(done, total, message):
+                job.progress(done / total if total else 0.0, message)
+            index = FingerprintIndex(folder)
+            index.refresh(records, progress=progress, cancelled=lambda: job.cancelled)
+            job.check()
+            return index
+
+        def done(index):
+            if self.file_records is not records:
+                return
+            self.fingerprints = index
+            members = sum(len(group) for group in index.clusters)
+            self.set_status(f"{len(index.clusters)} near-duplicate groups ({members} files)")
+        self.run_job("Duplicates", work, on_done=done, key="fingerprint")
+
+    def propagate_labels(self, entry):
+        # The saved entry is copied to the current file's near-duplicates, which are then skipped.
+        # Duplicates that already have labels of their own are left alone; returns how many.
+        path = self.current_path()
+        if self.fingerprints is None or self.journal is None or not self.propagate_var.get() or path is None:
+            return 0
+        skipped = 0
+        for copy in propagate_entry(entry, self.fingerprints.duplicates(path), self.fingerprints.folder):
+            if self.data.has_file(copy["filename"]) and copy["filename"] not in self.propagated:
+                skipped += 1
+                continue
+            self.journal.append(copy)
+            self.data.append(copy)
+            self.propagated.add(copy["filename"])
+        return skipped
+
+    def show_skipped_duplicates(self, skipped):
+        if skipped:
+            self.set_status(f"Labels not copied to {skipped} near-duplicate(s) that are already labeled")
+
+    def join_team_queue(self):
+        # Files are leased from a coordinator (python -m utils.coordinator FOLDER) a few at a time,
+        # so several labelers can work through one folder without colliding
+        address = simpledialog.askstring("Team queue", "Coordinator address:", initialvalue=DEFAULT_ADDRESS,
+                                         parent=self.root)
+        if not address:
+            return
+        labeler = simpledialog.askstring("Team queue", "Your name:", initialvalue=getpass.getuser(),
+                                         parent=self.root)
+        if not labeler:
+            return
+
+        def join(job):
+            session = WorkSession(CoordinatorClient(address.strip(), labeler.strip()))
+            try:
+                # resume: files still leased to this name from a previous run come back first
+                return session, session.lease(resume=True)
+            except Exception:
+                session.close(release=False)
+                raise
+        self.run_job("Joining queue", join, on_done=lambda result: self.start_team_queue(*result))
+
+    def start_team_queue(self, session, paths):
+        self.leave_team_queue()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.jobs.cancel("fingerprint")
+        self.fingerprints = None
+        self.propagated = set()
+        self.session = session
+        self.data = LabelStore(self.labels)
+        self.file_records = []
+        self.folder = None
+        self.audio_files = list(paths)
+        self.current_index = 0
+        self.on_file_changed()
+        self.set_status(f"Team queue: {session.labeler} at {session.client.host}:{session.client.port}")
+        if not paths:
+            messagebox.showinfo("Team queue", "No files left in the team queue.")
+
+    def leave_team_queue(self, timeout=None):
+        # Labels not yet sent are committed and unfinished files go back to the queue. That takes
+        # network round trips, so it runs on its own thread; not a daemon, so exit waits for it.
+        if self.session is not None:
+            threading.Thread(target=self.session.close, kwargs={"timeout": timeout}, name="leave-queue").start()
+            self.session = None
+
+    def extend_queue(self):
+        # Leases the next batch before the labeler runs out of files. Never cancelled or run twice at
+        # once: leased files that never reach the queue would stay reserved until the session ends.
+        session = self.session
+        if self.leasing:
+            return
+        self.leasing = True
+
+        def failed(e):
+            self.leasing = False
+            metrics.error("Leasing", f"Leasing files failed: {e}")
+            self.set_status("Leasing: failed, press Next to retry")
+
+        def done(paths):
+            self.leasing = False
+            if self.session is not session:
+                return
+            at_end = self.current_index >= len(self.audio_files)
+            self.audio_files.extend(path for path in paths if path not in self.audio_files)
+            if not at_end:
+                return
+            if self.current_index < len(self.audio_files):
+                self.on_file_changed()
+            else:
+                messagebox.showinfo("Done", "No files left in the team queue.")
+        self.jobs.submit("Leasing", lambda job: session.lease(), on_done=done, on_error=failed)
+
+    def queue_paths(self):
+        # Sorted and filtered view of the index; None when the duration bounds are not numbers
+        try:
+            min_duration = float(self.min_duration_entry.get()) if self.min_duration_entry.get().strip() else None
+            max_duration = float(self.max_duration_entry.get()) if self.max_duration_entry.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Invalid duration", "Durations must be numbers of seconds.")
+            return None
+        labeled = self.data.labeled_files()
+        records = filter_records(self.file_records, self.folder, self.status_var.get(), labeled, min_duration,
+                                 max_duration)
+        return [record.path for record in sort_records(records, self.folder, SORT_ORDERS[self.sort_var.get()],
+                                                       labeled)]
+
+    def apply_queue(self):
+        # Stays on the current file when it is still listed
+        paths = self.queue_paths()
+        if paths is None or self.journal is None:
+            return
+        current = self.current_path()
+        self.audio_files = paths
+        if current in self.audio_files:
+            self.current_index = self.audio_files.index(current)
+            self.prefetcher.schedule(self.audio_files, self.current_index)
+        else:
             self.current_index = 0
-            messagebox.showinfo("Loaded", f"{len(self.audio_files)} audio files loaded.")
+            self.on_file_changed()
+        self.set_status(f"{len(self.audio_files)} of {len(self.file_records)} files in the queue")
+
+    def on_file_changed(self):
+        # Results still in flight for the previous file must not land on this one
+        self.jobs.cancel("waveform")
+        self.jobs.cancel("transcribe")
+        self.jobs.cancel("suggest")
+        self.pending_segments = []
+        self.current_features = None
+        self.show_suggestions({})
+        self.spectrogram_view.clear()
+        if self.player is not None:
+            self.player.stop()
+        self.waveform_view.clear()
+        self.prefetcher.schedule(self.audio_files, self.current_index)
+        self.fill_transcript()
+        self.suggest_labels()
+        if self.fingerprints is not None and self.current_path() is not None:
+            duplicates = self.fingerprints.duplicates(self.current_path())
+            if duplicates:
+                self.set_status(f"{len(duplicates)} near-duplicate(s) of this file in the folder")
+
+    def suggest_labels(self):
+        path = self.current_path()
+        if path is None:
+            return
+
+        def suggest(job):
+            entry = self.prefetcher.get(path)
+            job.check()
+            features = get_features(path, entry.samples, entry.sample_rate)
+            return features, self.suggester.suggest(features)
+
+        def show(result):
+            if self.current_path() != path:
+                return
+            self.current_features, scores = result
+            self.show_suggestions(scores)
+            # Pre-tick confident labels, but only if the labeler has not started ticking
+            if not any(var.get() for var in self.label_vars.values()):
+                for label in self.suggester.pick(scores):
+                    self.label_vars[label].set(1)
 
+        self.jobs.submit("Label suggestions", suggest, key="suggest", on_done=show,
+                         on_error=lambda e: metrics.error("suggest", f"Label suggestion failed: {e}"))
+
+    def show_suggestions(self, scores):
+        for label, chk in self.label_checks.items():
+            score = scores.get(label)
+            chk.config(text=label if score is None else f"{label} ({score:.2f})")
+
+    def fill_transcript(self):
+        # Pre-fill from batch results, never overwriting what the labeler typed
+        path = self.current_path()
+        key = os.path.abspath(path) if path is not None else None
+        if key in self.transcripts and not self.transcription_entry.get():
+            self.transcription_entry.insert(0, self.transcripts[key])
+
+    def load_player(self):
+        # Prefer the prefetched buffer; until it is ready the player reads short windows from disk
+        path = self.current_path()
+        if path is None:
+            return False
+        if self.player is None:
+            from utils.playback import PlaybackEngine, init_mixer
+            init_mixer()
+            self.player = PlaybackEngine()
+            self.player.rate = float(self.rate_var.get().rstrip("x"))
+        entry = self.prefetcher.peek(path)
+        if entry is not None and entry.samples is not None:
+            self.player.load(path, entry.samples, entry.sample_rate)
+        else:
+            self.player.load(path)
+        return True
+
+    @timed_action("Play")
     def play_audio(self):
-        if self.current_index < len(self.audio_files):
-            path = self.audio_files[self.current_index]
-            threading.Thread(target=lambda: pygame.mixer.music.load(path) or pygame.mixer.music.play()).start()
+        if self.load_player():
+            self.player.toggle()
+
+    @timed_action("Play selection")
+    def play_selection(self):
+        if not self.load_player():
+            return
+        try:
+            start = parse_time(self.start_time_entry.get())
+            end = parse_time(self.end_time_entry.get())
+        except ValueError:
+            return
+        start = 0.0 if start != start else start  # blank fields parse as NaN
+        end = None if end != end else end
+        self.player.play(start, end, loop=bool(self.loop_var.get()))
+
+    def seek_relative(self, seconds):
+        if self.player is not None and self.player.path == self.current_path():
+            self.player.seek(self.player.position + seconds)
+
+    def set_playback_rate(self, rate):
+        self.rate_var.set(f"{rate}x")
+        if self.player is not None:
+            self.player.set_rate(rate)
+
+    def tick_player(self):
+        if self.player is not None:
+            self.player.tick()
+            if self.player.path is not None and self.player.path == self.current_path():
+                self.waveform_view.set_playhead(self.player.position)
+        self.root.after(30, self.tick_player)
 
     def plot_waveform(self):
-        if self.current_index < len(self.audio_files):
-            display_waveform(self.audio_files[self.current_index])
+        path = self.current_path()
+        if path is not None:
+            def show(entry):
+                if self.current_path() == path:
+                    # Spectrogram tiles are computed only for the range on screen, so long files open at once
+                    try:
+                        self.spectrogram_view.set_source(SpectrogramTiles(path, entry.samples, entry.sample_rate))
+                    except Exception as e:
+                        metrics.error("spectrogram", f"Could not open spectrogram: {e}")
+                    self.waveform_view.set_peaks(entry.peaks)
+            self.run_job("Waveform", lambda job: self.prefetcher.get(path), on_done=show, key="waveform")
+
+    def toggle_spectrogram(self):
+        if self.spectrogram_var.get():
+            self.spectrogram_view.pack(fill=tk.X, padx=10, pady=(0, 10), after=self.waveform_view)
+        else:
+            self.spectrogram_view.pack_forget()
+
+    def request_spectrogram_tile(self, tiles, level, index, on_done):
+        def failed(e):
+            metrics.error("spectrogram", f"Spectrogram tile failed: {e}")
+            on_done(None)
+        return self.jobs.submit("Spectrogram", lambda job: tiles.get(level, index), on_done=on_done,
+                                on_error=failed)
+
+    def set_time_range(self, start, end):
+        self.start_time_entry.delete(0, tk.END)
+        self.start_time_entry.insert(0, f"{start:.2f}")
+        self.end_time_entry.delete(0, tk.END)
+        self.end_time_entry.insert(0, f"{end:.2f}")
 
     def auto_transcribe(self):
-        if self.current_index < len(self.audio_files):
-            result = transcribe_audio(self.audio_files[self.current_index])
-            self.transcription_entry.delete(0, tk.END)
-            self.transcription_entry.insert(0, result)
+        path = self.current_path()
+        if path is not None:
+            def show(result):
+                if self.current_path() == path:
+                    self.transcription_entry.delete(0, tk.END)
+                    self.transcription_entry.insert(0, result)
 
+            def transcribe(job):
+                # Reuse the buffer already decoded for the waveform instead of re-reading the file
+                entry = self.prefetcher.get(path)
+                job.check()
+                return transcribe_audio(path, samples=entry.samples, sample_rate=entry.sample_rate,
+                                        cache=get_cache())
+            self.run_job("Transcription", transcribe, on_done=show, key="transcribe")
+
+    def segment_transcribe(self):
+        path = self.current_path()
+        if path is not None:
+            def work(job):
+                entry = self.prefetcher.get(path)
+                job.check()
+                if entry.samples is not None:
+                    segments = segment_samples(entry.samples, entry.sample_rate)
+                else:
+                    segments = segment_file(path)
+                job.progress(0.5, f"transcribing {len(segments)} segments")
+                return transcribe_segments(path, segments, samples=entry.samples, sample_rate=entry.sample_rate)
+
+            def show(segments):
+                if self.current_path() == path:
+                    self.pending_segments = segments
+                    self.load_next_segment()
+            self.run_job("Segmentation", work, on_done=show, key="transcribe")
+
+    def load_next_segment(self):
+        # Each detected segment becomes one label entry; Save & Next walks through them before the next file
+        if not self.pending_segments:
+            return False
+        segment = self.pending_segments.pop(0)
+        self.transcription_entry.delete(0, tk.END)
+        self.transcription_entry.insert(0, segment["transcription"])
+        self.set_time_range(segment["start_time"], segment["end_time"])
+        self.waveform_view.set_selection(segment["start_time"], segment["end_time"])
+        self.set_status(f"Segment {segment['start_time']:.2f}s - {segment['end_time']:.2f}s "
+                        f"({len(self.pending_segments)} more)")
+        return True
+
+    def batch_transcribe(self):
+        if not self.audio_files:
+            return
+
+        # Finished records are handed from the workers to the Tk thread, which owns the label store
+        results = collections.deque()
+
+        def collect(job, paths):
+            # Files finished by an earlier run are not transcribed again, but their text still shows up
+            previous = load_progress(DEFAULT_OUTPUT)
+            results.extend(previous[path] for path in paths if path in previous)
+            job.progress(0.0, f"{len(results)} files already transcribed")
+
+            def on_result(record, finished, total):
+                if "transcription" in record:
+                    results.append(record)
+                job.progress(finished / total, f"{finished}/{total} files")
+            return transcribe_batch(paths, on_result=on_result, cancelled=lambda: job.cancelled,
+                                    cache=get_cache())
+
+        def store_results():
+            target = self.session or self.journal
+            while results:
+                record = results.popleft()
+                self.transcripts[record["path"]] = record["transcription"]
+                name = self.entry_name(record["path"])
+                # Whole-file transcript entry, unless the file already has labels of its own
+                if target is not None and not self.data.has_file(name):
+                    entry = {"filename": name, "transcription": record["transcription"], "labels": "",
+                             "start_time": "", "end_time": ""}
+                    target.append(entry)
+                    self.data.append(entry)
+            self.fill_transcript()
+
+        def progress(fraction, message):
+            self.set_status(f"Batch transcription: {message}")
+            store_results()
+
+        def done(report):
+            self.set_status(str(report))
+            store_results()
+
+        self.set_status("Batch transcription...")
+        self.jobs.submit("Batch transcription", collect, [os.path.abspath(p) for p in self.audio_files],
+                         key="batch_transcribe", on_done=done, on_progress=progress,
+                         on_error=lambda e: messagebox.showerror("Error", f"Batch transcription failed: {e}"))
+
+    @timed_action("Save")
     def save_label(self):
         if self.current_index < len(self.audio_files):
             labels = [label for label, var in self.label_vars.items() if var.get() == 1]
+            try:
+                start_time = parse_time(self.start_time_entry.get())
+                end_time = parse_time(self.end_time_entry.get())
+            except ValueError:
+                messagebox.showerror("Invalid time", "Start and end times must be numbers of seconds.")
+                return
             entry = {
-                "filename": os.path.basename(self.audio_files[self.current_index]),
+                "filename": self.entry_name(self.audio_files[self.current_index]),
                 "transcription": self.transcription_entry.get(),
                 "labels": ", ".join(labels),
                 "start_time": self.start_time_entry.get(),
                 "end_time": self.end_time_entry.get()
             }
-            self.data.append(entry)
+            (self.session or self.journal).append(entry)
+            self.data.add(entry["filename"], entry["transcription"], labels, start_time, end_time)
+            skipped = self.propagate_labels(entry)
+            if self.current_features is not None:
+                self.suggester.learn(self.current_features, labels)
             self.transcription_entry.delete(0, tk.END)
             self.start_time_entry.delete(0, tk.END)
             self.end_time_entry.delete(0, tk.END)
             for var in self.label_vars.values():
                 var.set(0)
+            if self.load_next_segment():
+                self.show_skipped_duplicates(skipped)
+                return
+            metrics.file_done()
+            if self.session is not None:
+                self.session.finish(self.audio_files[self.current_index])
             self.current_index += 1
-            if self.current_index >= len(self.audio_files):
+            while (self.current_index < len(self.audio_files) and
+                   self.entry_name(self.audio_files[self.current_index]) in self.propagated):
+                self.current_index += 1
+            if self.session is not None and self.current_index >= len(self.audio_files) - 1:
+                self.extend_queue()
+            self.on_file_changed()
+            self.show_skipped_duplicates(skipped)
+            if self.current_index >= len(self.audio_files) and self.session is None:
                 messagebox.showinfo("Done", "All files labeled.")
 
     def export_csv(self):
-        df = pd.DataFrame(self.data)
-        os.makedirs("output", exist_ok=True)
-        df.to_csv("output/labeled_data.csv", index=False)
-        messagebox.showinfo("Exported", "CSV exported successfully.")
+        self.export_rows("CSV export", exporter.export_csv, "output/labeled_data.csv")
+
+    def export_parquet(self):
+        self.export_rows("Parquet export", exporter.export_parquet, "output/labeled_data.parquet")
+
+    def export_rows(self, name, export, path):
+        # Streams rows saved so far straight from the store; rows saved meanwhile go in the next export
+        store = self.data
+        end_row = len(store)
+        incremental = bool(self.incremental_export_var.get())
+        session = self.journal.path if self.journal is not None else None
+
+        def work(job):
+            def progress(done, total):
+                job.check()
+                job.progress(done / total if total else 1.0, f"{done}/{total} rows")
+            return export(store, path, end_row=end_row, incremental=incremental, session=session, progress=progress)
+        self.run_job(name, work, on_done=lambda report: messagebox.showinfo("Exported", str(report)))
 
     def export_pdf(self):
-        generate_pdf(self.data, "output/report.pdf")
-        messagebox.showinfo("Exported", "PDF exported successfully.")
+        from utils.pdf_generator import generate_pdf
+        store = self.data
+        end_row = len(store)
+        durations = {self.entry_name(r.path): r.duration for r in self.file_records}
+
+        def done(paths):
+            if paths:
+                messagebox.showinfo("Exported", f"PDF exported successfully ({len(paths)} file(s)).")
+            else:
+                messagebox.showerror("Error", "PDF export failed, see the console for details.")
+        self.run_job("PDF export", lambda job: generate_pdf(store, "output/report.pdf", durations=durations,
+                                                                  end_row=end_row),
+                     on_done=done)
 
     def upload_db(self):
-        upload_to_mysql(self.data)
-        messagebox.showinfo("Uploaded", "Data uploaded to MySQL successfully.")
+        def done(count):
+            if count is None:
+                messagebox.showerror("Error", "MySQL upload failed, see the console for details.")
+            else:
+                messagebox.showinfo("Uploaded", f"{count} new or changed rows uploaded to MySQL.")
+        # Rows are built in the job from a snapshot of the row count, as for the other exports
+        store = self.data
+        end_row = len(store)
+        incremental = bool(self.incremental_upload_var.get())
+        self.run_job("MySQL upload",
+                     lambda job: upload_to_mysql((store.entry(row) for row in range(end_row)),
+                                                 incremental=incremental),
+                     on_done=done)
+
+    def next_audio(self):
+        if self.current_index < len(self.audio_files) - 1:
+            self.current_index += 1
+            self.on_file_changed()
+        elif self.session is not None:
+            self.extend_queue()
+
+    def previous_audio(self):
+        if self.current_index > 0:
+            self.current_index -= 1
+            self.on_file_changed()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = AudioLabelingTool(root)
+    root.after_idle(app.on_first_window)
     root.mainloop()
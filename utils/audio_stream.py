@@ -0,0 +1,209 @@
+# audio_stream.py
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+BLOCK_FRAMES = 65536
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioInfo:
+    def __init__(self, sample_rate, channels, frames):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = frames
+
+    @property
+    def duration(self):
+        return self.frames / float(self.sample_rate) if self.sample_rate else 0.0
+
+
+class WavLayout:
+    def __init__(self, sample_rate, channels, bits, fmt_tag, data_offset, data_size):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bits = bits
+        self.fmt_tag = fmt_tag
+        self.data_offset = data_offset
+        self.data_size = data_size
+
+    @property
+    def frame_bytes(self):
+        return self.channels * self.bits // 8
+
+    @property
+    def frames(self):
+        return self.data_size // self.frame_bytes if self.frame_bytes else 0
+
+
+def parse_wav_header(path):
+    # Walks the RIFF chunks without reading sample data; returns None for non-WAV files
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size)
+                fmt_tag, channels, sample_rate = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                if fmt_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    fmt_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (fmt_tag, channels, sample_rate, bits)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                data_offset = f.tell()
+                # Some writers leave the size unset while streaming
+                data_size = min(chunk_size, file_size - data_offset)
+                fmt_tag, channels, sample_rate, bits = fmt
+                return WavLayout(sample_rate, channels, bits, fmt_tag, data_offset, data_size)
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+def _decode_pcm(raw, layout):
+    bits = layout.bits
+    if layout.fmt_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(raw, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif bits == 8:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif bits == 16:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif bits == 32:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {bits} bits")
+    return samples.reshape(-1, layout.channels)
+
+
+def _iter_wav_blocks(path, layout, block_frames, start_frame, end_frame):
+    page = mmap.ALLOCATIONGRANULARITY
+    with open(path, "rb") as f:
+        if layout.data_size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            frame = start_frame
+            while frame < end_frame:
+                count = min(block_frames, end_frame - frame)
+                begin = layout.data_offset + frame * layout.frame_bytes
+                stop = begin + count * layout.frame_bytes
+                yield _decode_pcm(mm[begin:stop], layout)
+                # Drop the pages this block consumed so resident memory stays flat; earlier
+                # blocks were already released
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                    first = (begin // page) * page
+                    last = (stop // page) * page
+                    if last > first:
+                        mm.madvise(mmap.MADV_DONTNEED, first, last - first)
+                frame += count
+        finally:
+            mm.close()
+
+
+def _iter_decoded_blocks(path, block_frames, start_frame, end_frame):
+    try:
+        import soundfile as sf
+        with sf.SoundFile(path) as f:
+            f.seek(start_frame)
+            remaining = end_frame - start_frame
+            while remaining > 0:
+                block = f.read(min(block_frames, remaining), dtype="float32", always_2d=True)
+                if not len(block):
+                    break
+                remaining -= len(block)
+                yield block
+        return
+    except (ImportError, RuntimeError):
+        pass
+
+    # Fall back to audioread (ffmpeg/gstreamer) for formats libsndfile cannot open
+    import audioread
+    with audioread.audio_open(path) as f:
+        channels = f.channels
+        pending = []
+        pending_frames = 0
+        position = 0
+        for buf in f:
+            block = (np.frombuffer(buf, dtype="<i2").astype(np.float32) / 32768.0).reshape(-1, channels)
+            if position + len(block) <= start_frame:
+                position += len(block)
+                continue
+            if position < start_frame:
+                block = block[start_frame - position:]
+                position = start_frame
+            if position + len(block) > end_frame:
+                block = block[:end_frame - position]
+            position += len(block)
+            pending.append(block)
+            pending_frames += len(block)
+            while pending_frames >= block_frames:
+                joined = np.concatenate(pending)
+                yield joined[:block_frames]
+                rest = joined[block_frames:]
+                pending = [rest] if len(rest) else []
+                pending_frames = len(rest)
+            if position >= end_frame:
+                break
+        if pending_frames:
+            yield np.concatenate(pending)
+
+
+def audio_info(path):
+    layout = parse_wav_header(path)
+    if layout is not None:
+        return AudioInfo(layout.sample_rate, layout.channels, layout.frames)
+    try:
+        import soundfile as sf
+        info = sf.info(path)
+        return AudioInfo(info.samplerate, info.channels, info.frames)
+    except (ImportError, RuntimeError):
+        import audioread
+        with audioread.audio_open(path) as f:
+            return AudioInfo(f.samplerate, f.channels, int(round(f.duration * f.samplerate)))
+
+
+def iter_blocks(path, block_frames=BLOCK_FRAMES, mono=True, start=0.0, end=None):
+    # Yields float32 blocks of at most block_frames frames: 1-D when mono, (frames, channels) otherwise
+    info = audio_info(path)
+    start_frame = max(0, int(start * info.sample_rate))
+    end_frame = info.frames if end is None else min(info.frames, int(end * info.sample_rate))
+    if end is None and info.frames == 0:
+        end_frame = np.iinfo(np.int64).max
+
+    layout = parse_wav_header(path)
+    if layout is not None:
+        blocks = _iter_wav_blocks(path, layout, block_frames, start_frame, end_frame)
+    else:
+        blocks = _iter_decoded_blocks(path, block_frames, start_frame, end_frame)
+    for block in blocks:
+        if mono:
+            block = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1)
+        yield block
+
+
+def read_range(path, start=0.0, end=None, mono=True):
+    blocks = list(iter_blocks(path, mono=mono, start=start, end=end))
+    if not blocks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(blocks)
@@ -0,0 +1,110 @@
+# auto_label.py
+
+import os
+import threading
+
+import numpy as np
+
+from utils.features import FEATURE_NAMES
+from utils.metrics import metrics
+
+MODEL_PATH = os.path.join("assets", "label_model.npz")
+SUGGEST_THRESHOLD = 0.6
+MIN_EXAMPLES = 5   # per class (with / without the label) before the learned model replaces the prior
+SHARPNESS = 2.0
+
+_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def prior_scores(features):
+    # Hand-tuned starting points for the acoustic labels, used until enough examples are saved
+    rms = features[_INDEX["rms_mean"]]
+    loud = rms > 10 ** (-50 / 20.0)
+    if not loud:
+        return {}
+    modulation = features[_INDEX["rms_std"]] / (rms + 1e-10)
+    flatness = features[_INDEX["flatness_mean"]]
+    zcr_spread = features[_INDEX["zcr_std"]]
+    return {
+        "Speech": float(_sigmoid(5.0 * (modulation - 0.6)) * _sigmoid(40.0 * (zcr_spread - 0.03))),
+        "Music": float(_sigmoid(6.0 * (0.45 - modulation)) * _sigmoid(20.0 * (0.15 - flatness))),
+        "Noise": float(_sigmoid(15.0 * (flatness - 0.3)) * _sigmoid(6.0 * (0.6 - modulation))),
+    }
+
+
+class LabelSuggester:
+    # Nearest-centroid classifier per label over standardised feature summaries. Only running
+    # sums are stored, so learning from each saved label is O(features) and the model file is tiny.
+    def __init__(self, labels, path=MODEL_PATH):
+        self.labels = list(labels)
+        self.path = path
+        dims = len(FEATURE_NAMES)
+        self.count = 0
+        self.total = np.zeros(dims)
+        self.total_sq = np.zeros(dims)
+        self.pos_sum = np.zeros((len(self.labels), dims))
+        self.pos_count = np.zeros(len(self.labels))
+        self._lock = threading.Lock()
+        self._load()
+
+    def learn(self, features, labels):
+        features = np.asarray(features, dtype=np.float64)
+        with self._lock:
+            self.count += 1
+            self.total += features
+            self.total_sq += features ** 2
+            for i, label in enumerate(self.labels):
+                if label in labels:
+                    self.pos_sum[i] += features
+                    self.pos_count[i] += 1
+
+    def suggest(self, features):
+        # {label: confidence in [0, 1]} for every label the model or the prior has an opinion on
+        features = np.asarray(features, dtype=np.float64)
+        scores = prior_scores(features)
+        with self._lock:
+            if self.count == 0:
+                return scores
+            mean = self.total / self.count
+            std = np.sqrt(np.maximum(self.total_sq / self.count - mean ** 2, 1e-12))
+            x = (features - mean) / std
+            for i, label in enumerate(self.labels):
+                positives = self.pos_count[i]
+                negatives = self.count - positives
+                if positives < MIN_EXAMPLES or negatives < MIN_EXAMPLES:
+                    continue
+                pos_centroid = (self.pos_sum[i] / positives - mean) / std
+                neg_centroid = ((self.total - self.pos_sum[i]) / negatives - mean) / std
+                margin = np.mean((x - neg_centroid) ** 2) - np.mean((x - pos_centroid) ** 2)
+                scores[label] = float(_sigmoid(SHARPNESS * margin))
+        return scores
+
+    def pick(self, scores, threshold=SUGGEST_THRESHOLD):
+        return [label for label in self.labels if scores.get(label, 0.0) >= threshold]
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp.npz"
+            np.savez(tmp_path, labels=np.array(self.labels), count=self.count, total=self.total,
+                     total_sq=self.total_sq, pos_sum=self.pos_sum, pos_count=self.pos_count)
+            os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path)
+            if list(data["labels"]) != self.labels or data["total"].shape != self.total.shape:
+                return  # label set or feature layout changed; start fresh
+            self.count = int(data["count"])
+            self.total = data["total"]
+            self.total_sq = data["total_sq"]
+            self.pos_sum = data["pos_sum"]
+            self.pos_count = data["pos_count"]
+        except (OSError, ValueError, KeyError) as e:
+            metrics.error("auto_label", f"Could not load label model: {e}")
@@ -0,0 +1,170 @@
+# batch_transcribe.py
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.audio_stream import audio_info
+from utils.file_index import scan_tree
+from utils.transcription_ai import BACKENDS, BackendRequestError, get_backend, transcribe_cached
+from utils.transcription_cache import get_cache
+
+BATCH_WORKERS = 4
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 2.0
+DEFAULT_OUTPUT = os.path.join("output", "transcripts.jsonl")
+
+
+def list_audio_files(folder):
+    return sorted(path for path, _, _ in scan_tree(folder))
+
+
+class RateLimiter:
+    # Shared by all workers: one rejected request pauses every worker, not just the one that hit it
+    def __init__(self, base_delay=BACKOFF_SECONDS):
+        self.base_delay = base_delay
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def penalize(self, attempt):
+        delay = self.base_delay * (2 ** attempt) + random.uniform(0, self.base_delay)
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+
+class BatchReport:
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.elapsed = 0.0
+        self.cache = None
+
+    @property
+    def files_per_minute(self):
+        return self.files * 60.0 / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def audio_seconds_per_second(self):
+        return self.audio_seconds / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (f"Transcribed {self.files} files ({self.failed} failed, {self.skipped} already done) "
+                f"in {self.elapsed:.1f}s: {self.files_per_minute:.1f} files/min, "
+                f"{self.audio_seconds_per_second:.2f} audio-s/s" + self._cache_summary())
+
+    def _cache_summary(self):
+        if not self.cache:
+            return ""
+        return f", cache {self.cache['hits']} hits / {self.cache['misses']} misses"
+
+
+def load_progress(output_path):
+    done = {}
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if "error" not in record:
+                    done[record["path"]] = record
+    return done
+
+
+def transcribe_with_retry(path, limiter, retries=MAX_RETRIES, backend=None, cache=None):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return transcribe_cached(path, backend, cache)
+        except BackendRequestError:
+            if attempt == retries:
+                raise
+            limiter.penalize(attempt)
+
+
+def transcribe_batch(paths, workers=BATCH_WORKERS, output_path=DEFAULT_OUTPUT, retries=MAX_RETRIES,
+                     on_result=None, cancelled=None, backend=None, cache=None):
+    # Appends one JSON line per finished file, so an interrupted run resumes where it stopped
+    report = BatchReport()
+    done = load_progress(output_path)
+    todo = [p for p in paths if os.path.abspath(p) not in done]
+    report.skipped = len(paths) - len(todo)
+    backend = backend or get_backend()
+    limiter = RateLimiter()
+    write_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def work(path):
+        if cancelled is not None and cancelled():
+            return None
+        duration = audio_info(path).duration
+        record = {"path": os.path.abspath(path), "filename": os.path.basename(path), "duration": duration}
+        try:
+            record["transcription"] = transcribe_with_retry(path, limiter, retries, backend, cache)
+        except Exception as e:
+            record["error"] = str(e)
+        return record
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work, p) for p in todo]
+        for future in as_completed(futures):
+            record = future.result()
+            if record is None:
+                continue
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if "error" in record:
+                report.failed += 1
+            else:
+                report.files += 1
+                report.audio_seconds += record["duration"]
+            if on_result is not None:
+                on_result(record, report.files + report.failed, len(todo))
+    report.elapsed = time.perf_counter() - start
+    if cache is not None:
+        report.cache = cache.stats()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe every audio file in a folder.")
+    parser.add_argument("folder")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--no-cache", action="store_true", help="always call the backend")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="overrides TRANSCRIPTION_CONFIG in app_config.py")
+    args = parser.parse_args(argv)
+
+    paths = list_audio_files(args.folder)
+
+    def show(record, finished, total):
+        status = record.get("error") or record["transcription"][:60]
+        print(f"[{finished}/{total}] {record['filename']}: {status}", flush=True)
+
+    report = transcribe_batch(paths, workers=args.workers, output_path=args.output,
+                              retries=args.retries, on_result=show, backend=get_backend(args.backend),
+                              cache=None if args.no_cache else get_cache())
+    print(report)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,525 @@
+# coordinator.py
+# Usage: python -m utils.coordinator FOLDER [--host 127.0.0.1] [--port 8765]
+#        python -m utils.coordinator --stats [--address 127.0.0.1:8765]
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.file_index import index_folder, relative_name
+from utils.label_journal import LabelJournal, journal_path_for, replay
+from utils.metrics import format_seconds, metrics
+
+COORDINATOR_DIR = os.path.join("assets", "coordinator")
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+LEASE_TTL = 600.0        # seconds a leased file stays reserved without a renewal
+LEASE_BATCH = 5          # files leased at a time by the labeling tool
+FLUSH_EVERY = 16         # label entries buffered before a commit is sent
+FLUSH_INTERVAL = 2.0     # seconds; also how often held leases are considered for renewal
+MAX_LEASE = 100          # files per request
+BATCH_KEEP = 86400.0     # seconds an applied commit id is remembered for retries
+PRUNE_INTERVAL = 60.0    # seconds between sweeps of expired commit ids
+
+OPEN, LEASED, DONE = 0, 1, 2
+
+
+class CoordinatorError(Exception):
+    pass
+
+
+def store_path_for(folder, store_dir=COORDINATOR_DIR):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(store_dir, f"{os.path.basename(os.path.normpath(folder))}-{key}.sqlite3")
+
+
+class LeaseStore:
+    # File leases and per-labeler counters in SQLite. One connection behind one lock: every
+    # request is a single short transaction, and WAL with synchronous=NORMAL keeps commits off fsync.
+    def __init__(self, path, journal=None, folder=None):
+        self.path = path
+        self.journal = journal
+        self.folder = os.path.abspath(folder) if folder else None  # entry filenames are relative to it
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                status INTEGER NOT NULL DEFAULT 0,
+                labeler TEXT,
+                expires REAL,
+                leases INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS files_status ON files (status, expires);
+            CREATE TABLE IF NOT EXISTS labelers (
+                name TEXT PRIMARY KEY,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                leased INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                labels INTEGER NOT NULL DEFAULT 0,
+                expired INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                id TEXT PRIMARY KEY,
+                labeler TEXT NOT NULL,
+                done INTEGER NOT NULL,
+                applied REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS batches_applied ON batches (applied);
+        """)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pruned = 0.0
+
+    def add_files(self, paths, done=()):
+        # New files join the queue (or start as done when listed in done); known files keep their status
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO files (path, status) VALUES (?, ?)",
+                                   ((path, DONE if path in done else OPEN) for path in paths))
+            return self._conn.total_changes - before
+
+    def _seen(self, labeler, now, **increments):
+        # One upsert per request: first_seen is set once, counters are added to
+        columns = "".join(f", {name}" for name in increments)
+        marks = ", ?" * len(increments)
+        updates = "".join(f", {name} = {name} + excluded.{name}" for name in increments)
+        self._conn.execute(f"INSERT INTO labelers (name, first_seen, last_seen{columns}) VALUES (?, ?, ?{marks}) "
+                           f"ON CONFLICT (name) DO UPDATE SET last_seen = excluded.last_seen{updates}",
+                           (labeler, now, now, *increments.values()))
+
+    def _expire(self, now):
+        # Leases of labelers who stopped renewing go back to the queue
+        stale = self._conn.execute("SELECT labeler, COUNT(*) FROM files WHERE status = ? AND expires < ? "
+                                   "GROUP BY labeler", (LEASED, now)).fetchall()
+        if stale:
+            self._conn.executemany("UPDATE labelers SET expired = expired + ? WHERE name = ?",
+                                   [(count, labeler) for labeler, count in stale])
+            self._conn.execute("UPDATE files SET status = ?, labeler = NULL, expires = NULL "
+                               "WHERE status = ? AND expires < ?", (OPEN, LEASED, now))
+
+    def lease(self, labeler, count=LEASE_BATCH, ttl=LEASE_TTL, resume=False):
+        # resume: hand back files this labeler still holds first, e.g. after the tool restarted
+        count = max(0, min(int(count), MAX_LEASE))
+        now = time.time()
+        expires = now + ttl
+        with self._lock, self._conn:
+            self._expire(now)
+            paths = []
+            if resume:
+                paths = [row[0] for row in self._conn.execute(
+                    "SELECT path FROM files WHERE status = ? AND labeler = ? ORDER BY rowid LIMIT ?",
+                    (LEASED, labeler, count))]
+            # Open files always have expires NULL; matching it lets the index return them in rowid order
+            fresh = [row[0] for row in self._conn.execute(
+                "SELECT path FROM files WHERE status = ? AND expires IS NULL ORDER BY rowid LIMIT ?",
+                (OPEN, count - len(paths)))]
+            self._conn.executemany("UPDATE files SET status = ?, labeler = ?, expires = ?, leases = leases + ? "
+                                   "WHERE path = ?",
+                                   [(LEASED, labeler, expires, 0, path) for path in paths] +
+                                   [(LEASED, labeler, expires, 1, path) for path in fresh])
+            self._seen(labeler, now, leased=len(fresh))
+        return paths + fresh, expires
+
+    def renew(self, labeler, paths, ttl=LEASE_TTL):
+        # Returns the files that are no longer this labeler's (expired and leased to someone else)
+        now = time.time()
+        lost = []
+        with self._lock, self._conn:
+            for path in paths:
+                cursor = self._conn.execute("UPDATE files SET expires = ? WHERE path = ? AND labeler = ? "
+                                            "AND status = ?", (now + ttl, path, labeler, LEASED))
+                if cursor.rowcount == 0:
+                    lost.append(path)
+            self._seen(labeler, now)
+        return lost
+
+    def release(self, labeler, paths):
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("UPDATE files SET status = ?, labeler = NULL, expires = NULL "
+                                   "WHERE path = ? AND labeler = ? AND status = ?",
+                                   [(OPEN, path, labeler, LEASED) for path in paths])
+            released = self._conn.total_changes - before
+            self._seen(labeler, time.time())
+        return released
+
+    def commit(self, labeler, entries, done, batch=None):
+        # One batch per call: entries go to the folder's label journal, finished files leave the queue.
+        # Work is accepted even if its lease expired meanwhile, so no labels are lost. A client that
+        # retries after a lost reply sends the same batch id, and a batch already applied is skipped.
+        with self._lock, self._conn:
+            now = time.time()
+            if batch is not None:
+                row = self._conn.execute("SELECT done FROM batches WHERE id = ?", (batch,)).fetchone()
+                if row is not None:
+                    self._seen(labeler, now)
+                    return row[0]
+            if self.journal is not None:
+                for entry in entries:
+                    self.journal.append(entry)
+            before = self._conn.total_changes
+            self._conn.executemany("UPDATE files SET status = ?, labeler = ?, expires = NULL "
+                                   "WHERE path = ? AND status != ?",
+                                   [(DONE, labeler, path, DONE) for path in done])
+            finished = self._conn.total_changes - before
+            if batch is not None:
+                self._conn.execute("INSERT INTO batches (id, labeler, done, applied) VALUES (?, ?, ?, ?)",
+                                   (batch, labeler, finished, now))
+                if now - self._pruned > PRUNE_INTERVAL:
+                    # Retries come within seconds; ids older than BATCH_KEEP will not be seen again
+                    self._conn.execute("DELETE FROM batches WHERE applied < ?", (now - BATCH_KEEP,))
+                    self._pruned = now
+            self._seen(labeler, now, done=finished, labels=len(entries))
+        return finished
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+            holding = dict(self._conn.execute("SELECT labeler, COUNT(*) FROM files WHERE status = ? "
+                                              "AND expires >= ? GROUP BY labeler", (LEASED, now)).fetchall())
+            rows = self._conn.execute("SELECT name, first_seen, last_seen, leased, done, labels, expired "
+                                      "FROM labelers ORDER BY name").fetchall()
+        labelers = {}
+        for name, first_seen, last_seen, leased, done, labels, expired in rows:
+            # Throughput over the labeler's active span, at least a minute so early numbers stay sane
+            span = max(last_seen - first_seen, 60.0)
+            labelers[name] = {"done": done, "labels": labels, "leased": leased, "expired": expired,
+                              "holding": holding.get(name, 0), "files_per_hour": done * 3600.0 / span,
+                              "idle": now - last_seen}
+        return {"files": {"open": counts.get(OPEN, 0), "leased": counts.get(LEASED, 0),
+                          "done": counts.get(DONE, 0)},
+                "labelers": labelers,
+                "lease_latency": metrics.summary("coordinator lease")}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive: one connection per client for the whole session
+    disable_nagle_algorithm = True    # headers and body go out as separate writes
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, self.server.store.stats())
+        else:
+            self._reply(404, {"error": f"unknown route {self.path}"})
+
+    def do_POST(self):
+        route = self.path.strip("/")
+        handler = getattr(self, "_post_" + route, None)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if handler is None:
+                raise CoordinatorError(f"unknown route {self.path}")
+            labeler = str(request.get("labeler") or "").strip()
+            if not labeler:
+                raise CoordinatorError("labeler is required")
+            with metrics.timer("coordinator " + route):
+                reply = handler(self.server.store, labeler, request)
+        except (CoordinatorError, ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except Exception as e:
+            metrics.error("coordinator", f"Coordinator {route} failed: {e}")
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, reply)
+
+    @staticmethod
+    def _post_lease(store, labeler, request):
+        paths, expires = store.lease(labeler, request.get("count", LEASE_BATCH), request.get("ttl", LEASE_TTL),
+                                     bool(request.get("resume")))
+        return {"files": paths, "expires": expires, "folder": store.folder}
+
+    @staticmethod
+    def _post_renew(store, labeler, request):
+        return {"lost": store.renew(labeler, list(request.get("files", [])), request.get("ttl", LEASE_TTL))}
+
+    @staticmethod
+    def _post_release(store, labeler, request):
+        return {"released": store.release(labeler, list(request.get("files", [])))}
+
+    @staticmethod
+    def _post_commit(store, labeler, request):
+        return {"done": store.commit(labeler, list(request.get("entries", [])), list(request.get("done", [])),
+                                     request.get("batch"))}
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the console with dozens of clients
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # the default backlog of 5 resets connections when a team connects at once
+
+    def __init__(self, store, host="127.0.0.1", port=8765):
+        super().__init__((host, port), _Handler)
+        self.store = store
+
+    @property
+    def address(self):
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+
+def open_store(folder, path=None, progress=None):
+    # Indexes the folder and queues any audio files not seen before. Labels are written to the same
+    # journal a single labeler would use, so files labeled before the team joined are not handed out.
+    records = index_folder(folder, progress)
+    journal_path = journal_path_for(folder)
+    labeled = {entry.get("filename") for entry in replay(journal_path)}
+    store = LeaseStore(path or store_path_for(folder), LabelJournal(journal_path), folder)
+    store.add_files([record.path for record in records],
+                    done={record.path for record in records if relative_name(record.path, folder) in labeled})
+    return store
+
+
+class CoordinatorClient:
+    # JSON over one keep-alive HTTP connection; safe to share between threads
+    def __init__(self, address=DEFAULT_ADDRESS, labeler=None, timeout=5.0):
+        host, _, port = address.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port)
+        self.labeler = labeler
+        self.timeout = timeout
+        self.folder = None  # the served folder, known after the first lease
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _call(self, method, route, payload=None):
+        body = None
+        headers = {}
+        if payload is not None:
+            body = json.dumps(dict(payload, labeler=self.labeler)).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._conn.request(method, route, body=body, headers=headers)
+                    response = self._conn.getresponse()
+                    data = json.loads(response.read() or b"{}")
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    # The server closes idle keep-alive connections; reconnect once before giving up
+                    self._conn.close()
+                    self._conn = None
+                    if attempt:
+                        raise CoordinatorError(f"Coordinator at {self.host}:{self.port} unreachable: {e}")
+        if response.status != 200:
+            raise CoordinatorError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def lease(self, count=LEASE_BATCH, ttl=LEASE_TTL, resume=False):
+        reply = self._call("POST", "/lease", {"count": count, "ttl": ttl, "resume": resume})
+        self.folder = reply.get("folder") or self.folder
+        return reply["files"]
+
+    def renew(self, paths, ttl=LEASE_TTL):
+        return self._call("POST", "/renew", {"files": list(paths), "ttl": ttl})["lost"]
+
+    def release(self, paths):
+        return self._call("POST", "/release", {"files": list(paths)})["released"]
+
+    def set_timeout(self, seconds):
+        # Also applies to a request in flight on the open connection
+        self.timeout = seconds
+        sock = getattr(self._conn, "sock", None)
+        if sock is not None:
+            try:
+                sock.settimeout(seconds)
+            except OSError:
+                pass  # closed meanwhile; the next connection picks up self.timeout
+
+    def commit(self, entries, done, batch=None):
+        # batch: id the server uses to skip a commit it already applied; pass the same one when retrying
+        batch = batch or uuid.uuid4().hex
+        return self._call("POST", "/commit", {"entries": list(entries), "done": list(done), "batch": batch})["done"]
+
+    def stats(self):
+        return self._call("GET", "/stats")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class WorkSession:
+    # One labeler's side of the queue. append() and finish() only buffer, so saving a label never
+    # waits on the network; a background thread commits in batches and keeps held leases alive.
+    def __init__(self, client, ttl=LEASE_TTL, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.client = client
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self.held = set()
+        self.lost = set()
+        self._entries = []
+        self._done = []
+        self._pending = None  # (batch id, entries, done) sent but not yet acknowledged
+        self._renewed = time.monotonic()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(flush_interval,), name="work-session",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def labeler(self):
+        return self.client.labeler
+
+    def lease(self, count=LEASE_BATCH, resume=False):
+        paths = self.client.lease(count, self.ttl, resume)
+        with self._lock:
+            self.held.update(paths)
+        return paths
+
+    def append(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            if len(self._entries) >= self.flush_every:
+                self._wake.set()
+
+    def finish(self, path):
+        with self._lock:
+            self._done.append(path)
+            self.held.discard(path)
+
+    def flush(self):
+        while True:
+            with self._lock:
+                if self._pending is None:
+                    if not self._entries and not self._done:
+                        return True
+                    self._pending = (uuid.uuid4().hex, self._entries, self._done)
+                    self._entries, self._done = [], []
+                batch, entries, done = self._pending
+            try:
+                self.client.commit(entries, done, batch)
+            except CoordinatorError as e:
+                # Retried unchanged under the same id: the server may have applied it before the reply was lost
+                metrics.error("coordinator", f"Could not commit labels: {e}")
+                return False
+            with self._lock:
+                self._pending = None
+
+    def renew(self):
+        with self._lock:
+            held = list(self.held)
+        if held:
+            lost = self.client.renew(held, self.ttl)
+            with self._lock:
+                self.lost.update(lost)
+                self.held.difference_update(lost)
+        self._renewed = time.monotonic()
+
+    def _loop(self, interval):
+        while not self._closed.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+            if time.monotonic() - self._renewed > self.ttl / 3.0:
+                try:
+                    self.renew()
+                except CoordinatorError as e:
+                    metrics.error("coordinator", f"Could not renew leases: {e}")
+
+    def close(self, release=True, timeout=None):
+        # Unfinished files go back to the queue; labels that cannot be sent are kept in a local journal.
+        # timeout: shorter limit per request, e.g. when the window is closing
+        if timeout is not None:
+            self.client.set_timeout(timeout)
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        if not self.flush():
+            unsent = self._pending[1] + self._entries
+            journal = LabelJournal(os.path.join("output", "sessions", f"unsent-{self.labeler}.jsonl"))
+            for entry in unsent:
+                journal.append(entry)
+            journal.close()
+            metrics.error("coordinator", f"{len(unsent)} unsent labels written to {journal.path}")
+        if release and self.held:
+            try:
+                self.client.release(self.held)
+            except CoordinatorError as e:
+                metrics.error("coordinator", f"Could not release leases: {e}")
+        self.client.close()
+
+
+def format_stats(stats):
+    files = stats["files"]
+    lines = [f"{files['done']} done, {files['leased']} leased, {files['open']} open"]
+    for name, row in stats["labelers"].items():
+        lines.append(f"  {name:<20} {row['done']:6d} files {row['labels']:7d} labels "
+                     f"{row['files_per_hour']:7.1f} files/h  holding {row['holding']}, "
+                     f"{row['expired']} expired, idle {format_seconds(row['idle'])}")
+    latency = stats.get("lease_latency")
+    if latency:
+        lines.append(f"lease latency: p50 {format_seconds(latency['p50'])}, p95 {format_seconds(latency['p95'])} "
+                     f"(n={latency['count']})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hand out audio files to several labelers.")
+    parser.add_argument("folder", nargs="?", help="folder to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--store", default=None, help="lease database (default: assets/coordinator/...)")
+    parser.add_argument("--stats", action="store_true", help="print per-labeler throughput of a running server")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="server to query with --stats")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        try:
+            print(format_stats(CoordinatorClient(args.address, labeler="stats").stats()))
+        except CoordinatorError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    if not args.folder:
+        parser.error("folder is required unless --stats is given")
+
+    store = open_store(args.folder, args.store)
+    server = CoordinatorServer(store, args.host, args.port)
+    print(f"Serving {args.folder} on {server.address}: {format_stats(store.stats())}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if store.journal is not None:
+            store.journal.close()
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
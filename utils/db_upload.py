@@ -1,18 +1,53 @@
 # db_upload.py
 
-import mysql.connector
-from config.db_config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
+import hashlib
+import json
+import os
+import sqlite3
+import threading
 
-def upload_to_mysql(data):
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        cursor = conn.cursor()
+from db_config import DB_CONFIG
+from utils.metrics import metrics
+
+CHUNK_SIZE = 1000
+POOL_SIZE = 4
+SYNC_DIR = os.path.join("output", "db_sync")
+COLUMNS = ("filename", "transcription", "labels", "start_time", "end_time")
+
+
+class MySQLAdapter:
+    placeholder = "%s"
+
+    def __init__(self, config=None, pool_size=POOL_SIZE):
+        self.config = dict(config or DB_CONFIG)
+        self.pool_size = pool_size
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def target(self):
+        c = self.config
+        return f"mysql://{c.get('user', '')}@{c.get('host', '')}:{c.get('port', 3306)}/{c.get('database', '')}"
 
+    @property
+    def errors(self):
+        try:
+            import mysql.connector
+        except ImportError:
+            return ()
+        return (mysql.connector.Error,)
+
+    def connect(self):
+        # Connections come from a shared pool; close() hands them back instead of disconnecting
+        from mysql.connector import pooling
+        with self._lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(pool_name="labeling", pool_size=self.pool_size,
+                                                         **self.config)
+        return self._pool.get_connection()
+
+    def ensure_schema(self, conn):
+        cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS labeled_data (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -20,26 +55,202 @@ def upload_to_mysql(data):
                 transcription TEXT,
                 labels VARCHAR(255),
                 start_time VARCHAR(50),
-                end_time VARCHAR(50)
+                end_time VARCHAR(50),
+                UNIQUE KEY uniq_segment (filename, start_time, end_time)
+            )
+        """)
+        # Tables created before the unique key existed get it added once
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'labeled_data' AND index_name = 'uniq_segment'
+        """)
+        if cursor.fetchone()[0] == 0:
+            # Older uploads may have stored the same segment twice; keep the first row of each
+            try:
+                cursor.execute("""
+                    DELETE d FROM labeled_data d
+                    JOIN labeled_data k ON d.filename = k.filename AND d.start_time = k.start_time
+                        AND d.end_time = k.end_time AND d.id > k.id
+                """)
+                removed = cursor.rowcount
+                cursor.execute("ALTER TABLE labeled_data ADD UNIQUE KEY uniq_segment (filename, start_time, end_time)")
+                conn.commit()
+                metrics.count("db_upload.duplicates_removed", max(removed, 0))
+            except self.errors as err:
+                conn.rollback()
+                metrics.error("db_upload", f"Could not add the unique key on labeled_data (filename, start_time, "
+                                           f"end_time); uploads will append instead of updating: {err}")
+        cursor.close()
+
+    def upsert_sql(self):
+        return f"""
+            INSERT INTO labeled_data ({", ".join(COLUMNS)})
+            VALUES ({", ".join([self.placeholder] * len(COLUMNS))})
+            ON DUPLICATE KEY UPDATE transcription = VALUES(transcription), labels = VALUES(labels)
+        """
+
+
+class SQLiteAdapter:
+    # Local stand-in with the same schema and upsert semantics, used for benchmarks and offline work
+    placeholder = "?"
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def target(self):
+        return "sqlite://" + os.path.abspath(self.path)
+
+    def connect(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        return _SharedConnection(self._conn)
+
+    def ensure_schema(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS labeled_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename VARCHAR(255),
+                transcription TEXT,
+                labels VARCHAR(255),
+                start_time VARCHAR(50),
+                end_time VARCHAR(50),
+                UNIQUE (filename, start_time, end_time)
             )
         """)
+        cursor.close()
+
+    def upsert_sql(self):
+        return f"""
+            INSERT INTO labeled_data ({", ".join(COLUMNS)})
+            VALUES ({", ".join([self.placeholder] * len(COLUMNS))})
+            ON CONFLICT (filename, start_time, end_time)
+            DO UPDATE SET transcription = excluded.transcription, labels = excluded.labels
+        """
+
+
+class _SharedConnection:
+    # Mirrors a pooled connection: close() keeps the underlying SQLite connection open
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        pass
+
+
+def sync_state_path(target, sync_dir=SYNC_DIR):
+    # One state file per database, so uploads to another server or schema start from scratch
+    return os.path.join(sync_dir, hashlib.sha1(target.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+class SyncState:
+    # Remembers a hash of every uploaded row so re-uploads only send new or edited rows
+    def __init__(self, path):
+        self.path = path
+        self.hashes = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.hashes = json.load(f)
+
+    @staticmethod
+    def row_key(row):
+        return f"{row['filename']}\x1f{row['start_time']}\x1f{row['end_time']}"
 
-        for entry in data:
-            cursor.execute("""
-                INSERT INTO labeled_data (filename, transcription, labels, start_time, end_time)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                entry["filename"],
-                entry["transcription"],
-                entry["labels"],
-                entry["start_time"],
-                entry["end_time"]
-            ))
-
-        conn.commit()
+    @staticmethod
+    def row_hash(row):
+        payload = "\x1f".join(str(row[c]) for c in COLUMNS)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def changed(self, rows):
+        return [row for row in rows if self.hashes.get(self.row_key(row)) != self.row_hash(row)]
+
+    def mark(self, rows):
+        for row in rows:
+            self.hashes[self.row_key(row)] = self.row_hash(row)
+        self._dirty = self._dirty or bool(rows)
+
+    def retain(self, rows):
+        # Forget rows that are no longer uploaded, so the file stays the size of the session
+        keys = {self.row_key(row) for row in rows}
+        if len(keys) != len(self.hashes):
+            self.hashes = {key: value for key, value in self.hashes.items() if key in keys}
+            self._dirty = True
+
+    def clear(self):
+        # Next upload sends every row again, e.g. after the table was truncated or restored
+        self._dirty = self._dirty or bool(self.hashes)
+        self.hashes = {}
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def upload_rows(rows, adapter, chunk_size=CHUNK_SIZE, state=None):
+    # Upserts rows in executemany batches of chunk_size, committing per batch; returns rows sent
+    rows = list(rows)
+    conn = adapter.connect()
+    try:
+        adapter.ensure_schema(conn)
+        cursor = conn.cursor()
+        if state is not None:
+            # A table holding fewer rows than were uploaded to it was truncated or restored meanwhile
+            cursor.execute("SELECT COUNT(*) FROM labeled_data")
+            if cursor.fetchone()[0] < len(state.hashes):
+                state.clear()
+            state.retain(rows)
+            rows = state.changed(rows)
+        sql = adapter.upsert_sql()
+        for i in range(0, len(rows), chunk_size):
+            batch = rows[i:i + chunk_size]
+            cursor.executemany(sql, [tuple(row[c] for c in COLUMNS) for row in batch])
+            conn.commit()
+            if state is not None:
+                state.mark(batch)
         cursor.close()
+    finally:
         conn.close()
-    except mysql.connector.Error as err:
-        print(f"MySQL Error: {err}")
+        if state is not None:
+            state.save()
+    return len(rows)
+
+
+_default_adapter = None
+
+
+def upload_to_mysql(data, chunk_size=CHUNK_SIZE, incremental=True):
+    # incremental=False sends every row and rebuilds the sync state from what was sent
+    global _default_adapter
+    if _default_adapter is None:
+        _default_adapter = MySQLAdapter()
+    state = SyncState(sync_state_path(_default_adapter.target))
+    if not incremental:
+        state.clear()
+    try:
+        return upload_rows(data, _default_adapter, chunk_size, state)
+    except _default_adapter.errors as err:
+        metrics.error("db_upload", f"MySQL Error: {err}")
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        metrics.error("db_upload", f"Unexpected error: {e}")
+    return None
@@ -0,0 +1,133 @@
+# exporter.py
+
+import csv
+import gzip
+import json
+import os
+import time
+
+from utils.label_store import format_time
+
+CHUNK_ROWS = 50000
+GZIP_LEVEL = 6
+EXPORT_STATE_PATH = os.path.join("output", ".export_state.json")
+COLUMNS = ["filename", "transcription", "labels", "start_time", "end_time"]
+
+
+class ExportReport:
+    def __init__(self, path, rows, elapsed):
+        self.path = path
+        self.rows = rows
+        self.elapsed = elapsed
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"Exported {self.rows} rows to {self.path} in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+
+def iter_column_chunks(store, start_row=0, end_row=None, chunk_rows=CHUNK_ROWS):
+    # Yields dicts of column lists, chunk_rows at a time, straight from the store's arrays
+    end_row = len(store) if end_row is None else end_row
+    label_text = {}
+    filenames = store.filenames
+    for begin in range(start_row, end_row, chunk_rows):
+        stop = min(end_row, begin + chunk_rows)
+        masks = store.masks[begin:stop]
+        for mask in set(masks):
+            if mask not in label_text:
+                label_text[mask] = ", ".join(store.labels_for_mask(mask))
+        yield {
+            "filename": [filenames[i] for i in store.file_ids[begin:stop]],
+            "transcription": store.transcriptions[begin:stop],
+            "labels": [label_text[m] for m in masks],
+            "start_time": [format_time(t) for t in store.starts[begin:stop]],
+            "end_time": [format_time(t) for t in store.ends[begin:stop]],
+        }
+
+
+def load_state(state_path=EXPORT_STATE_PATH):
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, state_path=EXPORT_STATE_PATH):
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _export_start(path, session, incremental, state, end_row):
+    # Row to resume from: only when the last export of this path came from the same session.
+    # Without a session (a team queue, or nothing opened yet) rows cannot be matched, so all go out;
+    # so do they when the store now holds fewer rows than were exported.
+    previous = state.get(os.path.abspath(path))
+    if (incremental and session is not None and previous and previous.get("session") == session
+            and previous["rows"] <= end_row and os.path.exists(path)):
+        return previous["rows"]
+    return 0
+
+
+def export_csv(store, path, end_row=None, incremental=False, session=None, progress=None,
+               chunk_rows=CHUNK_ROWS, state_path=EXPORT_STATE_PATH):
+    # Writes gzip when path ends in .gz; incremental exports append only rows added since the last run
+    started = time.perf_counter()
+    end_row = len(store) if end_row is None else end_row
+    state = load_state(state_path)
+    start_row = first_row = _export_start(path, session, incremental, state, end_row)
+    append = start_row > 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    mode = "at" if append else "wt"
+    if path.endswith(".gz"):
+        f = gzip.open(path, mode, compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    else:
+        f = open(path, mode, encoding="utf-8", newline="")
+    with f:
+        writer = csv.writer(f)
+        if not append:
+            writer.writerow(COLUMNS)
+        for chunk in iter_column_chunks(store, start_row, end_row, chunk_rows):
+            writer.writerows(zip(*(chunk[c] for c in COLUMNS)))
+            start_row += len(chunk["filename"])
+            if progress is not None:
+                progress(start_row, end_row)
+    written = end_row - first_row
+    state[os.path.abspath(path)] = {"session": session, "rows": end_row}
+    save_state(state, state_path)
+    return ExportReport(path, written, time.perf_counter() - started)
+
+
+def export_parquet(store, path, end_row=None, incremental=False, session=None, progress=None,
+                   chunk_rows=CHUNK_ROWS, state_path=EXPORT_STATE_PATH):
+    # Parquet files cannot be appended to, so incremental exports add a numbered part file next to path
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    end_row = len(store) if end_row is None else end_row
+    state = load_state(state_path)
+    start_row = _export_start(path, session, incremental, state, end_row)
+    if start_row and start_row >= end_row:
+        return ExportReport(path, 0, time.perf_counter() - started)
+    target = path
+    if start_row:
+        base, ext = os.path.splitext(path)
+        target = f"{base}.rows-{start_row}-{end_row}{ext}"
+    schema = pa.schema([(c, pa.string()) for c in COLUMNS])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    written = 0
+    with pq.ParquetWriter(target, schema, compression="zstd") as writer:
+        for chunk in iter_column_chunks(store, start_row, end_row, chunk_rows):
+            writer.write_table(pa.table(chunk, schema=schema))
+            written += len(chunk["filename"])
+            if progress is not None:
+                progress(start_row + written, end_row)
+    state[os.path.abspath(path)] = {"session": session, "rows": end_row}
+    save_state(state, state_path)
+    return ExportReport(target, written, time.perf_counter() - started)
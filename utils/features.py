@@ -0,0 +1,150 @@
+# features.py
+
+import os
+import struct
+
+import numpy as np
+
+from utils.audio_stream import audio_info, iter_blocks
+from utils.metrics import metrics
+from utils.peak_cache import CACHE_DIR, sidecar_path
+
+FRAME = 2048
+HOP = 1024
+FRAMES_PER_BATCH = 1024   # frames transformed at once; bounds memory on long files
+N_MELS = 40
+N_MFCC = 13
+FRAME_FEATURES = ["rms", "zcr", "flatness", "centroid"] + [f"mfcc{i}" for i in range(N_MFCC)]
+FEATURE_NAMES = [f"{name}_{stat}" for stat in ("mean", "std") for name in FRAME_FEATURES]
+FEATURES_VERSION = 1
+
+
+def _mel_basis(sample_rate):
+    import librosa
+    return librosa.filters.mel(sr=sample_rate, n_fft=FRAME, n_mels=N_MELS).astype(np.float32)
+
+
+def _dct_matrix():
+    n = np.arange(N_MELS)
+    k = np.arange(N_MFCC)[:, None]
+    basis = np.cos(np.pi / N_MELS * (n + 0.5) * k) * np.sqrt(2.0 / N_MELS)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+class FeatureAccumulator:
+    # Per-frame features computed in vectorised batches; only running sums are kept, so the
+    # result is a fixed-size summary (mean and std of each feature) for any file length
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._window = np.hanning(FRAME).astype(np.float32)
+        self._freqs = np.fft.rfftfreq(FRAME, 1.0 / sample_rate).astype(np.float32)
+        self._mel = _mel_basis(sample_rate)
+        self._dct = _dct_matrix()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._count = 0
+        self._sum = np.zeros(len(FRAME_FEATURES))
+        self._sum_sq = np.zeros(len(FRAME_FEATURES))
+
+    def feed(self, samples):
+        samples = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        usable = 0 if len(samples) < FRAME else (len(samples) - FRAME) // HOP + 1
+        for first in range(0, usable, FRAMES_PER_BATCH):
+            count = min(FRAMES_PER_BATCH, usable - first)
+            span = samples[first * HOP:(first + count - 1) * HOP + FRAME]
+            frames = np.lib.stride_tricks.sliding_window_view(span, FRAME)[::HOP]
+            self._add(self._frame_features(frames))
+        self._pending = samples[usable * HOP:].copy()
+
+    def finish(self):
+        if self._count == 0 and len(self._pending):
+            # Clips shorter than one frame still get a (zero-padded) summary
+            padded = np.zeros(FRAME, dtype=np.float32)
+            padded[:len(self._pending)] = self._pending
+            self._add(self._frame_features(padded[None, :]))
+        if self._count == 0:
+            return np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+        mean = self._sum / self._count
+        std = np.sqrt(np.maximum(self._sum_sq / self._count - mean ** 2, 0.0))
+        return np.concatenate([mean, std]).astype(np.float32)
+
+    def _add(self, values):
+        self._count += len(values)
+        self._sum += values.sum(axis=0)
+        self._sum_sq += np.square(values, dtype=np.float64).sum(axis=0)
+
+    def _frame_features(self, frames):
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        power = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1))).astype(np.float32) + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        centroid = (power @ self._freqs) / power.sum(axis=1) / (self.sample_rate / 2.0)
+        log_mel = np.log(power @ self._mel.T + 1e-10)
+        mfcc = log_mel @ self._dct.T
+        return np.column_stack([rms, zcr, flatness, centroid, mfcc])
+
+
+def features_from_samples(samples, sample_rate):
+    acc = FeatureAccumulator(sample_rate)
+    acc.feed(samples)
+    return acc.finish()
+
+
+def compute_features(audio_path):
+    acc = FeatureAccumulator(audio_info(audio_path).sample_rate)
+    for block in iter_blocks(audio_path):
+        acc.feed(block)
+    return acc.finish()
+
+
+# ------------------ Cache (next to the waveform peaks) ------------------
+
+HEADER = struct.Struct("<8sqqII")  # magic, mtime_ns, size, version, count
+MAGIC = b"ALTFEAT1"
+
+
+def features_path(audio_path, cache_dir=CACHE_DIR):
+    return os.path.splitext(sidecar_path(audio_path, cache_dir))[0] + ".features"
+
+
+def cached_features(audio_path, cache_dir=CACHE_DIR):
+    path = features_path(audio_path, cache_dir)
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(audio_path)
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, mtime_ns, size, version, count = HEADER.unpack(header)
+        if (magic, mtime_ns, size, version, count) != (MAGIC, stat.st_mtime_ns, stat.st_size,
+                                                       FEATURES_VERSION, len(FEATURE_NAMES)):
+            return None
+        return np.frombuffer(f.read(count * 4), dtype="<f4").copy()
+
+
+def store_features(audio_path, values, cache_dir=CACHE_DIR):
+    stat = os.stat(audio_path)
+    path = features_path(audio_path, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, stat.st_mtime_ns, stat.st_size, FEATURES_VERSION, len(values)))
+            f.write(np.asarray(values, dtype="<f4").tobytes())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        metrics.error("features", f"Could not write feature cache: {e}")
+
+
+def get_features(audio_path, samples=None, sample_rate=None, cache_dir=CACHE_DIR):
+    values = cached_features(audio_path, cache_dir)
+    if values is None:
+        with metrics.timer("features"):
+            if samples is not None:
+                values = features_from_samples(samples, sample_rate)
+            else:
+                values = compute_features(audio_path)
+        store_features(audio_path, values, cache_dir)
+    return values
@@ -0,0 +1,181 @@
+# file_index.py
+
+import hashlib
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.audio_stream import audio_info
+from utils.metrics import metrics
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+INDEX_DIR = os.path.join("assets", "index")
+HEADER_WORKERS = 8       # header reads are I/O bound; threads overlap the seeks
+COMMIT_EVERY = 5000      # rows per transaction while writing a fresh index
+
+FileRecord = namedtuple("FileRecord", "path size mtime_ns sample_rate channels duration")
+
+SORT_ORDERS = {
+    "Name": "name",
+    "Duration (shortest)": "duration",
+    "Duration (longest)": "-duration",
+    "Unlabeled first": "unlabeled",
+}
+STATUS_FILTERS = ("All", "Unlabeled", "Labeled")
+
+
+def index_path_for(folder, index_dir=INDEX_DIR):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, f"{os.path.basename(os.path.normpath(folder))}-{key}.sqlite3")
+
+
+def relative_name(path, folder):
+    # Label entries are keyed by the path below the indexed folder with "/" separators, so clip.wav
+    # in two subfolders stays two files; files directly in the folder keep their plain basename
+    prefix = os.path.join(folder, "")
+    if not path.startswith(prefix):
+        path, prefix = os.path.abspath(path), os.path.join(os.path.abspath(folder), "")
+    rel = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, prefix)
+    return rel if os.sep == "/" else rel.replace(os.sep, "/")
+
+
+def scan_tree(folder):
+    # Yields (path, size, mtime_ns) for every audio file below folder. scandir gives the entry
+    # type without a stat call, so only audio files are ever stat'ed.
+    stack = [folder]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                subdirs = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+                stack.extend(sorted(subdirs, reverse=True))
+        except OSError as e:
+            metrics.error("file_index", f"Could not scan {directory}: {e}")
+
+
+def read_header(path):
+    # Duration, rate and channels from the header only; None when the file cannot be parsed
+    try:
+        info = audio_info(path)
+        return info.sample_rate, info.channels, info.duration
+    except Exception:
+        return None, None, None
+
+
+class FileIndex:
+    # On-disk index of a folder tree. refresh() re-stats every file but only re-reads headers of
+    # files that are new or whose size/mtime changed, so reopening a large dataset is stat-bound.
+    def __init__(self, folder, path=None):
+        self.folder = os.path.abspath(folder)
+        self.path = path or index_path_for(folder)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sample_rate INTEGER,
+                channels INTEGER,
+                duration REAL
+            )
+        """)
+        self._conn.commit()
+
+    def _known(self):
+        rows = self._conn.execute("SELECT path, size, mtime_ns, sample_rate, channels, duration FROM files")
+        return {row[0]: row[1:] for row in rows}
+
+    def refresh(self, progress=None, cancelled=None):
+        # progress(done, total, message); returns FileRecords sorted by path
+        known = self._known()
+        seen = set()
+        records = []
+        stale = []
+        prefix = len(os.path.join(self.folder, ""))
+        for path, size, mtime_ns in scan_tree(self.folder):
+            rel = path[prefix:]
+            seen.add(rel)
+            row = known.get(rel)
+            if row is not None and row[0] == size and row[1] == mtime_ns:
+                records.append(FileRecord(path, size, mtime_ns, *row[2:]))
+            else:
+                stale.append((path, rel, size, mtime_ns))
+            if progress is not None and len(seen) % 10000 == 0:
+                progress(0, 0, f"scanned {len(seen)} files")
+            if cancelled is not None and cancelled():
+                return []
+
+        removed = [(rel,) for rel in known if rel not in seen]
+        if removed:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", removed)
+
+        pending = []
+        with ThreadPoolExecutor(max_workers=HEADER_WORKERS) as pool:
+            for i, ((path, rel, size, mtime_ns), header) in enumerate(
+                    zip(stale, pool.map(read_header, [s[0] for s in stale]))):
+                records.append(FileRecord(path, size, mtime_ns, *header))
+                pending.append((rel, size, mtime_ns) + header)
+                if len(pending) >= COMMIT_EVERY:
+                    self._write(pending)
+                    pending = []
+                    if cancelled is not None and cancelled():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return []
+                if progress is not None and (i + 1) % 1000 == 0:
+                    progress(i + 1, len(stale), f"read {i + 1}/{len(stale)} new headers")
+        self._write(pending)
+        self._conn.commit()
+        records.sort(key=lambda r: r.path)
+        return records
+
+    def _write(self, rows):
+        if rows:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def index_folder(folder, progress=None, cancelled=None):
+    index = FileIndex(folder)
+    try:
+        return index.refresh(progress, cancelled)
+    finally:
+        index.close()
+
+
+# ------------------ Queue ordering ------------------
+
+def filter_records(records, folder, status="All", labeled=(), min_duration=None, max_duration=None):
+    # labeled: container of relative_name()s with a saved entry (as LabelStore.labeled_files())
+    result = []
+    for record in records:
+        if status != "All" and (relative_name(record.path, folder) in labeled) != (status == "Labeled"):
+            continue
+        if min_duration is not None and (record.duration is None or record.duration < min_duration):
+            continue
+        if max_duration is not None and (record.duration is None or record.duration > max_duration):
+            continue
+        result.append(record)
+    return result
+
+
+def sort_records(records, folder, order="name", labeled=()):
+    if order == "duration":
+        return sorted(records, key=lambda r: (r.duration is None, r.duration or 0.0, r.path))
+    if order == "-duration":
+        return sorted(records, key=lambda r: (r.duration is None, -(r.duration or 0.0), r.path))
+    if order == "unlabeled":
+        return sorted(records, key=lambda r: (relative_name(r.path, folder) in labeled, r.path))
+    return sorted(records, key=lambda r: r.path)
@@ -0,0 +1,412 @@
+# fingerprint.py
+# Usage: python -m utils.fingerprint FOLDER [--workers N] [--propagate]
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from utils.audio_stream import audio_info, iter_blocks
+from utils.file_index import index_folder, relative_name
+from utils.label_store import format_time
+from utils.metrics import metrics
+
+FINGERPRINT_DIR = os.path.join("assets", "fingerprints")
+DUPLICATES_DIR = os.path.join("output", "duplicates")
+FINGERPRINT_VERSION = 1
+FRAME_SECONDS = 0.064    # FFT window; bins are 1 / FRAME_SECONDS = 15.6 Hz apart at every sample rate
+HOP_SECONDS = 0.032
+FRAMES_PER_BATCH = 512
+BAND_EDGES = (6, 12, 20, 32, 48, 72, 104, 148, 200, 256)   # FFT bins, ~94 Hz - 4 kHz
+PEAK_SPAN = 8            # frames either side a band peak must dominate (~0.25 s)
+FLOOR_DB = -70.0         # quieter peaks are background, not landmarks
+FAN_OUT = 3              # later peaks each anchor is paired with
+MAX_DT = 63              # frames between anchor and target (6-bit field of the hash)
+FILES_PER_TASK = 16      # files fingerprinted per worker task, to amortise process round trips
+MIN_MATCHES = 12         # time-aligned hash matches needed to call two files near-duplicates
+MIN_SIMILARITY = 0.08    # ...and as a share of the shorter file's hashes (trims shift peaks by part of a frame)
+STOP_FRACTION = 0.01     # hashes shared by more than 1% of files (silence, hum) are not used for matching
+MIN_STOP_POSTINGS = 64
+
+
+# ------------------ Fingerprints ------------------
+
+class FingerprintAccumulator:
+    # Spectral-peak hashes from streamed blocks. Frames are placed on a fixed grid in seconds and
+    # the window spans FRAME_SECONDS at the file's own rate, so the same audio at 8, 16 or 44.1 kHz
+    # gives the same bins without resampling. Only per-band maxima are kept while streaming.
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.window_length = int(round(sample_rate * FRAME_SECONDS))
+        if self.window_length < 2 * BAND_EDGES[-1]:
+            raise ValueError(f"sample rate {sample_rate} Hz is too low to fingerprint")
+        self.window = np.hanning(self.window_length).astype(np.float32)
+        self.scale = 4.0 / float(self.window.sum()) ** 2   # full-scale sine -> 0 dB
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0        # absolute sample index of _buffer[0]
+        self._frame = 0         # next frame to transform
+        self._values = []
+        self._bins = []
+
+    def _frame_start(self, frames):
+        return np.round(np.asarray(frames) * self.sample_rate * HOP_SECONDS).astype(np.int64)
+
+    def feed(self, samples):
+        self._buffer = np.concatenate([self._buffer, np.asarray(samples, dtype=np.float32)])
+        end = self._offset + len(self._buffer)
+        while True:
+            frames = np.arange(self._frame, self._frame + FRAMES_PER_BATCH)
+            starts = self._frame_start(frames)
+            complete = starts + self.window_length <= end
+            if not complete[0]:
+                break
+            self._transform(starts[complete])
+            self._frame += int(complete.sum())
+        keep = int(self._frame_start(self._frame)) - self._offset
+        if keep > 0:
+            self._buffer = self._buffer[keep:]
+            self._offset += keep
+
+    def _transform(self, starts):
+        index = (starts - self._offset)[:, None] + np.arange(self.window_length)
+        spectrum = np.fft.rfft(self._buffer[index] * self.window, axis=1)[:, :BAND_EDGES[-1]]
+        power = np.square(np.abs(spectrum)) * self.scale
+        bands = [power[:, lo:hi] for lo, hi in zip(BAND_EDGES[:-1], BAND_EDGES[1:])]
+        self._bins.append(np.stack([band.argmax(axis=1) + lo for band, lo in zip(bands, BAND_EDGES)], axis=1))
+        self._values.append(10.0 * np.log10(np.stack([band.max(axis=1) for band in bands], axis=1) + 1e-12))
+
+    def finish(self):
+        # Returns (hashes, times): uint32 landmark hashes and the anchor frame of each
+        if not self._values:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32)
+        values = np.concatenate(self._values).astype(np.float32)
+        bins = np.concatenate(self._bins)
+        # A landmark is a band maximum that dominates its neighbourhood in time; the strict comparison
+        # with the previous frame keeps one peak per run of equal values (steady tones)
+        padded = np.pad(values, ((PEAK_SPAN, PEAK_SPAN), (0, 0)), constant_values=-np.inf)
+        local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * PEAK_SPAN + 1, axis=0).max(axis=2)
+        previous = np.vstack([np.full((1, values.shape[1]), -np.inf, dtype=np.float32), values[:-1]])
+        frames, bands = np.nonzero((values >= local_max) & (values > previous) & (values > FLOOR_DB))
+        peak_bins = bins[frames, bands]
+        # np.nonzero is row-major, so peaks are already ordered by time
+        hashes = []
+        anchors = []
+        for k in range(1, FAN_OUT + 1):
+            dt = frames[k:] - frames[:-k]
+            valid = (dt >= 1) & (dt <= MAX_DT)
+            hashes.append((peak_bins[:-k][valid].astype(np.uint32) << 14) |
+                          (peak_bins[k:][valid].astype(np.uint32) << 6) | dt[valid].astype(np.uint32))
+            anchors.append(frames[:-k][valid].astype(np.uint32))
+        return np.concatenate(hashes), np.concatenate(anchors)
+
+
+def fingerprint_samples(samples, sample_rate):
+    acc = FingerprintAccumulator(sample_rate)
+    acc.feed(samples)
+    return acc.finish()
+
+
+def compute_fingerprint(audio_path):
+    acc = FingerprintAccumulator(audio_info(audio_path).sample_rate)
+    for block in iter_blocks(audio_path):
+        acc.feed(block)
+    return acc.finish()
+
+
+def _fingerprint_files(paths):
+    # Worker task; a file that cannot be decoded gets an empty fingerprint and an error message
+    results = []
+    for path in paths:
+        try:
+            hashes, times = compute_fingerprint(path)
+            results.append((path, hashes, times, None))
+        except Exception as e:
+            results.append((path, np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32), str(e)))
+    return results
+
+
+# ------------------ Folder index ------------------
+
+def index_path_for(folder, index_dir=FINGERPRINT_DIR):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, f"{os.path.basename(os.path.normpath(folder))}-{key}.npz")
+
+
+class FingerprintIndex:
+    # Fingerprints of every file in a folder plus an inverted index from hash to (file, frame).
+    # refresh() only fingerprints files that are new or changed since the stored index, lookups
+    # are a binary search over sorted hashes followed by a vote on the time offset.
+    def __init__(self, folder, path=None):
+        self.folder = os.path.abspath(folder)
+        self.path = path or index_path_for(folder)
+        self.paths = []
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.mtimes = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.hashes = np.zeros(0, dtype=np.uint32)
+        self.times = np.zeros(0, dtype=np.uint32)
+        self._file_ids = {}
+        self.clusters = []
+        self._cluster_of = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["version"]) != FINGERPRINT_VERSION:
+                    return
+                self._set(list(data["paths"]), data["sizes"], data["mtimes"], data["counts"],
+                          data["hashes"], data["times"])
+        except (OSError, KeyError, ValueError):
+            pass
+
+    def _set(self, paths, sizes, mtimes, counts, hashes, times):
+        self.paths = [str(p) for p in paths]
+        self._file_ids = {path: i for i, path in enumerate(self.paths)}
+        self.sizes, self.mtimes, self.counts = sizes, mtimes, counts
+        self.hashes, self.times = hashes, times
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+        # Inverted index: postings sorted by hash, one (file, frame) pair each
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        # Already sorted, so run starts give the distinct keys without np.unique sorting again
+        self.key_starts = np.flatnonzero(np.diff(sorted_hashes, prepend=np.uint32(0)) != 0)
+        if len(sorted_hashes) and sorted_hashes[0] == 0:
+            self.key_starts = np.concatenate([[0], self.key_starts])
+        self.keys = sorted_hashes[self.key_starts]
+        self.key_counts = np.diff(self.key_starts, append=len(sorted_hashes))
+        del sorted_hashes
+        self.post_files = np.repeat(np.arange(len(counts), dtype=np.uint32), counts)[order]
+        self.post_times = times[order]
+        self.max_postings = max(MIN_STOP_POSTINGS, int(STOP_FRACTION * len(counts)))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, version=FINGERPRINT_VERSION, paths=np.array(self.paths, dtype=str),
+                 sizes=self.sizes, mtimes=self.mtimes, counts=self.counts, hashes=self.hashes, times=self.times)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, records, workers=None, progress=None, cancelled=None):
+        # records: FileRecords from the file index. progress(done, total, message)
+        stale = []
+        for record in records:
+            i = self._file_ids.get(record.path)
+            if i is None or self.sizes[i] != record.size or self.mtimes[i] != record.mtime_ns:
+                stale.append(record.path)
+        fresh = {}
+        if stale:
+            workers = workers or os.cpu_count() or 1
+            tasks = [stale[i:i + FILES_PER_TASK] for i in range(0, len(stale), FILES_PER_TASK)]
+            # spawn: forking a process that runs a Tk main loop and worker threads is not safe
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = set()
+                queue = iter(tasks)
+                while True:
+                    # Bounded number of tasks in flight, so 100k files do not queue 100k futures
+                    while len(pending) < workers * 2:
+                        task = next(queue, None)
+                        if task is None:
+                            break
+                        pending.add(pool.submit(_fingerprint_files, task))
+                    if not pending:
+                        break
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        for path, hashes, times, error in future.result():
+                            if error is not None:
+                                metrics.error("fingerprint", f"Could not fingerprint {path}: {error}")
+                            fresh[path] = (hashes, times)
+                    if cancelled is not None and cancelled():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return None
+                    if progress is not None:
+                        progress(len(fresh), len(stale), f"fingerprinted {len(fresh)}/{len(stale)} files")
+
+        changed = bool(stale) or len(records) != len(self.paths)
+        paths, sizes, mtimes, parts = [], [], [], []
+        for record in records:
+            if record.path in fresh:
+                part = fresh[record.path]
+            else:
+                i = self._file_ids[record.path]
+                part = (self.hashes[self.starts[i]:self.ends[i]], self.times[self.starts[i]:self.ends[i]])
+            paths.append(record.path)
+            sizes.append(record.size)
+            mtimes.append(record.mtime_ns)
+            parts.append(part)
+        counts = np.array([len(h) for h, _ in parts], dtype=np.int64)
+        hashes = np.concatenate([h for h, _ in parts]) if parts else np.zeros(0, dtype=np.uint32)
+        times = np.concatenate([t for _, t in parts]) if parts else np.zeros(0, dtype=np.uint32)
+        self._set(paths, np.array(sizes, dtype=np.int64), np.array(mtimes, dtype=np.int64), counts,
+                  hashes.astype(np.uint32), times.astype(np.uint32))
+        if changed:
+            try:
+                self.save()
+            except OSError as e:
+                metrics.error("fingerprint", f"Could not write fingerprint index: {e}")
+        with metrics.timer("fingerprint clustering"):
+            self._cluster()
+        return self.clusters
+
+    # ---- lookups ----
+
+    def query(self, hashes, times, exclude=None):
+        # Returns [(file_id, matches, offset_frames)] for files sharing enough time-aligned hashes.
+        # offset_frames: query frame minus matching frame in that file
+        if not len(hashes) or not len(self.keys):
+            return []
+        pos = np.minimum(np.searchsorted(self.keys, hashes), len(self.keys) - 1)
+        valid = (self.keys[pos] == hashes) & (self.key_counts[pos] <= self.max_postings)
+        lengths = self.key_counts[pos[valid]]
+        total = int(lengths.sum())
+        if not total:
+            return []
+        # Every posting of every matched hash, without a Python loop over hashes
+        firsts = np.repeat(self.key_starts[pos[valid]] - np.cumsum(lengths) + lengths, lengths)
+        postings = firsts + np.arange(total)
+        files = self.post_files[postings].astype(np.int64)
+        offsets = np.repeat(times[valid].astype(np.int64), lengths) - self.post_times[postings].astype(np.int64)
+        if exclude is not None:
+            keep = files != exclude
+            files, offsets = files[keep], offsets[keep]
+        best = {}
+        # Offsets are voted in 2-frame bins at two phases, so a trim that moves peaks by one frame still aligns
+        for shift in (0, 1):
+            votes, counts = np.unique((files << 32) | ((offsets + shift) // 2 + (1 << 31)), return_counts=True)
+            strong = counts >= MIN_MATCHES
+            for vote, count in zip(votes[strong], counts[strong]):
+                file_id = int(vote >> 32)
+                if count > best.get(file_id, (0, 0))[0]:
+                    best[file_id] = (int(count), int((vote & 0xFFFFFFFF) - (1 << 31)) * 2 - shift)
+        return [(file_id, count, offset) for file_id, (count, offset) in best.items()]
+
+    def matches(self, path):
+        # Near-duplicates of an indexed file: [(path, similarity, offset_seconds)], best first.
+        # offset_seconds: time in this file minus the same moment in the other one
+        i = self._file_ids.get(path)
+        if i is None:
+            return []
+        hashes = self.hashes[self.starts[i]:self.ends[i]]
+        times = self.times[self.starts[i]:self.ends[i]]
+        found = []
+        for file_id, count, offset in self.query(hashes, times, exclude=i):
+            similarity = count / float(max(1, min(len(hashes), self.counts[file_id])))
+            if similarity >= MIN_SIMILARITY:
+                found.append((self.paths[file_id], similarity, offset * HOP_SECONDS))
+        return sorted(found, key=lambda match: -match[1])
+
+    def _cluster(self):
+        # Union-find over near-duplicate pairs; only groups of two or more are kept
+        parent = list(range(len(self.paths)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        for path in self.paths:
+            for other, _, _ in self.matches(path):
+                a, b = root(self._file_ids[path]), root(self._file_ids[other])
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+        groups = {}
+        for i in range(len(self.paths)):
+            groups.setdefault(root(i), []).append(self.paths[i])
+        self.clusters = [group for group in groups.values() if len(group) > 1]
+        self._cluster_of = {path: group for group in self.clusters for path in group}
+
+    def duplicates(self, path):
+        # Other members of the file's cluster with their offset, None when not matched directly
+        direct = {other: offset for other, _, offset in self.matches(path)}
+        return [(other, direct.get(other)) for other in self._cluster_of.get(path, ()) if other != path]
+
+
+# ------------------ Label propagation ------------------
+
+def _shift(text, offset):
+    if not str(text).strip() or offset is None:
+        return text
+    return format_time(max(0.0, float(text) - offset))
+
+
+def propagate_entry(entry, duplicates, folder):
+    # One entry per duplicate, with the time range moved by the alignment offset. A range that
+    # cannot be aligned (the duplicate was only matched through another copy) is left as it is.
+    entries = []
+    for path, offset in duplicates:
+        copy = dict(entry, filename=relative_name(path, folder))
+        copy["start_time"] = _shift(entry.get("start_time", ""), offset)
+        copy["end_time"] = _shift(entry.get("end_time", ""), offset)
+        entries.append(copy)
+    return entries
+
+
+def index_duplicates(folder, workers=None, progress=None, cancelled=None):
+    records = index_folder(folder, cancelled=cancelled)
+    index = FingerprintIndex(folder)
+    if index.refresh(records, workers, progress, cancelled) is None:
+        return None
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find near-duplicate audio files and share their labels.")
+    parser.add_argument("folder")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--propagate", action="store_true",
+                        help="copy labels saved for one copy to the unlabeled members of its group")
+    args = parser.parse_args(argv)
+
+    def show(done, total, message):
+        if done % 1000 == 0 or done == total:
+            print(f"[{done}/{total}] {message}", flush=True)
+
+    started = time.perf_counter()
+    index = index_duplicates(args.folder, args.workers, show)
+    elapsed = time.perf_counter() - started
+    members = sum(len(group) for group in index.clusters)
+    print(f"{len(index.paths)} files, {len(index.clusters)} near-duplicate groups ({members} files) "
+          f"in {elapsed:.1f}s")
+
+    os.makedirs(DUPLICATES_DIR, exist_ok=True)
+    report = os.path.join(DUPLICATES_DIR, os.path.basename(index.path)[:-len(".npz")] + ".json")
+    with open(report, "w", encoding="utf-8") as f:
+        json.dump({"folder": index.folder, "groups": index.clusters}, f, indent=2)
+    print(f"Groups written to {report}")
+
+    if args.propagate:
+        from utils.label_journal import LabelJournal, journal_path_for, replay
+        journal_path = journal_path_for(args.folder)
+        saved = replay(journal_path)
+        labeled = {entry["filename"] for entry in saved}
+        by_name = {}
+        for entry in saved:
+            by_name.setdefault(entry["filename"], []).append(entry)
+        journal = LabelJournal(journal_path)
+        added = 0
+        for path in index.paths:
+            name = relative_name(path, index.folder)
+            if name not in by_name:
+                continue
+            targets = [(other, offset) for other, offset in index.duplicates(path)
+                       if relative_name(other, index.folder) not in labeled]
+            for entry in by_name[name]:
+                for copy in propagate_entry(entry, targets, index.folder):
+                    journal.append(copy)
+                    added += 1
+            labeled.update(relative_name(other, index.folder) for other, _ in targets)
+        journal.close()
+        print(f"Propagated {added} entries to {journal_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# jobs.py
+
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.metrics import metrics
+
+MAX_WORKERS = 4
+POLL_MS = 16  # one frame at 60 fps
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, runner, name, key=None):
+        self.runner = runner
+        self.name = name
+        self.key = key
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # A job cancelled while still queued never runs, so nothing else would retire it
+        if self.future is not None and self.future.cancel():
+            self.runner._post(self, "cancelled", None)
+
+    def check(self):
+        # Long-running job bodies call this between steps to stop early
+        if self.cancelled:
+            raise JobCancelled(self.name)
+
+    def progress(self, fraction, message=None):
+        self.runner._post(self, "progress", (fraction, message))
+
+
+class JobRunner:
+    def __init__(self, root, max_workers=MAX_WORKERS, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._processes = None
+        self._max_workers = max_workers
+        self._events = queue.Queue()
+        self._callbacks = {}
+        self._active = {}
+        self._by_key = {}
+        self._closed = False
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, name, fn, *args, key=None, on_done=None, on_error=None, on_progress=None,
+               in_process=False):
+        # Thread jobs receive the Job as their first argument so they can report progress
+        # and check for cancellation; process jobs receive only *args (fn must be picklable).
+        # Submitting with a key cancels any earlier job that shares it.
+        if self._closed:
+            return None
+        if key is not None:
+            self.cancel(key)
+        job = Job(self, name, key)
+        self._callbacks[job] = (on_done, on_error, on_progress)
+        self._active[job] = name
+        if key is not None:
+            self._by_key[key] = job
+
+        if in_process:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self._max_workers)
+            job.future = self._processes.submit(fn, *args)
+            job.future.add_done_callback(lambda f: self._finish_future(job, f))
+        else:
+            job.future = self._threads.submit(self._run, job, fn, args)
+        return job
+
+    def cancel(self, key):
+        job = self._by_key.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def active_jobs(self):
+        return list(self._active.values())
+
+    def shutdown(self):
+        self._closed = True
+        for job in list(self._active):
+            job.cancel()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, fn, args):
+        if job.cancelled:
+            self._post(job, "cancelled", None)
+            return
+        try:
+            result = fn(job, *args)
+        except JobCancelled:
+            self._post(job, "cancelled", None)
+        except Exception as e:
+            self._post(job, "error", (e, traceback.format_exc()))
+        else:
+            self._post(job, "done", result)
+
+    def _finish_future(self, job, future):
+        if future.cancelled():
+            self._post(job, "cancelled", None)
+            return
+        error = future.exception()
+        if error is not None:
+            self._post(job, "error", (error, ""))
+        else:
+            self._post(job, "done", future.result())
+
+    def _post(self, job, kind, payload):
+        self._events.put((job, kind, payload))
+
+    def _poll(self):
+        # Runs on the Tk thread: every callback is delivered here, never from a worker
+        try:
+            while True:
+                job, kind, payload = self._events.get_nowait()
+                self._dispatch(job, kind, payload)
+        except queue.Empty:
+            pass
+        if not self._closed:
+            self.root.after(self.poll_ms, self._poll)
+
+    def _dispatch(self, job, kind, payload):
+        on_done, on_error, on_progress = self._callbacks.get(job, (None, None, None))
+        if kind == "progress":
+            if on_progress is not None and not job.cancelled:
+                on_progress(*payload)
+            return
+
+        self._callbacks.pop(job, None)
+        self._active.pop(job, None)
+        if job.key is not None and self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+        if job.cancelled or kind == "cancelled":
+            return
+        if kind == "done" and on_done is not None:
+            on_done(payload)
+        elif kind == "error":
+            error, trace = payload
+            if on_error is not None:
+                on_error(error)
+            else:
+                metrics.error("jobs", f"Job '{job.name}' failed: {error}\n{trace}")
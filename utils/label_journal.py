@@ -0,0 +1,109 @@
+# label_journal.py
+
+import hashlib
+import json
+import os
+import threading
+
+from utils.file_index import relative_name
+
+SESSION_DIR = os.path.join("output", "sessions")
+FSYNC_EVERY = 64         # records
+FSYNC_INTERVAL = 1.0     # seconds
+
+
+def journal_path_for(folder, session_dir=SESSION_DIR):
+    key = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(session_dir, f"{os.path.basename(os.path.normpath(folder))}-{key}.jsonl")
+
+
+def replay(path):
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # last write was cut short by a crash
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+class LabelJournal:
+    # Append-only JSONL log of saved labels. Each append is flushed to the OS straight away
+    # (survives an app crash); fsync is batched by count and by a background timer.
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._truncate_partial_line()
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, args=(fsync_interval,),
+                                        name="journal-fsync", daemon=True)
+        self._syncer.start()
+
+    def append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._sync_locked()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+
+    def _sync_locked(self):
+        if self._unsynced and not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def _sync_loop(self, interval):
+        while not self._closed.wait(interval):
+            self.sync()
+
+    def _truncate_partial_line(self):
+        # Drop a half-written trailing record so the next append starts on a clean line
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data_end = f.seek(0, os.SEEK_END)
+            if data_end == 0:
+                return
+            f.seek(data_end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = data_end
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    f.truncate(pos - step + newline + 1)
+                    return
+                pos -= step
+            f.truncate(0)
+
+
+def first_unlabeled(audio_files, folder, labeled):
+    # labeled: container of relative_name()s that already have a saved entry
+    for index, path in enumerate(audio_files):
+        if relative_name(path, folder) not in labeled:
+            return index
+    return len(audio_files)
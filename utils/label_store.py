@@ -0,0 +1,195 @@
+# label_store.py
+
+import math
+import sys
+from array import array
+
+import numpy as np
+
+MAX_LABELS = 64
+
+
+def parse_time(text):
+    text = str(text).strip()
+    if not text:
+        return math.nan
+    return float(text)
+
+
+def format_time(value):
+    # Shortest text that parses back to the same float; whole seconds keep the plain "12" form
+    if math.isnan(value):
+        return ""
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+class LabelStore:
+    # Column-oriented label entries: one typed array per field instead of one dict per entry.
+    # Filenames are interned to integer ids, labels are a bitmask over label_names, and
+    # rows are indexed by file and by label.
+    def __init__(self, label_names):
+        self.label_names = []
+        self._bits = {}
+        for name in label_names:
+            self._add_label(name)
+        self._filenames = []
+        self._file_ids = {}
+        self.file_ids = array("I")
+        self.masks = array("Q")
+        self.starts = array("d")
+        self.ends = array("d")
+        self.transcriptions = []
+        # Per-file index as linked lists threaded through the rows: 4 bytes per row, 8 per file
+        self._file_head = array("i")
+        self._file_tail = array("i")
+        self._next_in_file = array("i")
+        self._by_label = [array("I") for _ in self.label_names]
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.entry(row)
+
+    # ---- writing ----
+
+    def add(self, filename, transcription, labels, start_time, end_time):
+        file_id = self._intern(filename)
+        mask = self.mask_for(labels, create=True)
+        row = len(self.file_ids)
+        self.file_ids.append(file_id)
+        self.masks.append(mask)
+        self.starts.append(start_time)
+        self.ends.append(end_time)
+        self.transcriptions.append(transcription)
+        self._next_in_file.append(-1)
+        if self._file_head[file_id] == -1:
+            self._file_head[file_id] = row
+        else:
+            self._next_in_file[self._file_tail[file_id]] = row
+        self._file_tail[file_id] = row
+        bit = 0
+        while mask >> bit:
+            if mask >> bit & 1:
+                self._by_label[bit].append(row)
+            bit += 1
+        return row
+
+    def append(self, entry):
+        # Accepts the dict shape save_label has always produced
+        labels = [label.strip() for label in entry.get("labels", "").split(",") if label.strip()]
+        return self.add(entry["filename"], entry.get("transcription", ""), labels,
+                        parse_time(entry.get("start_time", "")), parse_time(entry.get("end_time", "")))
+
+    # ---- reading ----
+
+    @property
+    def filenames(self):
+        # Interned names, indexed by the values in file_ids
+        return self._filenames
+
+    def entry(self, row):
+        return {
+            "filename": self._filenames[self.file_ids[row]],
+            "transcription": self.transcriptions[row],
+            "labels": ", ".join(self.labels_for_mask(self.masks[row])),
+            "start_time": format_time(self.starts[row]),
+            "end_time": format_time(self.ends[row]),
+        }
+
+    def mask_for(self, labels, create=False):
+        mask = 0
+        for label in labels:
+            if label not in self._bits:
+                if not create:
+                    raise KeyError(label)
+                self._add_label(label)
+            mask |= self._bits[label]
+        return mask
+
+    def labels_for_mask(self, mask):
+        return [name for bit, name in enumerate(self.label_names) if mask >> bit & 1]
+
+    def has_file(self, filename):
+        # Filenames are only interned when a row is added, so interned means saved
+        return filename in self._file_ids
+
+    def labeled_files(self):
+        return set(self._file_ids)
+
+    def rows_for_file(self, filename):
+        rows = []
+        file_id = self._file_ids.get(filename)
+        row = self._file_head[file_id] if file_id is not None else -1
+        while row != -1:
+            rows.append(row)
+            row = self._next_in_file[row]
+        return np.array(rows, dtype=np.int64)
+
+    def rows_with_label(self, label):
+        return np.array(self._by_label[self.label_names.index(label)], dtype=np.int64)
+
+    def rows_with_labels(self, labels, match_all=True):
+        # e.g. rows_with_labels(["Angry", "Telugu"]) for segments carrying both labels
+        want = np.uint64(self.mask_for(labels))
+        masks = self._view(self.masks, np.uint64)
+        hits = (masks & want) == want if match_all else (masks & want) != 0
+        rows = np.flatnonzero(hits)
+        del masks
+        return rows
+
+    def unlabeled_rows(self):
+        masks = self._view(self.masks, np.uint64)
+        rows = np.flatnonzero(masks == 0)
+        del masks
+        return rows
+
+    def files_without_labels(self, filenames=None):
+        # Files with no saved entry at all; or, without a file list, stored files none of whose
+        # entries carry a label
+        if filenames is not None:
+            return [name for name in filenames if not self.has_file(name)]
+        file_ids = self._view(self.file_ids, np.uint32)
+        labeled = np.bincount(file_ids, weights=self._view(self.masks, np.uint64) != 0,
+                              minlength=len(self._filenames))
+        del file_ids
+        return [self._filenames[file_id] for file_id in np.flatnonzero(labeled == 0)]
+
+    def label_counts(self):
+        return {name: len(rows) for name, rows in zip(self.label_names, self._by_label)}
+
+    def memory_bytes(self):
+        columns = [self.file_ids, self.masks, self.starts, self.ends,
+                   self._file_head, self._file_tail, self._next_in_file] + self._by_label
+        size = sum(col.buffer_info()[1] * col.itemsize for col in columns)
+        unique_texts = {id(t): t for t in self.transcriptions}
+        size += sys.getsizeof(self.transcriptions) + sum(sys.getsizeof(t) for t in unique_texts.values())
+        size += sys.getsizeof(self._filenames) + sum(sys.getsizeof(f) for f in self._filenames)
+        return size
+
+    # ---- internals ----
+
+    @staticmethod
+    def _view(column, dtype):
+        # Short-lived views only: an array cannot grow while a NumPy view of it is alive
+        return np.frombuffer(column, dtype=dtype) if len(column) else np.zeros(0, dtype=dtype)
+
+    def _intern(self, filename):
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            file_id = len(self._filenames)
+            self._filenames.append(filename)
+            self._file_ids[filename] = file_id
+            self._file_head.append(-1)
+            self._file_tail.append(-1)
+        return file_id
+
+    def _add_label(self, name):
+        if len(self.label_names) >= MAX_LABELS:
+            raise ValueError(f"At most {MAX_LABELS} distinct labels are supported")
+        self._bits[name] = 1 << len(self.label_names)
+        self.label_names.append(name)
+        if hasattr(self, "_by_label"):
+            self._by_label.append(array("I"))
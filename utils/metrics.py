@@ -0,0 +1,189 @@
+# metrics.py
+
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_DIR = os.path.join("output", "metrics")
+BUCKETS_PER_DOUBLING = 8     # percentiles are accurate to ~9%
+MIN_SECONDS = 1e-5
+MAX_TRACE_EVENTS = 200000    # oldest events are dropped first; histograms keep everything
+MAX_ERRORS = 100
+THROUGHPUT_WINDOW = 3600.0   # files/hour is measured over the last hour of labeling
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1.0:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.1f} s"
+
+
+class Histogram:
+    # Log-scale buckets: constant memory per metric no matter how many samples are added
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = int(math.log2(max(seconds, MIN_SECONDS) / MIN_SECONDS) * BUCKETS_PER_DOUBLING)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bucket in sorted(self.buckets):
+            running += self.buckets[bucket]
+            if running >= target:
+                # Geometric centre of the bucket, never above the largest sample seen
+                return min(self.max, MIN_SECONDS * 2 ** ((bucket + 0.5) / BUCKETS_PER_DOUBLING))
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    # Thread-safe timings, counters and errors for one session. Every timing is also kept as a
+    # trace event so the session can be opened in chrome://tracing or Perfetto.
+    def __init__(self):
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._started_monotonic = time.monotonic()
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.errors = deque(maxlen=MAX_ERRORS)
+        self._events = deque(maxlen=MAX_TRACE_EVENTS)
+        self._files_done = deque()
+        self.files_done = 0
+
+    def record(self, name, seconds, start=None, **args):
+        # start: perf_counter() value when the action began (defaults to now - seconds)
+        start = time.perf_counter() - seconds if start is None else start
+        event = {"name": name, "ph": "X", "ts": (start - self._origin) * 1e6, "dur": seconds * 1e6,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            self._events.append(event)
+
+    @contextmanager
+    def timer(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, start, **args)
+
+    def timed(self, name):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, name, message):
+        # Replaces bare prints: the error is counted, kept for the session dump and still shown
+        now = time.perf_counter()
+        with self._lock:
+            self.counters[name + ".errors"] = self.counters.get(name + ".errors", 0) + 1
+            self.errors.append({"name": name, "message": str(message), "time": time.time()})
+            self._events.append({"name": f"{name} error", "ph": "i", "s": "p", "ts": (now - self._origin) * 1e6,
+                                 "pid": os.getpid(), "tid": threading.get_ident(),
+                                 "args": {"message": str(message)}})
+        print(message, file=sys.stderr)
+
+    def file_done(self):
+        now = time.monotonic()
+        with self._lock:
+            self.files_done += 1
+            self._files_done.append(now)
+            while self._files_done and now - self._files_done[0] > THROUGHPUT_WINDOW:
+                self._files_done.popleft()
+
+    def files_per_hour(self):
+        with self._lock:
+            if not self._files_done:
+                return 0.0
+            now = time.monotonic()
+            recent = [t for t in self._files_done if now - t <= THROUGHPUT_WINDOW]
+            # Early in a session the window is the time since labeling started, not a full hour
+            span = min(THROUGHPUT_WINDOW, max(now - self._started_monotonic, 60.0))
+            return len(recent) * 3600.0 / span
+
+    def summary(self, name):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            return histogram.summary() if histogram is not None else None
+
+    def status_text(self, name):
+        summary = self.summary(name)
+        text = ""
+        if summary is not None:
+            text = (f"{name}: p50 {format_seconds(summary['p50'])}, p95 {format_seconds(summary['p95'])} "
+                    f"(n={summary['count']})   ")
+        return text + f"{self.files_per_hour():.0f} files/h"
+
+    def snapshot(self):
+        files_per_hour = self.files_per_hour()
+        with self._lock:
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "elapsed": time.perf_counter() - self._origin,
+                "timings": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "counters": dict(self.counters),
+                "files_done": self.files_done,
+                "files_per_hour": files_per_hour,
+                "errors": list(self.errors),
+            }
+
+    def dump(self, directory=METRICS_DIR):
+        # Writes session-<time>.json (summary) and session-<time>.trace.json (Chrome trace format)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        base = os.path.join(directory, f"session-{stamp}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            with self._lock:
+                events = list(self._events)
+            with open(base + ".trace.json", "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+            return base + ".json", base + ".trace.json"
+        except OSError as e:
+            print(f"Could not write metrics: {e}", file=sys.stderr)
+            return None
+
+
+metrics = Metrics()
@@ -1,26 +1,187 @@
 # pdf_generator.py
 
 from fpdf import FPDF
+import math
 import os
+import time
 
-def generate_pdf(data, filename="output/report.pdf"):
+import numpy as np
+
+from utils.exporter import iter_column_chunks
+from utils.label_store import LabelStore
+from utils.metrics import metrics
+
+MAX_ROWS_PER_FILE = 20000
+SUMMARY_FILES = 200      # files listed in the coverage table
+ROW_HEIGHT = 5
+TABLE_FONT_SIZE = 7
+TABLE_COLUMNS = [        # (title, key, width in mm)
+    ("#", "index", 14),
+    ("File", "filename", 45),
+    ("Start", "start_time", 14),
+    ("End", "end_time", 14),
+    ("Labels", "labels", 40),
+    ("Transcription", "transcription", 63),
+]
+
+
+def _latin1(text):
+    # The built-in PDF fonts only cover Latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def _as_store(data):
+    if isinstance(data, LabelStore):
+        return data
+    store = LabelStore([])
+    for entry in data:
+        store.append(entry)
+    return store
+
+
+def _column(values, dtype, end_row):
+    # Copies the slice first: a NumPy view would stop the UI thread from appending to the array
+    return np.frombuffer(values[:end_row], dtype=dtype) if end_row else np.zeros(0, dtype=dtype)
+
+
+def summarize(store, durations=None, end_row=None):
+    # durations: optional {filename: seconds} used for per-file coverage percentages
+    end_row = len(store) if end_row is None else end_row
+    file_ids = _column(store.file_ids, np.uint32, end_row)
+    masks = _column(store.masks, np.uint64, end_row)
+    spans = _column(store.ends, np.float64, end_row) - _column(store.starts, np.float64, end_row)
+    valid = np.isfinite(spans) & (spans > 0)
+    seconds = np.where(valid, spans, 0.0)
+    per_file_seconds = np.bincount(file_ids, weights=seconds, minlength=len(store.filenames))
+    per_file_rows = np.bincount(file_ids, minlength=len(store.filenames))
+    label_counts = {name: int(((masks >> np.uint64(bit)) & np.uint64(1)).sum())
+                    for bit, name in enumerate(list(store.label_names))}
+
+    order = np.argsort(-per_file_rows, kind="stable")[:SUMMARY_FILES]
+    coverage = []
+    for file_id in order:
+        name = store.filenames[file_id]
+        duration = (durations or {}).get(name)
+        percent = 100.0 * per_file_seconds[file_id] / duration if duration else None
+        coverage.append((name, int(per_file_rows[file_id]), float(per_file_seconds[file_id]), percent))
+
+    return {
+        "entries": end_row,
+        "files": int(np.count_nonzero(per_file_rows)),
+        "labeled_seconds": float(seconds.sum()),
+        "timed_entries": int(valid.sum()),
+        "unlabeled_entries": int(np.count_nonzero(masks == 0)),
+        "label_counts": label_counts,
+        "coverage": coverage,
+    }
+
+
+class ReportPDF(FPDF):
+    def __init__(self, title):
+        super().__init__()
+        self.title_text = title
+        self.in_table = False
+        self.set_auto_page_break(True, margin=12)
+
+    def header(self):
+        self.set_font("Arial", "B", 10)
+        self.cell(0, 8, _latin1(self.title_text), 0, 1, 'C')
+        if self.in_table:
+            self.table_header()
+
+    def footer(self):
+        self.set_y(-10)
+        self.set_font("Arial", size=7)
+        self.cell(0, 5, f"Page {self.page_no()}", 0, 0, 'C')
+
+    def table_header(self):
+        self.set_font("Arial", "B", TABLE_FONT_SIZE)
+        self.set_fill_color(223, 230, 233)
+        for title, _, width in TABLE_COLUMNS:
+            self.cell(width, ROW_HEIGHT + 1, title, 1, 0, 'L', True)
+        self.ln()
+        self.set_font("Arial", size=TABLE_FONT_SIZE)
+
+
+def _write_summary(pdf, summary, part, parts):
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 8, "Summary", 0, 1)
+    pdf.set_font("Arial", size=9)
+    lines = [
+        f"Generated: {time.strftime('%Y-%m-%d %H:%M')}",
+        f"Entries: {summary['entries']}   Files: {summary['files']}   "
+        f"Unlabeled entries: {summary['unlabeled_entries']}",
+        f"Total labeled duration: {summary['labeled_seconds']:.1f} s "
+        f"({summary['timed_entries']} entries with start/end times)",
+    ]
+    if parts > 1:
+        lines.append(f"Part {part} of {parts}")
+    for line in lines:
+        pdf.cell(0, 5, line, 0, 1)
+
+    pdf.ln(3)
+    pdf.set_font("Arial", "B", 9)
+    pdf.cell(0, 6, "Label counts", 0, 1)
+    pdf.set_font("Arial", size=8)
+    for label, count in summary["label_counts"].items():
+        pdf.cell(40, 5, _latin1(label), 1)
+        pdf.cell(25, 5, str(count), 1, 1, 'R')
+
+    pdf.ln(3)
+    pdf.set_font("Arial", "B", 9)
+    pdf.cell(0, 6, f"Per-file coverage (top {min(SUMMARY_FILES, summary['files'])} files by entries)", 0, 1)
+    pdf.set_font("Arial", size=8)
+    for name, rows, seconds, percent in summary["coverage"]:
+        pdf.cell(90, 5, _latin1(name)[:60], 1)
+        pdf.cell(20, 5, str(rows), 1, 0, 'R')
+        pdf.cell(25, 5, f"{seconds:.1f} s", 1, 0, 'R')
+        pdf.cell(20, 5, "-" if percent is None else f"{percent:.0f}%", 1, 1, 'R')
+
+
+def _write_table(pdf, store, start_row, end_row):
+    pdf.add_page()
+    pdf.in_table = True
+    pdf.table_header()
+    # Truncate per column by an average glyph width instead of measuring every string
+    char_width = pdf.get_string_width("abcdefghijklmnopqrstuvwxyz0123456789") / 36.0
+    limits = {key: max(4, int((width - 2) / char_width)) for _, key, width in TABLE_COLUMNS}
+    index = start_row
+    for chunk in iter_column_chunks(store, start_row, end_row):
+        for row in zip(*(chunk[key] for _, key, _ in TABLE_COLUMNS[1:])):
+            index += 1
+            pdf.cell(TABLE_COLUMNS[0][2], ROW_HEIGHT, str(index), 1)
+            for (_, key, width), value in zip(TABLE_COLUMNS[1:], row):
+                value = _latin1(value)
+                if len(value) > limits[key]:
+                    value = value[:limits[key] - 3] + "..."
+                pdf.cell(width, ROW_HEIGHT, value, 1)
+            pdf.ln()
+    pdf.in_table = False
+
+
+def generate_pdf(data, filename="output/report.pdf", max_rows_per_file=MAX_ROWS_PER_FILE, durations=None,
+                 end_row=None):
+    # data is a LabelStore or a list of entry dicts. Returns the written paths; large sessions
+    # are split into report.pdf, report-2.pdf, ...
     try:
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt="Audio Labeling Report", ln=True, align='C')
-        pdf.ln(10)
-
-        for i, entry in enumerate(data, 1):
-            pdf.multi_cell(0, 10, txt=f"{i}. File: {entry['filename']}\n"
-                                         f"   Transcription: {entry['transcription']}\n"
-                                         f"   Labels: {entry['labels']}\n"
-                                         f"   Start Time: {entry['start_time']} sec\n"
-                                         f"   End Time: {entry['end_time']} sec\n",
-                           border=0)
-            pdf.ln(2)
-
-        pdf.output(filename)
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        store = _as_store(data)
+        end_row = len(store) if end_row is None else end_row
+        summary = summarize(store, durations, end_row)
+        parts = max(1, math.ceil(end_row / float(max_rows_per_file)))
+        base, ext = os.path.splitext(filename)
+        written = []
+        for part in range(1, parts + 1):
+            path = filename if part == 1 else f"{base}-{part}{ext}"
+            pdf = ReportPDF("Audio Labeling Report")
+            _write_summary(pdf, summary, part, parts)
+            start = (part - 1) * max_rows_per_file
+            if end_row:
+                _write_table(pdf, store, start, min(end_row, start + max_rows_per_file))
+            pdf.output(path)
+            written.append(path)
+        return written
     except Exception as e:
-        print(f"Error generating PDF: {e}")
+        metrics.error("pdf", f"Error generating PDF: {e}")
+        return []
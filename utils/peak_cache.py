@@ -0,0 +1,202 @@
+# peak_cache.py
+
+import hashlib
+import os
+import struct
+
+import numpy as np
+
+from utils.audio_stream import audio_info, iter_blocks
+from utils.metrics import metrics
+
+CACHE_DIR = os.path.join("assets", "peaks")
+BASE_BLOCK = 256      # samples per min/max pair at the finest level
+LEVEL_FACTOR = 4      # each coarser level merges this many blocks
+MIN_LEVEL_PEAKS = 1024
+
+MAGIC = b"ALTPEAK1"
+HEADER = struct.Struct("<8sqqIQI")   # magic, mtime_ns, size, sample_rate, num_samples, num_levels
+LEVEL_HEADER = struct.Struct("<IQ")  # block_size, num_peaks
+
+
+class PeakLevel:
+    def __init__(self, block_size, peaks):
+        self.block_size = block_size
+        self.peaks = peaks  # int16 array of shape (n, 2): min, max
+
+    def __len__(self):
+        return len(self.peaks)
+
+
+class PeakPyramid:
+    def __init__(self, sample_rate, num_samples, levels):
+        self.sample_rate = sample_rate
+        self.num_samples = num_samples
+        self.levels = levels  # finest first
+
+    @property
+    def duration(self):
+        return self.num_samples / float(self.sample_rate) if self.sample_rate else 0.0
+
+    def level_for(self, samples_per_column):
+        # Coarsest level that still has at least one peak per column
+        chosen = self.levels[0]
+        for level in self.levels:
+            if level.block_size <= samples_per_column:
+                chosen = level
+        return chosen
+
+    def peaks_for_range(self, start_sample, end_sample, columns):
+        start_sample = max(0, int(start_sample))
+        end_sample = min(self.num_samples, int(end_sample))
+        columns = max(1, int(columns))
+        if end_sample <= start_sample or not self.levels:
+            empty = np.zeros(columns, dtype=np.float32)
+            return empty, empty.copy()
+
+        level = self.level_for((end_sample - start_sample) / float(columns))
+        first = start_sample // level.block_size
+        last = min(len(level), -(-end_sample // level.block_size))
+        block = np.asarray(level.peaks[first:last])
+        if len(block) == 0:
+            empty = np.zeros(columns, dtype=np.float32)
+            return empty, empty.copy()
+
+        edges = np.linspace(0, len(block), columns + 1).astype(np.int64)
+        starts = np.minimum(edges[:-1], len(block) - 1)
+        if len(block) >= columns:
+            mins = np.minimum.reduceat(block[:, 0], starts)
+            maxs = np.maximum.reduceat(block[:, 1], starts)
+        else:
+            # Zoomed in past the finest level: repeat the nearest peak
+            mins = block[starts, 0]
+            maxs = block[starts, 1]
+        scale = 1.0 / 32767.0
+        return mins.astype(np.float32) * scale, maxs.astype(np.float32) * scale
+
+
+class PeakBuilder:
+    def __init__(self, sample_rate, base_block=BASE_BLOCK):
+        self.sample_rate = sample_rate
+        self.base_block = base_block
+        self.num_samples = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._chunks = []
+
+    def feed(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)  # (frames, channels) -> mono
+        self.num_samples += len(samples)
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        whole = len(samples) - len(samples) % self.base_block
+        if whole:
+            frames = samples[:whole].reshape(-1, self.base_block)
+            self._chunks.append(np.stack([frames.min(axis=1), frames.max(axis=1)], axis=1))
+        self._pending = samples[whole:].copy()
+
+    def finish(self):
+        if len(self._pending):
+            self._chunks.append(np.array([[self._pending.min(), self._pending.max()]], dtype=np.float32))
+            self._pending = np.zeros(0, dtype=np.float32)
+        if self._chunks:
+            base = np.concatenate(self._chunks)
+        else:
+            base = np.zeros((0, 2), dtype=np.float32)
+        self._chunks = []
+        base = (np.clip(base, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+        levels = [PeakLevel(self.base_block, base)]
+        while len(levels[-1]) > MIN_LEVEL_PEAKS:
+            prev = levels[-1].peaks
+            starts = np.arange(0, len(prev), LEVEL_FACTOR)
+            merged = np.stack([np.minimum.reduceat(prev[:, 0], starts),
+                               np.maximum.reduceat(prev[:, 1], starts)], axis=1)
+            levels.append(PeakLevel(levels[-1].block_size * LEVEL_FACTOR, merged))
+        return PeakPyramid(self.sample_rate, self.num_samples, levels)
+
+
+def sidecar_path(audio_path, cache_dir=CACHE_DIR):
+    key = hashlib.sha1(os.path.abspath(audio_path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, key + ".peaks")
+
+
+def save_pyramid(pyramid, path, mtime_ns, size):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, mtime_ns, size, pyramid.sample_rate,
+                            pyramid.num_samples, len(pyramid.levels)))
+        for level in pyramid.levels:
+            f.write(LEVEL_HEADER.pack(level.block_size, len(level)))
+        for level in pyramid.levels:
+            f.write(np.ascontiguousarray(level.peaks, dtype="<i2").tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_pyramid(path, mtime_ns=None, size=None):
+    # Memory-maps the sidecar so a render only touches the pages it reads
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, file_mtime, file_size, sample_rate, num_samples, num_levels = HEADER.unpack(header)
+        if magic != MAGIC:
+            return None
+        if mtime_ns is not None and (file_mtime != mtime_ns or file_size != size):
+            return None
+        level_info = [LEVEL_HEADER.unpack(f.read(LEVEL_HEADER.size)) for _ in range(num_levels)]
+
+    offset = HEADER.size + LEVEL_HEADER.size * num_levels
+    levels = []
+    for block_size, num_peaks in level_info:
+        if num_peaks:
+            peaks = np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(num_peaks, 2))
+        else:
+            peaks = np.zeros((0, 2), dtype=np.int16)
+        levels.append(PeakLevel(block_size, peaks))
+        offset += num_peaks * 4
+    return PeakPyramid(sample_rate, num_samples, levels)
+
+
+def compute_pyramid(audio_path):
+    info = audio_info(audio_path)
+    builder = PeakBuilder(info.sample_rate)
+    for block in iter_blocks(audio_path):
+        builder.feed(block)
+    return builder.finish()
+
+
+def cached_peaks(audio_path, cache_dir=CACHE_DIR):
+    # The stored pyramid if it still matches the file on disk, else None
+    stat = os.stat(audio_path)
+    path = sidecar_path(audio_path, cache_dir)
+    if os.path.exists(path):
+        try:
+            return load_pyramid(path, stat.st_mtime_ns, stat.st_size)
+        except (OSError, ValueError, struct.error):
+            pass
+    return None
+
+
+def store_peaks(audio_path, pyramid, cache_dir=CACHE_DIR):
+    stat = os.stat(audio_path)
+    try:
+        save_pyramid(pyramid, sidecar_path(audio_path, cache_dir), stat.st_mtime_ns, stat.st_size)
+    except OSError as e:
+        metrics.error("peak_cache", f"Could not write peak cache: {e}")
+
+
+def peaks_from_samples(samples, sample_rate):
+    builder = PeakBuilder(sample_rate)
+    builder.feed(samples)
+    return builder.finish()
+
+
+def get_peaks(audio_path, cache_dir=CACHE_DIR):
+    pyramid = cached_peaks(audio_path, cache_dir)
+    if pyramid is None:
+        pyramid = compute_pyramid(audio_path)
+        store_peaks(audio_path, pyramid, cache_dir)
+    return pyramid
@@ -0,0 +1,169 @@
+# pipeline.py
+# Headless pre-annotation: python -m utils.pipeline FOLDER [--stages peaks,vad,transcribe,autolabel]
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app_config import LABELS
+from utils.audio_stream import audio_info, read_range
+from utils.file_index import relative_name, scan_tree
+from utils.label_journal import LabelJournal, journal_path_for
+from utils.label_store import format_time
+from utils.metrics import metrics
+from utils.peak_cache import cached_peaks, peaks_from_samples, store_peaks
+
+STAGES = ("peaks", "vad", "transcribe", "autolabel")
+PIPELINE_DIR = os.path.join("output", "pipeline")
+SPEECH_RATIO = 0.2        # share of the file VAD must mark as speech to suggest "Speech"
+
+
+def walk_audio_files(folder):
+    return sorted(path for path, _, _ in scan_tree(folder))
+
+
+def suggest_labels(path, samples, sample_rate, segments):
+    # Same features and model the GUI uses, so pre-annotations match what the labeler sees.
+    # The model is re-read per call; it is a few KB and keeps worker processes stateless.
+    from utils.auto_label import LabelSuggester
+    from utils.features import get_features
+
+    suggester = LabelSuggester(LABELS)
+    scores = suggester.suggest(get_features(path, samples, sample_rate))
+    duration = len(samples) / float(sample_rate) if sample_rate else 0.0
+    speech = sum(end - start for start, end in segments)
+    if duration and speech / duration >= SPEECH_RATIO:
+        scores["Speech"] = 1.0
+    return suggester.pick(scores)
+
+
+def process_file(path, folder, stages, backend_name=None):
+    # Runs in a worker process: the file is decoded once and every stage shares the buffer.
+    # Returns entries in the shape save_label writes.
+    from utils.vad import segment_samples
+
+    info = audio_info(path)
+    samples = read_range(path)
+    sample_rate = info.sample_rate
+    filename = relative_name(path, folder)
+
+    if "peaks" in stages and cached_peaks(path) is None:
+        store_peaks(path, peaks_from_samples(samples, sample_rate))
+
+    segments = segment_samples(samples, sample_rate) if ("vad" in stages or "autolabel" in stages) else []
+    labels = suggest_labels(path, samples, sample_rate, segments) if "autolabel" in stages else []
+
+    texts = None
+    if "transcribe" in stages:
+        from utils.transcription_ai import get_backend, transcribe_samples, transcribe_segments
+        backend = get_backend(backend_name)
+        if "vad" in stages:
+            texts = [s["transcription"] for s in
+                     transcribe_segments(path, segments, backend, samples=samples, sample_rate=sample_rate)]
+        else:
+            texts = [transcribe_samples(samples, sample_rate, backend)]
+
+    if "vad" in stages and segments:
+        spans = [(format_time(start), format_time(end)) for start, end in segments]
+    else:
+        spans = [("", "")]
+    entries = []
+    for i, (start, end) in enumerate(spans):
+        entries.append({
+            "filename": filename,
+            "transcription": texts[i] if texts else "",
+            "labels": ", ".join(labels),
+            "start_time": start,
+            "end_time": end,
+        })
+    return path, info.duration, entries
+
+
+def load_done(done_path):
+    if not os.path.exists(done_path):
+        return set()
+    with open(done_path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.endswith("\n")}
+
+
+def run_pipeline(folder, stages=STAGES, workers=None, output_path=None, backend_name=None, progress=None):
+    # Resumable: a file is listed in <output>.done only after its entries reached the journal
+    output_path = output_path or journal_path_for(folder, PIPELINE_DIR)
+    done_path = output_path + ".done"
+    done = load_done(done_path)
+    paths = [p for p in walk_audio_files(folder) if os.path.abspath(p) not in done]
+    workers = workers or os.cpu_count() or 1
+
+    journal = LabelJournal(output_path)
+    os.makedirs(os.path.dirname(done_path) or ".", exist_ok=True)
+    stats = {"files": 0, "failed": 0, "skipped": len(done), "entries": 0, "audio_seconds": 0.0}
+    started = time.perf_counter()
+    with open(done_path, "a", encoding="utf-8") as done_file, ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(paths)
+        # Keep a bounded number of files in flight so 100k-file trees do not queue 100k futures
+        while True:
+            while len(pending) < workers * 2:
+                path = next(queue, None)
+                if path is None:
+                    break
+                future = pool.submit(process_file, path, folder, tuple(stages), backend_name)
+                future.path = path
+                pending.add(future)
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    path, duration, entries = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    metrics.error("pipeline", f"Pipeline failed for {future.path}: {e}")
+                    continue
+                for entry in entries:
+                    journal.append(entry)
+                journal.sync()
+                done_file.write(os.path.abspath(path) + "\n")
+                done_file.flush()
+                stats["files"] += 1
+                stats["entries"] += len(entries)
+                stats["audio_seconds"] += duration
+                if progress is not None:
+                    progress(stats, len(paths))
+    journal.close()
+    stats["elapsed"] = time.perf_counter() - started
+    stats["output"] = output_path
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-annotate a directory tree of audio files.")
+    parser.add_argument("folder")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--output", default=None, help="journal to write (default: output/pipeline/...)")
+    parser.add_argument("--backend", default=None, help="transcription backend (default: app_config)")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    def show(stats, total):
+        if stats["files"] % 100 == 0 or stats["files"] == total:
+            print(f"[{stats['files']}/{total}] {stats['entries']} entries", flush=True)
+
+    stats = run_pipeline(args.folder, stages, args.workers, args.output, args.backend, show)
+    rate = stats["files"] / stats["elapsed"] * 60.0 if stats["elapsed"] else 0.0
+    print(f"Processed {stats['files']} files ({stats['failed']} failed, {stats['skipped']} already done), "
+          f"{stats['entries']} entries in {stats['elapsed']:.1f}s: {rate:.1f} files/min, "
+          f"{stats['audio_seconds'] / max(stats['elapsed'], 1e-9):.1f} audio-s/s -> {stats['output']}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
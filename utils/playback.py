@@ -0,0 +1,191 @@
+# playback.py
+
+import time
+
+import numpy as np
+
+from utils.audio_stream import audio_info, read_range
+
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = 512          # frames; ~12 ms of output latency
+FIRST_WINDOW_SECONDS = 0.25 # kept short so the first sound is ready almost immediately
+WINDOW_SECONDS = 2.0
+RATES = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+
+
+def init_mixer():
+    import pygame
+    pygame.mixer.pre_init(frequency=MIXER_FREQUENCY, size=-16, channels=2, buffer=MIXER_BUFFER)
+    pygame.mixer.init()
+
+
+class PlaybackEngine:
+    # Plays already-decoded samples through one reserved mixer channel. Audio is converted to
+    # mixer format a short window at a time and queued back-to-back, so starting, seeking and
+    # looping never re-open or re-decode the file. tick() must be called regularly (every few
+    # tens of ms) from the UI loop to keep the next window queued.
+    def __init__(self):
+        import pygame
+        self._pygame = pygame
+        self.frequency, _, self.channels = pygame.mixer.get_init()
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self.rate = 1.0
+        self.path = None
+        self._samples = None
+        self._sample_rate = None
+        self._duration = 0.0
+        self._region = (0.0, 0.0)
+        self._loop = False
+        self._cursor = 0.0
+        self._playing = False
+        self._paused_at = None
+        self._origin = 0.0
+        self._started = 0.0
+
+    # ---- source ----
+
+    def load(self, path, samples=None, sample_rate=None):
+        # samples: mono float32 buffer (e.g. from the prefetcher); without it windows are read from disk
+        if path == self.path:
+            if samples is not None:
+                self._samples = samples  # decode finished: later windows come from memory
+            return
+        self.stop()
+        self.path = path
+        self._samples = samples
+        # Position and loop region belong to the previous file
+        self._origin = 0.0
+        self._region = (0.0, 0.0)
+        self._loop = False
+        if samples is not None:
+            self._sample_rate = sample_rate
+            self._duration = len(samples) / float(sample_rate)
+        else:
+            info = audio_info(path)
+            self._sample_rate = info.sample_rate
+            self._duration = info.duration
+
+    @property
+    def duration(self):
+        return self._duration
+
+    # ---- transport ----
+
+    def play(self, start=0.0, end=None, loop=False):
+        if self.path is None:
+            return
+        end = self._duration if end is None else min(end, self._duration)
+        start = min(max(0.0, start), end)
+        self._region = (start, end)
+        self._loop = loop
+        self._cursor = start
+        self._origin = start
+        self._paused_at = None
+        self._playing = True
+        self._started = time.monotonic()
+        window = self._next_window(FIRST_WINDOW_SECONDS)
+        if window is None:
+            self._playing = False
+            return
+        self.channel.play(window)
+        self.tick()
+
+    def pause(self):
+        if self._playing and self._paused_at is None:
+            self.channel.pause()
+            self._paused_at = time.monotonic()
+
+    def resume(self):
+        if self._paused_at is not None:
+            self._started += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self.channel.unpause()
+
+    def toggle(self):
+        if not self._playing:
+            position = self.position
+            self.play(position if position < self._duration else 0.0)
+        elif self._paused_at is not None:
+            self.resume()
+        else:
+            self.pause()
+
+    def stop(self):
+        self._playing = False
+        self._paused_at = None
+        self.channel.stop()
+
+    def seek(self, seconds):
+        if not self._playing:
+            self._origin = min(max(0.0, seconds), self._duration)
+            return
+        paused = self._paused_at is not None
+        start, end = (self._region if self._loop else (0.0, self._duration))
+        self.play(min(max(start, seconds), end), end if self._loop else None, self._loop)
+        if paused:
+            self.pause()
+
+    def set_rate(self, rate):
+        # Varispeed: pitch follows speed, like a tape machine
+        position = self.position
+        self.rate = rate
+        if self._playing:
+            self.seek(position)
+
+    @property
+    def playing(self):
+        return self._playing and self._paused_at is None
+
+    @property
+    def position(self):
+        if not self._playing:
+            return self._origin
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        position = self._origin + (now - self._started) * self.rate
+        start, end = self._region
+        if self._loop and end > start:
+            return start + (position - start) % (end - start)
+        return min(position, end)
+
+    def tick(self):
+        if not self._playing:
+            return
+        if self.channel.get_queue() is None:
+            window = self._next_window(WINDOW_SECONDS)
+            if window is not None:
+                self.channel.queue(window)
+            elif not self.channel.get_busy():
+                self._playing = False
+                self._origin = self._region[1]
+
+    # ---- internals ----
+
+    def _read(self, start, end):
+        if self._samples is not None:
+            a = int(start * self._sample_rate)
+            b = int(np.ceil(end * self._sample_rate)) + 1
+            return self._samples[a:b]
+        return read_range(self.path, start, end + 1.0 / self._sample_rate)
+
+    def _next_window(self, seconds):
+        start, end = self._region
+        if self._cursor >= end:
+            if not self._loop or end <= start:
+                return None
+            self._cursor = start
+        span = min(seconds * self.rate, end - self._cursor)
+        source = self._read(self._cursor, self._cursor + span)
+        self._cursor += span
+
+        # Resample straight to the mixer rate (and playback rate) with linear interpolation
+        frames = max(1, int(round(span / self.rate * self.frequency)))
+        positions = np.arange(frames) * (self.rate * self._sample_rate / self.frequency)
+        if len(source) == 0:
+            mono = np.zeros(frames, dtype=np.float32)
+        else:
+            mono = np.interp(positions, np.arange(len(source)), source)
+        pcm = (np.clip(mono, -1.0, 1.0) * 32767.0).astype(np.int16)
+        if self.channels > 1:
+            pcm = np.repeat(pcm[:, None], self.channels, axis=1)
+        return self._pygame.mixer.Sound(buffer=np.ascontiguousarray(pcm).tobytes())
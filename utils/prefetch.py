@@ -0,0 +1,111 @@
+# prefetch.py
+
+import threading
+from collections import OrderedDict
+
+from utils.audio_stream import audio_info, read_range
+from utils.metrics import metrics
+from utils.peak_cache import get_peaks
+
+PREFETCH_AHEAD = 3
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class PrefetchedAudio:
+    def __init__(self, path, peaks, samples, sample_rate):
+        self.path = path
+        self.peaks = peaks
+        self.samples = samples          # mono float32 shared by player and transcription, None when too large
+        self.sample_rate = sample_rate
+
+    @property
+    def nbytes(self):
+        return self.samples.nbytes if self.samples is not None else 0
+
+
+def load_entry(path, max_bytes=MAX_CACHE_BYTES):
+    with metrics.timer("peaks"):
+        peaks = get_peaks(path)
+    info = audio_info(path)
+    samples = None
+    if info.frames * 4 <= max_bytes // 2:
+        with metrics.timer("decode", audio_seconds=info.duration):
+            samples = read_range(path)
+    return PrefetchedAudio(path, peaks, samples, info.sample_rate)
+
+
+class Prefetcher:
+    def __init__(self, ahead=PREFETCH_AHEAD, max_bytes=MAX_CACHE_BYTES):
+        self.ahead = ahead
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._pending = []
+        self._loading = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def schedule(self, paths, index):
+        # Replaces the queue, so files the labeler has already skipped past are dropped
+        with self._cond:
+            self._pending = list(paths[index:index + self.ahead + 1])
+            self._cond.notify_all()
+
+    def peek(self, path):
+        with self._cond:
+            entry = self._cache.get(path)
+            if entry is not None:
+                self._cache.move_to_end(path)
+            return entry
+
+    def get(self, path):
+        with self._cond:
+            while path in self._loading:
+                self._cond.wait()
+            entry = self._cache.get(path)
+            if entry is not None:
+                self._cache.move_to_end(path)
+                return entry
+            self._loading.add(path)
+        try:
+            entry = load_entry(path, self.max_bytes)
+        finally:
+            with self._cond:
+                self._loading.discard(path)
+                self._cond.notify_all()
+        self._store(entry)
+        return entry
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending = []
+            self._cond.notify_all()
+
+    def _store(self, entry):
+        with self._cond:
+            old = self._cache.pop(entry.path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._cache[entry.path] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._pending:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                path = self._pending.pop(0)
+                if path in self._cache or path in self._loading:
+                    continue
+            try:
+                self.get(path)
+            except Exception as e:
+                metrics.error("prefetch", f"Prefetch failed for {path}: {e}")
@@ -21,6 +21,21 @@ def bind_shortcuts(root, app):
     for key, label in label_keys.items():
         root.bind(key, lambda e, lbl=label: toggle_label(app, lbl))
 
+    # Playback: seek, region loop and speed (only for apps with a playback engine)
+    if hasattr(app, "seek_relative"):
+        root.bind('<Alt-Left>', lambda event: app.seek_relative(-5.0))
+        root.bind('<Alt-Right>', lambda event: app.seek_relative(5.0))
+        root.bind('<Control-p>', lambda event: app.play_selection())
+        root.bind('<Control-bracketleft>', lambda event: step_rate(app, -1))
+        root.bind('<Control-bracketright>', lambda event: step_rate(app, 1))
+
+def step_rate(app, step):
+    from utils.playback import RATES
+    rates = list(RATES)
+    current = float(app.rate_var.get().rstrip("x"))  # the player is only created on first play
+    index = rates.index(current) if current in rates else rates.index(1.0)
+    app.set_playback_rate(rates[min(max(index + step, 0), len(rates) - 1)])
+
 def toggle_label(app, label):
     var = app.label_vars.get(label)
     if var is not None:
@@ -0,0 +1,218 @@
+# spectrogram.py
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.audio_stream import audio_info, read_range
+from utils.metrics import metrics
+
+CACHE_DIR = os.path.join("assets", "spectrograms")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+SPECTROGRAM_VERSION = 1
+N_FFT = 1024
+BASE_HOP = 256           # samples between columns at the finest zoom level; each level doubles it
+TILE_COLUMNS = 256
+N_ROWS = 128             # mel-spaced frequency rows, low frequencies at the bottom
+DB_RANGE = (-100.0, -20.0)  # fixed dB window so neighbouring tiles share one colour scale
+MAX_MEMORY_TILES = 256   # 8 MB of tiles per file
+
+
+def _mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _row_starts(sample_rate):
+    # First FFT bin of each mel row; reduceat then averages the bins between row starts
+    bins = N_FFT // 2 + 1
+    edges = 700.0 * (10 ** (np.linspace(0, _mel(sample_rate / 2.0), N_ROWS + 1) / 2595.0) - 1.0)
+    starts = np.round(edges[:-1] / (sample_rate / 2.0) * (bins - 1)).astype(np.int64)
+    starts = np.maximum.accumulate(np.minimum(starts, bins - 1))
+    counts = np.diff(np.append(starts, bins))
+    return starts, np.maximum(counts, 1)
+
+
+def tile_seconds(level, sample_rate):
+    return TILE_COLUMNS * BASE_HOP * 2 ** level / float(sample_rate)
+
+
+def level_for(seconds_per_pixel, sample_rate, max_level):
+    # Finest level whose columns are no narrower than a screen pixel
+    hop_seconds = BASE_HOP / float(sample_rate)
+    if seconds_per_pixel <= hop_seconds:
+        return 0
+    return int(min(max_level, np.floor(np.log2(seconds_per_pixel / hop_seconds))))
+
+
+class SpectrogramTiles:
+    # STFT tiles of one file at power-of-two zoom levels. Tiles are computed only when asked for,
+    # kept in a small in-memory LRU and cached on disk, so opening or panning a multi-hour file
+    # never touches more audio than the visible tiles need.
+    def __init__(self, path, samples=None, sample_rate=None, cache_dir=CACHE_DIR, max_tiles=MAX_MEMORY_TILES):
+        self.path = path
+        if samples is not None and sample_rate:
+            self.sample_rate = sample_rate
+            self.duration = len(samples) / float(sample_rate)
+        else:
+            # Too large to keep decoded: tiles read only the ranges they cover
+            info = audio_info(path)
+            self.sample_rate = info.sample_rate
+            self.duration = info.duration
+        self.samples = samples
+        self.max_tiles = max_tiles
+        frames = max(1, int(self.duration * self.sample_rate) // BASE_HOP)
+        self.max_level = max(0, int(np.ceil(np.log2(frames / float(TILE_COLUMNS)))))
+        self._window = np.hanning(N_FFT).astype(np.float32)
+        self._row_starts, self._row_counts = _row_starts(self.sample_rate)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.directory = self._open_cache(cache_dir)
+
+    def _open_cache(self, cache_dir):
+        key = hashlib.sha1(os.path.abspath(self.path).encode("utf-8")).hexdigest()
+        directory = os.path.join(cache_dir, key)
+        stat = os.stat(self.path)
+        meta = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "version": SPECTROGRAM_VERSION,
+                "n_fft": N_FFT, "base_hop": BASE_HOP, "rows": N_ROWS, "columns": TILE_COLUMNS}
+        meta_path = os.path.join(directory, "meta.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                if json.load(f) == meta:
+                    os.utime(directory)  # most recently used, for prune_cache
+                    return directory
+        except (OSError, ValueError):
+            pass
+        try:
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory, exist_ok=True)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            return directory
+        except OSError as e:
+            metrics.error("spectrogram", f"Could not create spectrogram cache: {e}")
+            return None
+
+    def tile_seconds(self, level):
+        return tile_seconds(level, self.sample_rate)
+
+    def level_for(self, seconds_per_pixel):
+        return level_for(seconds_per_pixel, self.sample_rate, self.max_level)
+
+    def tiles_for_range(self, start, end, level):
+        span = self.tile_seconds(level)
+        first = max(0, int(start // span))
+        last = min(int(np.ceil(self.duration / span)), int(np.ceil(end / span)))
+        return range(first, max(first, last))
+
+    def _tile_path(self, level, index):
+        return os.path.join(self.directory, f"L{level}-{index}.u8")
+
+    def cached(self, level, index):
+        # Memory, then disk; None when the tile still has to be computed
+        with self._lock:
+            tile = self._memory.get((level, index))
+            if tile is not None:
+                self._memory.move_to_end((level, index))
+                return tile
+        if self.directory is None:
+            return None
+        try:
+            with open(self._tile_path(level, index), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != N_ROWS * TILE_COLUMNS:
+            return None
+        tile = np.frombuffer(data, dtype=np.uint8).reshape(N_ROWS, TILE_COLUMNS)
+        self._remember(level, index, tile)
+        return tile
+
+    def get(self, level, index):
+        # Safe to call from worker threads
+        tile = self.cached(level, index)
+        if tile is None:
+            with metrics.timer("spectrogram tile", level=level):
+                tile = self.compute(level, index)
+            self._remember(level, index, tile)
+            self._store(level, index, tile)
+        return tile
+
+    def _remember(self, level, index, tile):
+        with self._lock:
+            self._memory[(level, index)] = tile
+            self._memory.move_to_end((level, index))
+            while len(self._memory) > self.max_tiles:
+                self._memory.popitem(last=False)
+
+    def _store(self, level, index, tile):
+        if self.directory is None:
+            return
+        path = self._tile_path(level, index)
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(tile.tobytes())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            metrics.error("spectrogram", f"Could not write spectrogram tile: {e}")
+
+    # ---- STFT ----
+
+    def _read(self, first_sample, end_sample):
+        # Zero-padded outside the file
+        length = end_sample - first_sample
+        out = np.zeros(length, dtype=np.float32)
+        a = max(0, first_sample)
+        if self.samples is not None:
+            chunk = self.samples[a:max(a, end_sample)]
+        else:
+            chunk = read_range(self.path, a / float(self.sample_rate), end_sample / float(self.sample_rate))
+        chunk = chunk[:length - (a - first_sample)]
+        out[a - first_sample:a - first_sample + len(chunk)] = chunk
+        return out
+
+    def _frames(self, level, index):
+        hop = BASE_HOP * 2 ** level
+        first_center = index * TILE_COLUMNS * hop
+        if hop <= N_FFT:
+            # Overlapping windows: one contiguous read, framed without copying
+            span = self._read(first_center - N_FFT // 2, first_center + (TILE_COLUMNS - 1) * hop + N_FFT // 2)
+            return np.lib.stride_tricks.sliding_window_view(span, N_FFT)[::hop][:TILE_COLUMNS]
+        # Zoomed out: windows are far apart, so only the samples under each window are read
+        return np.stack([self._read(first_center + c * hop - N_FFT // 2, first_center + c * hop + N_FFT // 2)
+                         for c in range(TILE_COLUMNS)])
+
+    def compute(self, level, index):
+        frames = self._frames(level, index)
+        power = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1))).astype(np.float32)
+        power *= 4.0 / (self._window.sum() ** 2)  # full-scale sine -> 0 dB
+        rows = np.add.reduceat(power, self._row_starts, axis=1) / self._row_counts
+        db = 10.0 * np.log10(rows + 1e-12)
+        low, high = DB_RANGE
+        scaled = np.clip((db - low) / (high - low), 0.0, 1.0) * 255.0
+        # (columns, rows) -> (rows, columns) with the lowest frequency in the last row
+        return np.ascontiguousarray(scaled.astype(np.uint8).T[::-1])
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    # Removes the least recently opened files' tiles once the cache grows past max_bytes
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if not entry.is_dir():
+            continue
+        size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+        entries.append((entry.stat().st_mtime, entry.path, size))
+        total += size
+    for _, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
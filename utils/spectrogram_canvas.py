@@ -0,0 +1,134 @@
+# spectrogram_canvas.py
+
+import tkinter as tk
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.spectrogram import N_ROWS, TILE_COLUMNS
+
+MAX_IMAGES = 64   # rendered tiles kept for panning back and forth at one zoom
+# Dark blue -> purple -> orange -> pale yellow, interpolated to 256 entries
+_ANCHORS = np.array([[0, 0, 4], [40, 11, 84], [101, 21, 110], [159, 42, 99],
+                     [212, 72, 66], [245, 125, 21], [250, 193, 39], [252, 255, 164]], dtype=np.float32)
+COLORMAP = np.stack([np.interp(np.linspace(0, 1, 256), np.linspace(0, 1, len(_ANCHORS)), _ANCHORS[:, c])
+                     for c in range(3)], axis=1).astype(np.uint8)
+
+
+def tile_image(tile, width, height):
+    # Nearest-neighbour resize of a (rows, columns) uint8 tile to width x height, as a PPM PhotoImage
+    rows = (np.arange(height) * N_ROWS // height).astype(np.int64)
+    cols = (np.arange(width) * TILE_COLUMNS // width).astype(np.int64)
+    rgb = COLORMAP[tile[rows[:, None], cols[None, :]]]
+    header = f"P6 {width} {height} 255\n".encode("ascii")
+    return tk.PhotoImage(data=header + rgb.tobytes(), format="PPM")
+
+
+class SpectrogramView(tk.Frame):
+    # Shows the same time range as the waveform above it. Each redraw lays out the visible tiles
+    # of the matching zoom level; missing tiles are requested through request(tiles, level, index,
+    # on_done), which should compute them off the UI thread, call on_done(tile) or on_done(None) on
+    # failure, and return something with cancel().
+    def __init__(self, master, height=128, request=None, bg="#000004", **kwargs):
+        super().__init__(master, **kwargs)
+        self.request = request
+        self.tiles = None
+        self.view_start = 0.0
+        self.view_span = 0.0
+        self._images = OrderedDict()
+        self._items = {}
+        self._pending = {}
+        self._failed = set()
+        self._redraw_pending = False
+        self.canvas = tk.Canvas(self, height=height, bg=bg, highlightthickness=0)
+        self.canvas.pack(fill=tk.X, expand=True)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+
+    # ---- public API ----
+
+    def set_source(self, tiles):
+        self._cancel_pending(keep=())
+        self.tiles = tiles
+        self._failed.clear()
+        self._images.clear()
+        for item in self._items.values():
+            self.canvas.delete(item)
+        self._items.clear()
+        if tiles is not None and self.view_span <= 0:
+            self.view_start, self.view_span = 0.0, tiles.duration
+        self.schedule_redraw()
+
+    def clear(self):
+        self.view_start = self.view_span = 0.0
+        self.set_source(None)
+
+    def set_view(self, start, span):
+        if (start, span) != (self.view_start, self.view_span):
+            self.view_start, self.view_span = start, span
+            self.schedule_redraw()
+
+    # ---- drawing ----
+
+    def schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self.redraw)
+
+    def redraw(self):
+        self._redraw_pending = False
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        tiles = self.tiles
+        if tiles is None or width <= 1 or self.view_span <= 0:
+            return
+        seconds_per_pixel = self.view_span / width
+        level = tiles.level_for(seconds_per_pixel)
+        span = tiles.tile_seconds(level)
+        visible = set()
+        for index in tiles.tiles_for_range(self.view_start, self.view_start + self.view_span, level):
+            visible.add((level, index))
+            x0 = int(round((index * span - self.view_start) / seconds_per_pixel))
+            x1 = int(round(((index + 1) * span - self.view_start) / seconds_per_pixel))
+            tile = tiles.cached(level, index)
+            if tile is None:
+                self._request(level, index)
+                continue
+            key = (level, index, x1 - x0, height)
+            image = self._images.get(key)
+            if image is None:
+                image = self._images[key] = tile_image(tile, max(1, x1 - x0), height)
+                while len(self._images) > MAX_IMAGES:
+                    self._images.popitem(last=False)
+            self._images.move_to_end(key)
+            item = self._items.get((level, index))
+            if item is None:
+                item = self._items[(level, index)] = self.canvas.create_image(x0, 0, anchor="nw", image=image)
+            else:
+                self.canvas.coords(item, x0, 0)
+                self.canvas.itemconfigure(item, image=image)
+        for key in [k for k in self._items if k not in visible]:
+            self.canvas.delete(self._items.pop(key))
+        self._cancel_pending(keep=visible)
+
+    def _request(self, level, index):
+        key = (level, index)
+        if key in self._pending or key in self._failed or self.request is None:
+            return
+        tiles = self.tiles
+
+        def done(tile):
+            if self.tiles is not tiles:
+                return  # finished for a file that is no longer shown
+            self._pending.pop(key, None)
+            if tile is None:
+                self._failed.add(key)
+            else:
+                self.schedule_redraw()
+        self._pending[key] = self.request(tiles, level, index, done)
+
+    def _cancel_pending(self, keep):
+        # Tiles scrolled out of view before their turn are never computed
+        for key in [k for k in self._pending if k not in keep]:
+            handle = self._pending.pop(key)
+            if handle is not None:
+                handle.cancel()
@@ -1,20 +1,200 @@
 # transcription_ai.py
 
-import speech_recognition as sr
-import os
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def transcribe_audio(audio_path):
-    recognizer = sr.Recognizer()
-    try:
-        with sr.AudioFile(audio_path) as source:
-            audio = recognizer.record(source)
-            text = recognizer.recognize_google(audio)
-            return text
-    except sr.UnknownValueError:
+import numpy as np
+
+from app_config import TRANSCRIPTION_CONFIG
+from utils.audio_stream import audio_info, iter_blocks, read_range
+from utils.metrics import metrics
+
+# Audio is sent in chunks so memory stays bounded on long recordings
+CHUNK_SECONDS = 30
+SEGMENT_WORKERS = 4
+
+
+class UnintelligibleError(Exception):
+    pass
+
+
+class BackendRequestError(Exception):
+    pass
+
+
+def _speech_recognition():
+    # speech_recognition is slow to import and only needed once a real engine runs, not to open
+    # the window or to use the fake backend
+    import speech_recognition
+    return speech_recognition
+
+
+def samples_to_audio_data(samples, sample_rate):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    return _speech_recognition().AudioData(pcm.tobytes(), sample_rate, 2)
+
+
+# ------------------ Backends ------------------
+# A backend turns one chunk of mono float32 samples into text. It raises
+# UnintelligibleError when nothing intelligible was heard and BackendRequestError
+# when the engine could not be reached, so callers can retry the latter.
+
+class TranscriptionBackend:
+    name = None
+
+    def __init__(self, language="en-US", **options):
+        self.language = language
+        self.options = options
+
+    def settings(self):
+        return {"backend": self.name, "language": self.language}
+
+    def transcribe(self, samples, sample_rate):
+        raise NotImplementedError
+
+
+class RecognizerBackend(TranscriptionBackend):
+    # An engine reached through speech_recognition's Recognizer; its errors are translated
+    method = None
+
+    def transcribe(self, samples, sample_rate):
+        sr = _speech_recognition()
+        recognize = getattr(sr.Recognizer(), self.method)
+        try:
+            return recognize(samples_to_audio_data(samples, sample_rate), language=self.language)
+        except sr.UnknownValueError:
+            raise UnintelligibleError() from None
+        except sr.RequestError as e:
+            raise BackendRequestError(str(e)) from e
+
+
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+    method = "recognize_google"
+
+
+class SphinxBackend(RecognizerBackend):
+    name = "sphinx"
+    method = "recognize_sphinx"
+
+
+class FakeBackend(TranscriptionBackend):
+    # Deterministic stand-in: the same samples always produce the same text
+    name = "fake"
+    WORDS = ["audio", "label", "speech", "noise", "music", "hello", "test", "clip",
+             "signal", "voice", "sample", "record", "segment", "level", "tone", "pause"]
+
+    def __init__(self, language="en-US", latency=0.0, **options):
+        super().__init__(language, **options)
+        self.latency = latency
+
+    def transcribe(self, samples, sample_rate):
+        if self.latency:
+            time.sleep(self.latency)
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+        if not np.any(np.abs(pcm) > 328):
+            raise UnintelligibleError()
+        digest = hashlib.blake2b(pcm.tobytes(), digest_size=32).digest()
+        count = max(1, min(len(digest), int(len(samples) / float(sample_rate) * 2)))
+        return " ".join(self.WORDS[b % len(self.WORDS)] for b in digest[:count])
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    SphinxBackend.name: SphinxBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def get_backend(name=None, **options):
+    config = dict(TRANSCRIPTION_CONFIG)
+    config.update(options)
+    name = name or config.pop("backend")
+    config.pop("backend", None)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name](**config)
+
+
+# ------------------ Transcription ------------------
+
+def _transcribe_chunks(chunks, sample_rate, backend):
+    parts = []
+    for chunk in chunks:
+        try:
+            with metrics.timer("transcription backend", backend=backend.name):
+                parts.append(backend.transcribe(chunk, sample_rate))
+        except UnintelligibleError:
+            continue
+    if not parts:
         return "[Unintelligible]"
-    except sr.RequestError as e:
+    return " ".join(parts)
+
+
+def transcribe_samples(samples, sample_rate, backend=None):
+    # Uses an already-decoded buffer, e.g. the one the prefetcher shares with the waveform
+    backend = backend or get_backend()
+    step = sample_rate * CHUNK_SECONDS
+    chunks = (samples[i:i + step] for i in range(0, len(samples), step))
+    return _transcribe_chunks(chunks, sample_rate, backend)
+
+
+def transcribe_text(audio_path, backend=None):
+    # Raises BackendRequestError; callers that retry need to see it
+    backend = backend or get_backend()
+    sample_rate = audio_info(audio_path).sample_rate
+    chunks = iter_blocks(audio_path, block_frames=sample_rate * CHUNK_SECONDS)
+    return _transcribe_chunks(chunks, sample_rate, backend)
+
+
+def transcribe_cached(audio_path, backend=None, cache=None, samples=None, sample_rate=None):
+    # Raises like transcribe_text; only successful transcripts are stored
+    backend = backend or get_backend()
+    key = None
+    if cache is not None:
+        key = cache.key_for(audio_path, backend)
+        text = cache.get(key)
+        if text is not None:
+            return text
+    if samples is not None:
+        text = transcribe_samples(samples, sample_rate, backend)
+    else:
+        text = transcribe_text(audio_path, backend)
+    if key is not None:
+        cache.put(key, text)
+    return text
+
+
+def transcribe_audio(audio_path, backend=None, samples=None, sample_rate=None, cache=None):
+    try:
+        return transcribe_cached(audio_path, backend, cache, samples, sample_rate)
+    except BackendRequestError as e:
         return f"[Error: {e}]"
     except Exception as e:
         return f"[Unexpected error: {e}]"
 
+def transcribe_segments(audio_path, segments, backend=None, workers=SEGMENT_WORKERS, samples=None, sample_rate=None):
+    # Transcribes (start, end) segments concurrently; returns entries in segment order
+    backend = backend or get_backend()
+    if samples is None:
+        sample_rate = audio_info(audio_path).sample_rate
+
+    def work(segment):
+        start, end = segment
+        if samples is not None:
+            chunk = samples[int(start * sample_rate):int(end * sample_rate)]
+        else:
+            chunk = read_range(audio_path, start, end)
+        try:
+            text = backend.transcribe(chunk, sample_rate)
+        except UnintelligibleError:
+            text = "[Unintelligible]"
+        except BackendRequestError as e:
+            text = f"[Error: {e}]"
+        return {"start_time": start, "end_time": end, "transcription": text}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(work, segments))
+
 # Tip: You can also try using Whisper API (OpenAI) or AssemblyAI for better accuracy.
@@ -0,0 +1,92 @@
+# vad.py
+
+import numpy as np
+
+from utils.audio_stream import audio_info, iter_blocks
+
+FRAME_SECONDS = 0.02
+THRESHOLD_MARGIN_DB = 12.0   # above the estimated noise floor
+MIN_THRESHOLD_DB = -50.0
+MIN_SPEECH_SECONDS = 0.3
+MIN_SILENCE_SECONDS = 0.4
+PAD_SECONDS = 0.15
+MAX_SEGMENT_SECONDS = 30.0
+
+
+class FrameEnergy:
+    # Frame RMS in dBFS, accumulated block by block so long files stay in bounded memory
+    def __init__(self, sample_rate, frame_seconds=FRAME_SECONDS):
+        self.frame_len = max(1, int(sample_rate * frame_seconds))
+        self.frame_seconds = self.frame_len / float(sample_rate)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._chunks = []
+
+    def feed(self, samples):
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        whole = len(samples) - len(samples) % self.frame_len
+        if whole:
+            frames = samples[:whole].reshape(-1, self.frame_len)
+            rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+            self._chunks.append(20.0 * np.log10(np.maximum(rms, 1e-10)))
+        self._pending = samples[whole:].copy()
+
+    def finish(self):
+        if not self._chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self._chunks)
+
+
+def _runs(mask):
+    # (start, end) frame indices of each run of True values
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_segments(energies_db, frame_seconds, threshold_db=None, min_speech=MIN_SPEECH_SECONDS,
+                    min_silence=MIN_SILENCE_SECONDS, pad=PAD_SECONDS, max_segment=MAX_SEGMENT_SECONDS):
+    if len(energies_db) == 0:
+        return []
+    if threshold_db is None:
+        noise_floor = np.percentile(energies_db, 10)
+        threshold_db = max(MIN_THRESHOLD_DB, noise_floor + THRESHOLD_MARGIN_DB)
+
+    starts, ends = _runs(energies_db > threshold_db)
+    if len(starts) == 0:
+        return []
+
+    # Bridge short pauses so a sentence is not split at every breath
+    gaps = starts[1:] - ends[:-1]
+    keep = np.concatenate(([True], gaps * frame_seconds >= min_silence))
+    starts = starts[keep]
+    ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+
+    long_enough = (ends - starts) * frame_seconds >= min_speech
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    total = len(energies_db) * frame_seconds
+    segments = []
+    for start, end in zip(starts * frame_seconds - pad, ends * frame_seconds + pad):
+        start, end = max(0.0, float(start)), min(total, float(end))
+        pieces = max(1, int(np.ceil((end - start) / max_segment)))
+        bounds = np.linspace(start, end, pieces + 1)
+        segments.extend((float(a), float(b)) for a, b in zip(bounds[:-1], bounds[1:]))
+
+    # Padding can make neighbours overlap; clip each start to the previous end
+    for i in range(1, len(segments)):
+        if segments[i][0] < segments[i - 1][1]:
+            segments[i] = (segments[i - 1][1], segments[i][1])
+    return [s for s in segments if s[1] > s[0]]
+
+
+def segment_samples(samples, sample_rate, **options):
+    energy = FrameEnergy(sample_rate)
+    energy.feed(np.asarray(samples, dtype=np.float32))
+    return detect_segments(energy.finish(), energy.frame_seconds, **options)
+
+
+def segment_file(audio_path, **options):
+    energy = FrameEnergy(audio_info(audio_path).sample_rate)
+    for block in iter_blocks(audio_path):
+        energy.feed(block)
+    return detect_segments(energy.finish(), energy.frame_seconds, **options)
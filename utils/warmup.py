@@ -0,0 +1,31 @@
+# warmup.py
+
+import importlib
+import threading
+
+from utils.metrics import metrics
+
+# Heavy subsystems, in the order the labeler usually reaches them. None of these are imported
+# before the window is shown; the warm-up thread loads them while the labeler picks a folder.
+WARMUP_MODULES = (
+    "utils.playback", "pygame",              # playback
+    "librosa.filters",                       # analysis (label suggestions)
+    "speech_recognition",                    # transcription
+    "utils.pdf_generator",                   # export
+)
+
+
+def _run(modules):
+    for name in modules:
+        try:
+            with metrics.timer("import " + name):
+                importlib.import_module(name)
+        except Exception as e:
+            # A missing optional dependency only matters once its feature is used
+            metrics.error("warmup", f"Could not preload {name}: {e}")
+
+
+def start_warmup(modules=WARMUP_MODULES):
+    thread = threading.Thread(target=_run, args=(modules,), name="warmup", daemon=True)
+    thread.start()
+    return thread
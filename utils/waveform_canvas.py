@@ -0,0 +1,200 @@
+# waveform_canvas.py
+
+import tkinter as tk
+
+import numpy as np
+
+ZOOM_STEP = 1.25
+MIN_VIEW_SECONDS = 0.05
+
+
+class WaveformView(tk.Frame):
+    def __init__(self, master, height=140, on_select=None, on_view=None, bg="#ffffff", fg="#2980b9", **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.on_view = on_view  # called with (start, span) after every redraw, e.g. to keep a spectrogram in step
+        self.peaks = None
+        self.view_start = 0.0
+        self.view_span = 0.0
+        self.selection = None
+        self._drag_origin = None
+        self._redraw_pending = False
+
+        self.canvas = tk.Canvas(self, height=height, bg=bg, highlightthickness=0, cursor="crosshair")
+        self.scroll_x = tk.Scrollbar(self, orient="horizontal", command=self._on_scrollbar)
+        self.canvas.pack(fill=tk.X, expand=True)
+        self.scroll_x.pack(fill=tk.X)
+
+        self._selection_item = self.canvas.create_rectangle(0, 0, 0, 0, fill="#f9e79f", outline="")
+        self._axis_item = self.canvas.create_line(0, 0, 0, 0, fill="#bdc3c7")
+        self._wave_item = self.canvas.create_line(0, 0, 0, 0, fill=fg)
+        self._playhead_item = self.canvas.create_line(0, 0, 0, 0, fill="#c0392b")
+        self.playhead = None
+        self._label_item = self.canvas.create_text(4, 4, anchor="nw", fill="#7f8c8d", font=("Segoe UI", 8))
+
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Control-MouseWheel>", self._on_zoom_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self._scroll_pages(-0.1))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll_pages(0.1))
+        self.canvas.bind("<Control-Button-4>", lambda e: self.zoom(1 / ZOOM_STEP, e.x))
+        self.canvas.bind("<Control-Button-5>", lambda e: self.zoom(ZOOM_STEP, e.x))
+
+    # ---- public API ----
+
+    def set_peaks(self, peaks):
+        self.peaks = peaks
+        self.view_start = 0.0
+        self.view_span = peaks.duration if peaks is not None else 0.0
+        self.selection = None
+        self.schedule_redraw()
+
+    def clear(self):
+        self.set_peaks(None)
+
+    def set_selection(self, start, end):
+        self.selection = (min(start, end), max(start, end)) if start is not None else None
+        self._draw_selection()
+
+    def set_playhead(self, t):
+        self.playhead = t
+        self._draw_playhead()
+
+    def zoom(self, factor, anchor_x=None):
+        if self.peaks is None:
+            return
+        width = max(1, self.canvas.winfo_width())
+        anchor_x = width / 2 if anchor_x is None else anchor_x
+        anchor_t = self.x_to_time(anchor_x)
+        span = min(self.peaks.duration, max(MIN_VIEW_SECONDS, self.view_span * factor))
+        self.view_span = span
+        self._set_start(anchor_t - span * anchor_x / width)
+
+    def scroll_to(self, start):
+        self._set_start(start)
+
+    # ---- coordinate helpers ----
+
+    def x_to_time(self, x):
+        width = max(1, self.canvas.winfo_width())
+        return self.view_start + self.view_span * min(max(x, 0), width) / width
+
+    def time_to_x(self, t):
+        width = max(1, self.canvas.winfo_width())
+        if self.view_span <= 0:
+            return 0
+        return (t - self.view_start) * width / self.view_span
+
+    # ---- drawing ----
+
+    def schedule_redraw(self):
+        # Coalesce bursts of scroll/zoom events into one redraw per idle cycle
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self.redraw)
+
+    def redraw(self):
+        self._redraw_pending = False
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        mid = height / 2.0
+        self.canvas.coords(self._axis_item, 0, mid, width, mid)
+        if self.peaks is None or width <= 1 or self.view_span <= 0:
+            self.canvas.coords(self._wave_item, 0, mid, 0, mid)
+            self.canvas.itemconfigure(self._label_item, text="")
+            self._draw_selection()
+            self.scroll_x.set(0.0, 1.0)
+            return
+
+        rate = self.peaks.sample_rate
+        start_sample = self.view_start * rate
+        end_sample = (self.view_start + self.view_span) * rate
+        mins, maxs = self.peaks.peaks_for_range(start_sample, end_sample, width)
+
+        # Only the visible pixel columns are drawn, as one zig-zag polyline
+        columns = len(mins)
+        scale = (height / 2.0) - 2
+        coords = np.empty((columns, 4), dtype=np.float32)
+        xs = np.arange(columns, dtype=np.float32)
+        coords[:, 0] = xs
+        coords[:, 1] = mid - maxs * scale
+        coords[:, 2] = xs
+        coords[:, 3] = mid - mins * scale
+        coords[:, 3] = np.maximum(coords[:, 3], coords[:, 1] + 1)
+        self.canvas.coords(self._wave_item, coords.ravel().tolist())
+
+        self.canvas.itemconfigure(
+            self._label_item,
+            text=f"{self.view_start:.2f}s - {self.view_start + self.view_span:.2f}s / {self.peaks.duration:.2f}s")
+        self._draw_selection()
+        self._draw_playhead()
+        total = self.peaks.duration or 1.0
+        self.scroll_x.set(self.view_start / total, (self.view_start + self.view_span) / total)
+        if self.on_view is not None:
+            self.on_view(self.view_start, self.view_span)
+
+    def _draw_playhead(self):
+        if self.playhead is None or self.peaks is None:
+            self.canvas.coords(self._playhead_item, 0, 0, 0, 0)
+            return
+        x = self.time_to_x(self.playhead)
+        self.canvas.coords(self._playhead_item, x, 0, x, self.canvas.winfo_height())
+
+    def _draw_selection(self):
+        height = self.canvas.winfo_height()
+        if self.selection is None or self.peaks is None:
+            self.canvas.coords(self._selection_item, 0, 0, 0, 0)
+            return
+        x0 = self.time_to_x(self.selection[0])
+        x1 = self.time_to_x(self.selection[1])
+        self.canvas.coords(self._selection_item, x0, 0, x1, height)
+
+    def _set_start(self, start):
+        if self.peaks is None:
+            return
+        self.view_start = min(max(0.0, start), max(0.0, self.peaks.duration - self.view_span))
+        self.schedule_redraw()
+
+    # ---- event handlers ----
+
+    def _scroll_pages(self, pages):
+        self._set_start(self.view_start + pages * self.view_span)
+
+    def _on_scrollbar(self, action, *args):
+        if self.peaks is None:
+            return
+        if action == "moveto":
+            self._set_start(float(args[0]) * self.peaks.duration)
+        elif action == "scroll":
+            amount = int(args[0])
+            step = 1.0 if args[1] == "pages" else 0.1
+            self._scroll_pages(amount * step)
+
+    def _on_wheel(self, event):
+        self._scroll_pages(-0.1 if event.delta > 0 else 0.1)
+
+    def _on_zoom_wheel(self, event):
+        self.zoom(1 / ZOOM_STEP if event.delta > 0 else ZOOM_STEP, event.x)
+
+    def _on_press(self, event):
+        if self.peaks is None:
+            return
+        self._drag_origin = self.x_to_time(event.x)
+        self.set_selection(self._drag_origin, self._drag_origin)
+
+    def _on_drag(self, event):
+        if self._drag_origin is None:
+            return
+        self.set_selection(self._drag_origin, self.x_to_time(event.x))
+
+    def _on_release(self, event):
+        if self._drag_origin is None:
+            return
+        self.set_selection(self._drag_origin, self.x_to_time(event.x))
+        self._drag_origin = None
+        start, end = self.selection
+        if end > start and self.on_select is not None:
+            self.on_select(start, end)
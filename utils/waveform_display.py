@@ -1,16 +1,22 @@
 # waveform_display.py
 
-import librosa
-import librosa.display
 import matplotlib.pyplot as plt
+import numpy as np
 import os
 
+from utils.peak_cache import get_peaks
+
+PLOT_COLUMNS = 2000
+
 
 def display_waveform(audio_path):
     try:
-        y, sr = librosa.load(audio_path, sr=None)
+        peaks = get_peaks(audio_path)
+        mins, maxs = peaks.peaks_for_range(0, peaks.num_samples, PLOT_COLUMNS)
+        times = np.linspace(0, peaks.duration, len(mins))
         plt.figure(figsize=(10, 3))
-        librosa.display.waveshow(y, sr=sr)
+        plt.fill_between(times, mins, maxs, linewidth=0.5)
+        plt.xlim(0, peaks.duration)
         plt.title(f"Waveform: {os.path.basename(audio_path)}")
         plt.xlabel("Time (s)")
         plt.ylabel("Amplitude")